@@ -0,0 +1,64 @@
+"""Rows/second of the per-row scoring path vs. the batch engine.
+
+    python -m benchmarks.bench_batch --rows 5000
+
+`legacy` is the original main.analyze_text (separate predict and
+predict_proba calls), `per-row` is utils.scoring.analyze_text in a loop and
+`batch` is utils.scoring.analyze_texts.
+"""
+import argparse
+import random
+import time
+import warnings
+
+from textblob import TextBlob
+
+from benchmarks.bench_lexicon import synthetic_messages
+from utils.abuse_words import detect_abusive_tokens
+from utils.preprocessing import clean_text, normalize_censored
+from utils.scoring import load_pipeline, analyze_text, analyze_texts
+
+
+def legacy_analyze_text(text, pipeline):
+    text = normalize_censored(text)
+    cleaned = clean_text(text)
+    pred = pipeline.predict([cleaned])[0]
+    prob = pipeline.predict_proba([cleaned])[0][1]
+    abusive_tokens = detect_abusive_tokens(text)
+    polarity = TextBlob(text).sentiment.polarity
+    return cleaned, pred, prob, abusive_tokens, polarity
+
+
+def rows_per_second(fn, rows):
+    start = time.perf_counter()
+    fn()
+    return rows / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    pipeline = load_pipeline()
+    messages = synthetic_messages(args.rows, random.Random(7))
+
+    results = {
+        "legacy": rows_per_second(
+            lambda: [legacy_analyze_text(m, pipeline) for m in messages], args.rows),
+        "per-row": rows_per_second(
+            lambda: [analyze_text(m, pipeline) for m in messages], args.rows),
+        "batch": rows_per_second(
+            lambda: analyze_texts(messages, pipeline, batch_size=args.batch_size), args.rows),
+    }
+
+    base = results["legacy"]
+    print(f"{'path':>8} {'rows/s':>10} {'speedup':>8}")
+    for name, rate in results.items():
+        print(f"{name:>8} {rate:10.0f} {rate / base:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
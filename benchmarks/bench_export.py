@@ -0,0 +1,125 @@
+"""Bulk export: throughput, peak memory and file size per output format.
+
+    python -m benchmarks.bench_export --rows 1000000 --scored 50000
+
+Every method runs in a fresh interpreter, so its peak RSS (VmHWM) is its
+own. To measure the writers rather than the model, one `--chunk`-row chunk
+is scored once (with spans) and written over and over with new ids until
+`--rows` rows are out. `memory` is what the bulk tab did before: keep
+every scored frame, concatenate them and build the whole CSV as one string.
+The streaming formats write one chunk at a time (utils.export).
+
+`--scored` rows are then exported end to end, scoring included, with
+export_results.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+WRITERS = r"""
+import json, os, sys, tempfile, time, warnings
+warnings.filterwarnings("ignore")
+import pandas as pd
+from benchmarks.corpus import messages
+from train_model import peak_rss_mb
+from utils.export import CsvExporter, arrow_schema, export_frame, open_exporter
+from utils.scoring import iter_analyze_texts
+
+method, rows, chunk, level = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), int(sys.argv[4])
+texts = messages(chunk, seed=3)
+spans = method != "memory"
+scores = pd.concat(iter_analyze_texts(texts, batch_size=1000, spans=spans), ignore_index=True)
+base = peak_rss_mb()
+
+path = os.path.join(tempfile.mkdtemp(prefix="export-"), "out." + ("csv" if method == "memory" else method))
+start = time.perf_counter()
+if method == "memory":
+    frames = []
+    for done in range(0, rows, chunk):
+        frame = scores.set_axis(range(done, done + chunk))
+        frame.insert(0, "text", texts)
+        frames.append(frame)
+    data = pd.concat(frames).to_csv(index=False).encode()
+    with open(path, "wb") as f:
+        f.write(data)
+else:
+    if method == "csv.gz":
+        exporter = CsvExporter(path, arrow_schema(text=True), "gzip", level)
+    else:
+        exporter = open_exporter(path, method, text=True)
+    with exporter:
+        for done in range(0, rows, chunk):
+            exporter.write(export_frame(scores, range(done, done + chunk), texts))
+elapsed = time.perf_counter() - start
+size = os.path.getsize(path)
+os.remove(path)
+print(json.dumps({"rows/s": rows / elapsed, "seconds": elapsed, "peak MB": peak_rss_mb(),
+                  "over base MB": peak_rss_mb() - base, "file MB": size / 1e6}))
+"""
+
+SCORED = r"""
+import json, os, sys, tempfile, time, warnings
+warnings.filterwarnings("ignore")
+from benchmarks.corpus import messages
+from train_model import peak_rss_mb
+from utils.export import export_results
+from utils.scoring import load_pipeline
+
+fmt, rows = sys.argv[1], int(sys.argv[2])
+texts = messages(rows, seed=4)
+pipeline = load_pipeline()
+base = peak_rss_mb()
+path = os.path.join(tempfile.mkdtemp(prefix="export-"), "out." + fmt)
+start = time.perf_counter()
+export_results(texts, path, pipeline=pipeline, include_text=True, chunk_rows=10000)
+elapsed = time.perf_counter() - start
+size = os.path.getsize(path)
+os.remove(path)
+print(json.dumps({"rows/s": rows / elapsed, "seconds": elapsed, "peak MB": peak_rss_mb(),
+                  "over base MB": peak_rss_mb() - base, "file MB": size / 1e6}))
+"""
+
+
+def run(code, *args):
+    out = subprocess.check_output([sys.executable, "-c", code, *map(str, args)], stderr=subprocess.DEVNULL)
+    return json.loads(out)
+
+
+def row(name, result):
+    print(f"{name:>12} {result['rows/s']:10,.0f} {result['seconds']:8.1f} {result['peak MB']:8.0f} "
+          f"{result['over base MB']:8.0f} {result['file MB']:8.1f}")
+
+
+def header(title):
+    print(f"\n{title}")
+    print(f"{'method':>12} {'rows/s':>10} {'seconds':>8} {'peak MB':>8} {'+base MB':>8} {'file MB':>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk", type=int, default=10_000)
+    parser.add_argument("--scored", type=int, default=50_000, help="rows for the end-to-end run (0 to skip)")
+    parser.add_argument("--methods", default="memory,csv,csv.gz,parquet")
+    parser.add_argument("--gzip-levels", default="6,9", help="levels compared for csv.gz")
+    args = parser.parse_args()
+
+    rows = args.rows // args.chunk * args.chunk
+    header(f"writers, {rows:,} rows (one scored {args.chunk:,}-row chunk repeated)")
+    levels = [int(level) for level in args.gzip_levels.split(",")]
+    for method in args.methods.split(","):
+        if method == "csv.gz":
+            for level in levels:
+                row(f"csv.gz -{level}", run(WRITERS, method, rows, args.chunk, level))
+        else:
+            row(method, run(WRITERS, method, rows, args.chunk, 0))
+
+    if args.scored:
+        header(f"end to end, {args.scored:,} rows scored and exported")
+        for fmt in ("csv", "csv.gz", "parquet"):
+            row(fmt, run(SCORED, fmt, args.scored))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Highlighting cost on large inputs: per-token re.sub loop vs. span builder.
+
+    python -m benchmarks.bench_highlight --kb 100
+
+The script first checks the span builder on overlapping, nested and
+markup-looking inputs, then times both approaches on synthetic text with
+many lexicon hits.
+"""
+import argparse
+import random
+import re
+import sys
+import time
+
+from benchmarks.bench_lexicon import synthetic_messages
+from utils.abuse_words import detect_abusive_tokens
+from utils.highlight import merge_spans, highlight_spans, highlight_abusive
+
+
+def legacy_highlight(text, abusive_tokens):
+    highlighted = text
+    for w in abusive_tokens:
+        highlighted = re.sub(
+            f"(?i){re.escape(w)}",
+            f"<span class='abusive-word'>{w}</span>",
+            highlighted
+        )
+    return highlighted
+
+
+CHECKS = [
+    # overlapping: "go to hell" and "hell"
+    (merge_spans([(0, 10, "go to hell"), (6, 10, "hell")]), [(0, 10, ["go to hell", "hell"])]),
+    # partial overlap and chaining
+    (merge_spans([(5, 9, "b"), (0, 6, "a"), (8, 12, "c")]), [(0, 12, ["a", "b", "c"])]),
+    # nested span fully inside another
+    (merge_spans([(0, 20, "outer"), (3, 7, "inner")]), [(0, 20, ["outer", "inner"])]),
+    # adjacent spans stay separate
+    (merge_spans([(0, 3, "a"), (3, 6, "b")]), [(0, 3, ["a"]), (3, 6, ["b"])]),
+    (highlight_spans("go to hell!", [(0, 10, "go to hell"), (6, 10, "hell")], "x"),
+     "<span class='x'>go to hell</span>!"),
+    (highlight_spans("<b>idiot</b>", [(3, 8, "idiot")], "x"),
+     "&lt;b&gt;<span class='x'>idiot</span>&lt;/b&gt;"),
+    # "ass" must not fire inside the inserted class='abusive-word' markup or "class"
+    (highlight_abusive("my class, you ass", "abusive-word")[0],
+     "my class, you <span class='abusive-word'>ass</span>"),
+    # obfuscated terms are counted by scoring, so they must be marked too
+    (highlight_abusive("you 1d10t", "x"), ("you <span class='x'>1d10t</span>", ["idiot"])),
+    (highlight_abusive("stuuupid!", "x"), ("<span class='x'>stuuupid</span>!", ["stupid"])),
+    (highlight_abusive("(f**k) off", "x"), ("(<span class='x'>f**k</span>) off", ["fuck"])),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--kb", type=int, default=100)
+    args = parser.parse_args()
+
+    for i, (got, expected) in enumerate(CHECKS):
+        if got != expected:
+            sys.exit(f"check {i} failed: {got!r} != {expected!r}")
+    print(f"checks: {len(CHECKS)} OK")
+
+    rng = random.Random(9)
+    text = ""
+    while len(text) < args.kb * 1024:
+        text += " ".join(synthetic_messages(200, rng)) + " "
+    tokens = detect_abusive_tokens(text)
+
+    start = time.perf_counter()
+    legacy_highlight(text, tokens)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, hits = highlight_abusive(text, "abusive-word")
+    current = time.perf_counter() - start
+
+    print(f"{len(text) / 1024:.0f} KB, {len(hits):,} hits, {len(tokens)} distinct terms")
+    print(f"{'re.sub loop':>12} {legacy * 1e3:9.1f} ms")
+    print(f"{'spans':>12} {current * 1e3:9.1f} ms  ({legacy / current:.0f}x, including normalizing and the lexicon scan)")
+
+
+if __name__ == "__main__":
+    main()
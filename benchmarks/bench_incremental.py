@@ -0,0 +1,50 @@
+"""Per-keystroke latency of full vs. incremental real-time analysis.
+
+    python -m benchmarks.bench_incremental
+
+Simulates typing at the end of documents of growing size. `full` re-runs
+analyze_text on the whole text for every keystroke, `incremental` uses
+utils.incremental.IncrementalAnalyzer, which only rescores the sentence
+being edited.
+"""
+import argparse
+import random
+import time
+import warnings
+
+from benchmarks.bench_lexicon import synthetic_messages
+from utils.incremental import IncrementalAnalyzer
+from utils.scoring import load_pipeline, analyze_text
+
+
+def per_keystroke_ms(fn, base, typed):
+    start = time.perf_counter()
+    for i in range(1, len(typed) + 1):
+        fn(base + typed[:i])
+    return (time.perf_counter() - start) / len(typed) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--keystrokes", type=int, default=40)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    pipeline = load_pipeline()
+    rng = random.Random(5)
+    typed = "and honestly you are such an idiot sometimes"[:args.keystrokes]
+
+    print(f"{'sentences':>9} {'chars':>8} {'full ms':>9} {'incremental ms':>15}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        base = ". ".join(synthetic_messages(size, rng)) + ". "
+        analyzer = IncrementalAnalyzer(pipeline)
+        analyzer.analyze(base)  # the document as it was before typing
+
+        full = per_keystroke_ms(lambda t: analyze_text(t, pipeline), base, typed)
+        incremental = per_keystroke_ms(analyzer.analyze, base, typed)
+        print(f"{size:>9} {len(base):>8} {full:9.2f} {incremental:15.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Language routing: identification cost and lexicon matching work per message.
+
+    python -m benchmarks.bench_language --messages 20000
+
+The corpus is one third English messages (English filler, English terms),
+one third Hinglish (Hinglish filler, Hinglish terms) and one third mixed
+(30% Hinglish filler, any term), normalized the way scoring does it. The
+filler words are in the identifier's word lists, so the routing table
+mostly shows how the lexicon seeds and the mixed rule behave, not how well
+the trigram model guesses unseen words.
+
+`identify` is the cost per message with an empty word memo (cold) and
+after a pass (warm). `union` matches every message against the whole
+lexicon, `routed` against the partition of its language; `terms` is the
+average lexicon size a message is matched against. Missed and extra hits
+compare the routed terms with the union's, message by message.
+"""
+import argparse
+import time
+from collections import Counter
+
+from benchmarks.corpus import generate
+from utils import abuse_words
+from utils.language import LanguageIdentifier, read_words
+from utils.lexicon import CATEGORY_LANGUAGES
+from utils.preprocessing import normalize_censored
+from utils.settings import LANGUAGE_WORDLISTS
+
+
+def corpus(count, seed):
+    lexicon = abuse_words.get_lexicon()
+    hindi = {t for t in lexicon.terms if CATEGORY_LANGUAGES.get(lexicon.category(t)) == "hi"}
+    parts = {
+        "en": dict(hinglish=0.0, terms=lexicon.terms - hindi),
+        "hi": dict(hinglish=1.0, terms=hindi),
+        "mixed": dict(hinglish=0.3),
+    }
+    texts, intended = [], []
+    for i, (name, kwargs) in enumerate(parts.items()):
+        for text, _ in generate(count // len(parts), abuse_density=0.05, seed=seed + i, **kwargs):
+            texts.append(normalize_censored(text))
+            intended.append(name)
+    return texts, intended
+
+
+def per_message_us(fn, texts, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(texts) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    texts, intended = corpus(args.messages, args.seed)
+    lexicon = abuse_words.get_lexicon()
+    seeds = lexicon.token_languages
+
+    identifier = LanguageIdentifier({lang: read_words(paths) for lang, paths in LANGUAGE_WORDLISTS.items()})
+    start = time.perf_counter()
+    languages = [identifier.identify(t, seeds) for t in texts]
+    cold = (time.perf_counter() - start) / len(texts) * 1e6
+    warm = per_message_us(lambda t: identifier.identify(t, seeds), texts, args.repeat)
+    print(f"identify: {cold:.1f} us/msg cold, {warm:.1f} us/msg warm ({len(texts):,} messages)")
+
+    print(f"\n{'intended':>8} " + " ".join(f"{lang:>6}" for lang in (*identifier.languages, "mixed", "und")))
+    table = Counter(zip(intended, languages))
+    for name in ("en", "hi", "mixed"):
+        total = sum(n for (i, _), n in table.items() if i == name)
+        print(f"{name:>8} " + " ".join(f"{table[name, lang] / total:6.1%}"
+                                        for lang in (*identifier.languages, "mixed", "und")))
+
+    pairs = list(zip(texts, languages))
+    matchers = [lexicon.matcher_for(lang) for lang in languages]
+    union = per_message_us(lambda t: lexicon.matcher.find_terms(t), texts, args.repeat)
+    routed_pairs = list(zip(texts, matchers))
+    routed = per_message_us(lambda p: p[1].find_terms(p[0]), routed_pairs, args.repeat)
+    both = per_message_us(lambda p: lexicon.matcher_for(identifier.identify(p[0], seeds)).find_terms(p[0]),
+                          pairs, args.repeat)
+    terms = sum(len(m) for m in matchers) / len(matchers)
+
+    missed = extra = 0
+    for text, matcher in routed_pairs:
+        expected, got = lexicon.matcher.find_terms(text), matcher.find_terms(text)
+        missed += bool(expected - got)
+        extra += bool(got - expected)
+
+    print(f"\n{'':>18} {'us/msg':>7} {'terms':>6}")
+    print(f"{'union':>18} {union:7.1f} {len(lexicon):6.0f}")
+    print(f"{'routed':>18} {routed:7.1f} {terms:6.1f}")
+    print(f"{'identify + routed':>18} {both:7.1f}")
+    print(f"messages with missed hits: {missed}, with extra hits: {extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Per-message cost of lexicon matching as the lexicon grows.
+
+    python -m benchmarks.bench_lexicon
+
+Compares the original per-word `re.search` loop with the compiled
+Aho-Corasick matcher in utils.abuse_words. The regex loop is only timed
+on a sample of messages: past ~500 terms it also overflows the `re` module's
+pattern cache and starts recompiling on every call.
+"""
+import argparse
+import random
+import re
+import string
+import time
+
+from utils.abuse_words import abusive_words, LexiconMatcher
+
+
+def legacy_detect(text, words):
+    text_lower = text.lower()
+    found = set()
+    for word in words:
+        if re.search(re.escape(word), text_lower):
+            found.add(word)
+    return sorted(found)
+
+
+def synthetic_lexicon(size, rng):
+    words = set(abusive_words)
+    while len(words) < size:
+        n = rng.randint(4, 10)
+        words.add("".join(rng.choice(string.ascii_lowercase) for _ in range(n)))
+    return words
+
+
+def synthetic_messages(count, rng):
+    filler = ("the you are this what class meaning so really just "
+              "please thanks today game chat lol ok why not").split()
+    vocab = sorted(abusive_words)
+    messages = []
+    for _ in range(count):
+        tokens = [rng.choice(filler) for _ in range(rng.randint(8, 30))]
+        for _ in range(rng.randint(0, 3)):
+            tokens.insert(rng.randrange(len(tokens) + 1), rng.choice(vocab))
+        messages.append(" ".join(tokens))
+    return messages
+
+
+def per_message_us(fn, messages, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for m in messages:
+            fn(m)
+        best = min(best, time.perf_counter() - start)
+    return best / len(messages) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="250,1000,10000,50000")
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--legacy-max", type=int, default=10000,
+                        help="skip the regex loop above this lexicon size")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    messages = synthetic_messages(args.messages, rng)
+
+    print(f"{'terms':>8} {'build ms':>9} {'matcher us/msg':>15} {'regex loop us/msg':>18}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        words = synthetic_lexicon(size, rng)
+
+        start = time.perf_counter()
+        matcher = LexiconMatcher(words)
+        build_ms = (time.perf_counter() - start) * 1e3
+
+        fast = per_message_us(matcher.find_all, messages, args.repeat)
+        if size <= args.legacy_max:
+            slow = per_message_us(lambda m: legacy_detect(m, words), messages[:20], 1)
+            slow = f"{slow:18.1f}"
+        else:
+            slow = f"{'skipped':>18}"
+        print(f"{len(words):>8} {build_ms:9.1f} {fast:15.1f} {slow}")
+
+
+if __name__ == "__main__":
+    main()
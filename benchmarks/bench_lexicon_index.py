@@ -0,0 +1,187 @@
+"""Lexicon load time and memory at 1k, 10k and 100k terms, and hot reload under load.
+
+    python -m benchmarks.bench_lexicon_index --sizes 1000,10000,100000
+
+For every size a synthetic lexicon.tsv (the real terms padded with made-up
+words) is compiled the way build_lexicon.py does it. `tsv` is what every
+process paid before the index existed: parse the sources and build the
+automaton. `index` loads the compiled file. Memory is the traced Python
+heap held by the loaded lexicon, before and after matching the messages
+(index states are only materialized when a message reaches them).
+
+The reload run keeps a thread detecting terms while the lexicon is
+rebuilt with a new term a few times, and reports how long each new version
+took to show up and whether any call failed or saw a mix of versions.
+"""
+import argparse
+import gc
+import os
+import random
+import shutil
+import string
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from benchmarks.corpus import messages
+from utils import abuse_words
+from utils.lexicon import CATEGORIES, Lexicon, read_sources
+from utils.settings import LEXICON_PATH, LEXICON_SUGGESTIONS_PATH
+
+
+def write_lexicon(directory, size, rng, release="1", extra=()):
+    _, entries, _, _ = read_sources(LEXICON_PATH)
+    terms = {term for term, _, _ in entries}
+    while len(entries) < size:
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 12)))
+        if word not in terms:
+            terms.add(word)
+            entries.append((word, rng.choice(CATEGORIES), round(rng.random(), 2)))
+    path = os.path.join(directory, "lexicon.tsv")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"@version\t{release}\n")
+        for term, category, weight in [*entries[:size], *extra]:
+            f.write(f"{term}\t{category}\t{weight}\n")
+    shutil.copy(LEXICON_SUGGESTIONS_PATH, os.path.join(directory, "suggestions.tsv"))
+    return path
+
+
+def best_ms(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1e3
+
+
+def held_mb(fn):
+    """Traced heap still held by what `fn` returns (tracing is off while timing)."""
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    held = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    del result
+    return held
+
+
+def loaded_and_matched(load, corpus):
+    lexicon = load()
+    for text in corpus:
+        lexicon.matcher.find_all(text)
+    return lexicon
+
+
+def match_us(matcher, corpus):
+    start = time.perf_counter()
+    for text in corpus:
+        matcher.find_all(text)
+    return (time.perf_counter() - start) / len(corpus) * 1e6
+
+
+def sizes_table(sizes, corpus, repeat):
+    rng = random.Random(5)
+    print(f"{'terms':>7} {'source':>6} {'load ms':>9} {'file KiB':>9} {'heap MB':>8} "
+          f"{'after MB':>9} {'cold us/msg':>12} {'warm us/msg':>12}")
+    for size in sizes:
+        directory = tempfile.mkdtemp(prefix="lexicon-")
+        try:
+            source = write_lexicon(directory, size, rng)
+            suggestions = os.path.join(directory, "suggestions.tsv")
+            index = os.path.join(directory, "lexicon.idx")
+            Lexicon.from_sources(source, suggestions).save(index)
+
+            loaders = {
+                "tsv": lambda: Lexicon.from_sources(source, suggestions),
+                "index": lambda: Lexicon.load(index),
+            }
+            for name, load in loaders.items():
+                ms = best_ms(load, repeat)
+                heap = held_mb(load)
+                after = held_mb(lambda: loaded_and_matched(load, corpus))
+                lexicon = load()
+                cold = match_us(lexicon.matcher, corpus)
+                warm = min(match_us(lexicon.matcher, corpus) for _ in range(repeat))
+                size_kib = os.path.getsize(index if name == "index" else source) / 1024
+                print(f"{size:>7} {name:>6} {ms:9.1f} {size_kib:9.0f} {heap:8.1f} "
+                      f"{after:9.1f} {cold:12.1f} {warm:12.1f}")
+                del lexicon
+        finally:
+            shutil.rmtree(directory)
+
+
+def reload_run(size, versions, corpus):
+    rng = random.Random(9)
+    directory = tempfile.mkdtemp(prefix="lexicon-")
+    saved = (abuse_words.LEXICON_PATH, abuse_words.LEXICON_SUGGESTIONS_PATH,
+             abuse_words.LEXICON_INDEX_PATH, abuse_words.LEXICON_RELOAD_INTERVAL)
+    try:
+        # Point the module at the scratch lexicon for this run only
+        source = write_lexicon(directory, size, rng, extra=[("zzmarker1", "insult", 0.5)])
+        index = os.path.join(directory, "lexicon.idx")
+        Lexicon.from_sources(source).save(index)
+        abuse_words.LEXICON_PATH, abuse_words.LEXICON_INDEX_PATH = source, index
+        abuse_words.LEXICON_SUGGESTIONS_PATH = os.path.join(directory, "suggestions.tsv")
+        abuse_words.LEXICON_RELOAD_INTERVAL = 0.05
+        abuse_words.reload(force=True)
+
+        stop = threading.Event()
+        stats = {"calls": 0, "errors": 0, "mixed": 0}
+
+        def reader():
+            i = 0
+            while not stop.is_set():
+                lexicon = abuse_words.get_lexicon()
+                try:
+                    # Every version has its own marker term: a matcher from
+                    # another version than the release would miss it
+                    marker = f"zzmarker{lexicon.release}"
+                    if marker not in lexicon.matcher.find_terms(f"{corpus[i % len(corpus)]} {marker}"):
+                        stats["mixed"] += 1
+                except Exception:
+                    stats["errors"] += 1
+                stats["calls"] += 1
+                i += 1
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        delays = []
+        for version in range(2, versions + 2):
+            write_lexicon(directory, size, rng, release=str(version),
+                          extra=[(f"zzmarker{version}", "insult", 0.5)])
+            Lexicon.from_sources(source).save(index)
+            start = time.perf_counter()
+            while abuse_words.get_lexicon().release != str(version):
+                time.sleep(0.001)
+            delays.append((time.perf_counter() - start) * 1e3)
+        stop.set()
+        thread.join()
+        print(f"reload at {size:,} terms: {versions} versions, visible after "
+              f"{min(delays):.0f}-{max(delays):.0f} ms (check interval 50 ms); "
+              f"{stats['calls']:,} calls, {stats['errors']} errors, {stats['mixed']} mixed")
+    finally:
+        (abuse_words.LEXICON_PATH, abuse_words.LEXICON_SUGGESTIONS_PATH,
+         abuse_words.LEXICON_INDEX_PATH, abuse_words.LEXICON_RELOAD_INTERVAL) = saved
+        abuse_words.reload(force=True)
+        shutil.rmtree(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--reload-size", type=int, default=10000)
+    parser.add_argument("--reload-versions", type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = messages(args.messages)
+    sizes_table([int(s) for s in args.sizes.split(",")], corpus, args.repeat)
+    reload_run(args.reload_size, args.reload_versions, corpus)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Long documents: whole-string scoring vs. windowed scoring.
+
+    python -m benchmarks.bench_longdoc --sizes 1000,10000,100000
+
+Each document is clean synthetic chat with one abusive sentence in the
+middle. `whole` is analyze_text on the full string (what the app did
+before long-document mode). `windows` scores every sentence window in one
+batch; `budget` adds a 250 ms time budget and `early` stops at the first
+High window. `prob` is the document probability: the whole-string one is
+diluted by the clean text around the abusive sentence, the windowed one
+(max aggregation) is not.
+"""
+import argparse
+import time
+import warnings
+
+from benchmarks.corpus import generate
+from utils.longdoc import analyze_document
+from utils.scoring import analyze_text, load_pipeline
+
+
+def document(words, seed=0):
+    clean = []
+    count = 0
+    for text, _ in generate(10 ** 6, abuse_density=0.0, seed=seed):
+        clean.append(text.rstrip(".!?") + ".")
+        count += len(text.split())
+        if count >= words:
+            break
+    middle = len(clean) // 2
+    return " ".join(clean[:middle] + ["You are a stupid idiot."] + clean[middle:])
+
+
+def best_of(fn, repeat):
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="document sizes in words")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    pipeline = load_pipeline()
+    analyze_text("warm up", pipeline)
+
+    runs = {
+        "whole": lambda text: analyze_text(text, pipeline)[2],
+        "windows": lambda text: analyze_document(text, pipeline),
+        "budget": lambda text: analyze_document(text, pipeline, time_budget=0.25),
+        "early": lambda text: analyze_document(text, pipeline, stop_on_high=True),
+    }
+    print(f"{'words':>7} {'mode':>8} {'ms':>9} {'windows':>15} {'prob':>6} {'severity':>8}")
+    for size in map(int, args.sizes.split(",")):
+        text = document(size)
+        for name, run in runs.items():
+            seconds, result = best_of(lambda: run(text), args.repeat)
+            if name == "whole":
+                windows, prob, severity = "-", result, "-"
+            else:
+                windows = f"{len(result.windows) + result.skipped}/{result.total_windows}"
+                prob, severity = result.prob, result.severity
+            print(f"{size:>7} {name:>8} {seconds * 1e3:9.1f} {windows:>15} {prob:6.3f} {severity:>8}")
+
+
+if __name__ == "__main__":
+    main()
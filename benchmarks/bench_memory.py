@@ -0,0 +1,81 @@
+"""Memory of the Streamlit app over many analyses, and the cost of memory profiling.
+
+    python -m benchmarks.bench_memory --analyses 200
+
+Each configuration runs main.py under streamlit.testing in a fresh
+process, with real-time mode and diagnostics on, and types `--analyses`
+distinct texts (every one is analyzed, as while typing). It reports the
+time per rerun, the session_state size (utils.memory estimate) and the
+process RSS growth from the 10th analysis to the last; `profiling` turns
+the tracemalloc toggle on, `capped` sets TOXIGUARD_SESSION_MEMORY_CAP_MB.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+APP = r"""
+import json, logging, sys, time, warnings
+warnings.filterwarnings("ignore")
+logging.disable(logging.CRITICAL)
+from streamlit.testing.v1 import AppTest
+from benchmarks.corpus import messages
+from utils.memory import rss_mb, session_sizes
+
+analyses, profiling = int(sys.argv[1]), sys.argv[2] == "1"
+at = AppTest.from_file("main.py", default_timeout=120).run()
+
+def switch_on(label):
+    next(t for t in at.toggle if label in t.label).set_value(True).run()
+
+switch_on("Real-Time")
+switch_on("Diagnostics")
+if profiling:
+    switch_on("Memory Profiling")
+
+texts = messages(analyses, seed=11)
+times = []
+for i, text in enumerate(texts):
+    if i == 10:
+        base = rss_mb()
+    start = time.perf_counter()
+    at.text_area[0].input(f"{i}. {text}").run()
+    times.append(time.perf_counter() - start)
+assert not at.exception, at.exception
+state = at.session_state._state
+sizes = session_sizes({k: state[k] for k in state.filtered_state}, (state["incremental"].pipeline,))
+print(json.dumps({"ms": sorted(times)[len(times) // 2] * 1e3, "session_kb": sum(sizes.values()) / 1e3,
+                  "largest": next(iter(sizes)), "rss_growth": rss_mb() - base, "rss": rss_mb()}))
+"""
+
+
+def run(analyses, profiling=False, cap=None):
+    env = dict(os.environ)
+    if cap:
+        env["TOXIGUARD_SESSION_MEMORY_CAP_MB"] = str(cap)
+    out = subprocess.check_output([sys.executable, "-c", APP, str(analyses), "1" if profiling else "0"],
+                                  stderr=subprocess.DEVNULL, env=env)
+    return json.loads(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--analyses", type=int, default=200)
+    parser.add_argument("--cap-mb", type=float, default=0.05, help="session cap for the `capped` run")
+    args = parser.parse_args()
+
+    configs = {
+        "default": dict(),
+        "profiling": dict(profiling=True),
+        "capped": dict(cap=args.cap_mb),
+    }
+    print(f"{args.analyses} analyses, real-time mode")
+    print(f"{'':>10} {'ms/rerun':>9} {'session KB':>11} {'largest key':>14} {'RSS MB':>7} {'RSS growth':>11}")
+    for name, kwargs in configs.items():
+        r = run(args.analyses, **kwargs)
+        print(f"{name:>10} {r['ms']:9.1f} {r['session_kb']:11.1f} {r['largest']:>14} {r['rss']:7.0f} {r['rss_growth']:11.1f}")
+
+
+if __name__ == "__main__":
+    main()
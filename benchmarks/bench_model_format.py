@@ -0,0 +1,140 @@
+"""Load time, memory per worker and batch latency: joblib pipeline vs. compact model.
+
+    python -m benchmarks.bench_model_format --vocab 100000 --workers 4
+
+Trains a TfidfVectorizer + LogisticRegression on synthetic text with a
+large vocabulary, saves it both ways and starts `--workers` fresh
+interpreters per format, all alive at the same time. RSS counts shared
+pages in full; PSS splits them between the processes that map them, so
+it shows what each extra worker really costs.
+"""
+import argparse
+import json
+import os
+import random
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+
+def memory_kb(pid):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:"):
+                fields[parts[0][:-1].lower()] = int(parts[1])
+    return fields
+
+
+def worker(fmt, path, batch_size):
+    import numpy as np
+    rng = random.Random(os.getpid())
+    start = time.perf_counter()
+    if fmt == "joblib":
+        import joblib
+        model = joblib.load(path)
+    else:
+        from utils.compact_model import CompactModel
+        model = CompactModel(path)
+    load_s = time.perf_counter() - start
+    print(json.dumps({"load_s": load_s}), flush=True)
+
+    sys.stdin.readline()   # time batches one worker at a time
+    vocab = _words(rng, 2000)
+    texts = [" ".join(rng.choice(vocab) for _ in range(20)) for _ in range(batch_size)]
+    model.predict_proba(texts)   # warm-up
+    latencies = []
+    for _ in range(5):
+        start = time.perf_counter()
+        model.predict_proba(texts)
+        latencies.append(time.perf_counter() - start)
+    print(json.dumps({"batch_ms": np.median(latencies) * 1e3}), flush=True)
+    sys.stdin.read()   # stay alive until the parent has measured everyone
+
+
+def _words(rng, count):
+    return ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+            for _ in range(count)]
+
+
+def build_models(vocab_size, directory):
+    import joblib
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from utils.compact_model import export_compact
+
+    rng = random.Random(5)
+    vocab = _words(rng, vocab_size)
+    texts = [" ".join(rng.choice(vocab) for _ in range(30)) for _ in range(vocab_size // 5)]
+    labels = [rng.randint(0, 1) for _ in texts]
+    pipeline = Pipeline([
+        ("tfidf", TfidfVectorizer()),
+        ("clf", LogisticRegression(max_iter=200)),
+    ]).fit(texts, labels)
+
+    paths = {"joblib": os.path.join(directory, "model.joblib"), "compact": os.path.join(directory, "model.tgm")}
+    joblib.dump(pipeline, paths["joblib"])
+    export_compact(pipeline, paths["compact"])
+    return pipeline, paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vocab", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--worker", nargs=2, metavar=("FORMAT", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    if args.worker:
+        worker(*args.worker, args.batch_size)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        pipeline, paths = build_models(args.vocab, directory)
+
+        # Parity on held-out text before timing anything
+        from utils.compact_model import CompactModel
+        rng = random.Random(9)
+        texts = [" ".join(_words(rng, 15)) for _ in range(500)]
+        drift = abs(pipeline.predict_proba(texts) - CompactModel(paths["compact"]).predict_proba(texts)).max()
+        print(f"vocabulary {len(pipeline[0].vocabulary_)} terms, max |predict_proba diff| {drift:.2e}")
+
+        print(f"{'format':>8} {'file KB':>8} {'load ms':>8} {'RSS MB':>7} {'PSS MB':>7} {'batch ms':>9}")
+        for fmt, path in paths.items():
+            procs = [
+                subprocess.Popen(
+                    [sys.executable, "-m", "benchmarks.bench_model_format", "--worker", fmt, path,
+                     "--batch-size", str(args.batch_size)],
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+                )
+                for _ in range(args.workers)
+            ]
+            reports = [json.loads(p.stdout.readline()) for p in procs]
+            for p, report in zip(procs, reports):
+                p.stdin.write("go\n")
+                p.stdin.flush()
+                report.update(json.loads(p.stdout.readline()))
+            memory = [memory_kb(p.pid) for p in procs]
+            for p in procs:
+                p.stdin.close()
+                p.wait()
+
+            def mean(values):
+                return sum(values) / len(values)
+
+            print(f"{fmt:>8} {os.path.getsize(path) / 1024:8.0f} "
+                  f"{mean([r['load_s'] for r in reports]) * 1e3:8.0f} "
+                  f"{mean([m['rss'] for m in memory]) / 1024:7.1f} "
+                  f"{mean([m['pss'] for m in memory]) / 1024:7.1f} "
+                  f"{mean([r['batch_ms'] for r in reports]):9.1f}")
+
+
+if __name__ == "__main__":
+    main()
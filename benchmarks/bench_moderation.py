@@ -0,0 +1,125 @@
+"""Streaming moderation (moderate.py): sustained throughput and end-to-end latency.
+
+    python -m benchmarks.bench_moderation --messages 20000 --rates 0,500,1000,2000
+
+A synthetic chat log (corpus messages, users drawn with a long tail so a
+few users are very active, a few channels) is replayed into `moderate.py`
+through a pipe, at each `--rates` messages/s (0: as fast as the pipe
+takes them). Latency is measured outside the process, from writing a
+message to reading its verdict, so it includes the queues, batching and
+JSON on both sides. A rate above what scoring sustains shows the
+backpressure: the queue stays at --queue-size, the replay is slowed down
+to the scoring rate and memory (peak RSS) stays flat.
+"""
+import argparse
+import json
+import random
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.corpus import generate
+
+
+def chat_log(count, users, channels, seed):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(users)]
+    names = [f"user{i}" for i in range(users)]
+    start = 1_700_000_000.0
+    log = []
+    for i, (text, _) in enumerate(generate(count, min_words=2, max_words=20, abuse_density=0.08, seed=seed)):
+        start += rng.expovariate(20)   # ~20 messages/s of chat time
+        log.append(json.dumps({"id": i, "user": rng.choices(names, weights)[0],
+                               "channel": f"#c{rng.randrange(channels)}", "text": text,
+                               "timestamp": round(start, 3)}) + "\n")
+    return log
+
+
+def peak_rss_mb(pid):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def replay(log, rate, extra_args):
+    proc = subprocess.Popen([sys.executable, "-W", "ignore", "moderate.py", *extra_args],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # Wait for the model to load: one message in, one verdict out
+    proc.stdin.write(b'{"user": "warmup", "text": "warm up", "timestamp": 0}\n')
+    proc.stdin.flush()
+    proc.stdout.readline()
+
+    sent = np.zeros(len(log))
+    received = np.zeros(len(log))
+    escalations = 0
+
+    def read():
+        nonlocal escalations
+        seen = 0
+        for line in proc.stdout:
+            event = json.loads(line)
+            if event["event"] == "verdict":
+                received[event["id"]] = time.perf_counter()
+                seen += 1
+                if seen == len(log):
+                    return
+            elif event["event"] == "escalation":
+                escalations += 1
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    data = [line.encode() for line in log]
+    start = time.perf_counter()
+    for i, line in enumerate(data):
+        if rate:
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        sent[i] = time.perf_counter()
+        proc.stdin.write(line)
+        proc.stdin.flush()
+    reader.join()
+    rss = peak_rss_mb(proc.pid)
+    proc.stdin.close()
+    summary = json.loads(proc.stderr.read().splitlines()[-1])
+    proc.wait()
+
+    latency = (received - sent) * 1e3
+    return {
+        "offered": len(log) / (sent[-1] - sent[0]),
+        "sustained": len(log) / (received.max() - sent[0]),
+        "p50": np.percentile(latency, 50), "p95": np.percentile(latency, 95), "p99": np.percentile(latency, 99),
+        "batch": summary["mean_batch"], "queue": summary["max_queue"], "rss": rss,
+        "escalations": escalations, "users": summary["users"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--channels", type=int, default=20)
+    parser.add_argument("--rates", default="0,500,1000,2000", help="replay rates in messages/s, 0 for unpaced")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cascade", action="store_true", help="run moderate.py with --cascade")
+    parser.add_argument("args", nargs="*", help="more moderate.py options, after --")
+    args = parser.parse_args()
+
+    log = chat_log(args.messages, args.users, args.channels, args.seed)
+    extra = ["--no-cache", *(["--cascade"] if args.cascade else []), *args.args]
+    print(f"{len(log):,} messages, {args.users:,} users; moderate.py {' '.join(extra)}")
+    print(f"{'rate':>6} {'offered/s':>10} {'sustained/s':>12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'batch':>6} {'queue':>6} {'RSS MB':>7} {'escalations':>12}")
+    for rate in (int(r) for r in args.rates.split(",")):
+        r = replay(log, rate, extra)
+        print(f"{rate or 'max':>6} {r['offered']:10,.0f} {r['sustained']:12,.0f} {r['p50']:8.1f} {r['p95']:8.1f} "
+              f"{r['p99']:8.1f} {r['batch']:6.1f} {r['queue']:6} {r['rss']:7.0f} {r['escalations']:12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Parity check and chars/second for utils.preprocessing.
+
+    python -m benchmarks.bench_preprocessing
+
+The legacy functions below are the normalizer the shipped model was
+trained with. Before timing anything the script asserts that the current
+clean_text reproduces legacy_clean_text exactly on a set of golden edge
+cases and a randomized corpus; a mismatch exits non-zero.
+normalize_censored is not held to the legacy version: it now rewrites
+every obfuscation in data/obfuscation/rules.tsv (see
+benchmarks.bench_obfuscation), not just three masked words.
+"""
+import argparse
+import random
+import re
+import sys
+import time
+
+from utils.preprocessing import clean_text, normalize_censored, preprocess_texts
+
+GOLDEN = [
+    "", "   ", "Hello World", "I HATE you!!!", "f*ck you", "F***K off", "what the f**k",
+    "a*hole", "A**HOLE", "motherf**ker", "MOTHERF*KER", "f*ka**hole", "f*",
+    "visit http://x.com/a?b=1 now", "WWW.Example.com/path rocks", "xhttp://y",
+    "@user hi #tag", "@userhttp://x.com", "@xwww.y.z", "@http://x", "#@x", "@a#b",
+    "email me: a@b.com", "tabs\tand\nnewlines\r\n", "ümlaut café naïve", "İstanbul @İstanbul",
+    "emoji 😡😡 rage", "snake_case_word", "numbers 123 and ١٢٣", "***", "a * b", "go   to   hell",
+    "non breaking space", "dash—and–quote’s", "sh*t bullsh*t", "b!tch a$$hole",
+]
+
+
+def legacy_clean_text(text):
+    text = text.lower()
+    text = re.sub(r"http\S+|www\.\S+", " ", text)
+    text = re.sub(r"@\w+", " ", text)
+    text = re.sub(r"#\w+", " ", text)
+    text = re.sub(r"[^a-z0-9\s\*]", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+def legacy_normalize_censored(text):
+    replacements = {
+        r"f\*+k": "fuck",
+        r"a\*+hole": "asshole",
+        r"motherf\*+ker": "motherf**ker"
+    }
+    for pattern, replacement in replacements.items():
+        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+    return text
+
+
+def random_corpus(count, rng):
+    pieces = GOLDEN + ["http", "www.", "@", "#", "*", "**", "f", "k", "a", "hole", "_",
+                       " ", "\t", "é", "İ", "ß", "!", "$", ".", "/", "x", "Y", "9"]
+    return ["".join(rng.choice(pieces) for _ in range(rng.randint(1, 25))) for _ in range(count)]
+
+
+def check_parity(texts):
+    failures = 0
+    for text in texts:
+        expected = legacy_clean_text(text)
+        if clean_text(text) != expected:
+            failures += 1
+            if failures <= 5:
+                print(f"MISMATCH {text!r}: {clean_text(text)!r} != {expected!r}")
+    return failures
+
+
+def chars_per_second(fn, texts, chars):
+    start = time.perf_counter()
+    fn(texts)
+    return chars / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fuzz", type=int, default=20000)
+    parser.add_argument("--messages", type=int, default=50000)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    failures = check_parity(GOLDEN + random_corpus(args.fuzz, rng))
+    if failures:
+        sys.exit(f"{failures} parity failures")
+    print(f"parity: OK on {len(GOLDEN)} golden + {args.fuzz} random inputs")
+
+    from benchmarks.bench_lexicon import synthetic_messages
+    texts = [m.replace(" the ", " @user the ").replace("you", "f**k http://t.co/x") for m in synthetic_messages(args.messages, rng)]
+    chars = sum(map(len, texts))
+
+    legacy = chars_per_second(lambda ts: [legacy_clean_text(legacy_normalize_censored(t)) for t in ts], texts, chars)
+    single = chars_per_second(lambda ts: [clean_text(normalize_censored(t)) for t in ts], texts, chars)
+    batch = chars_per_second(preprocess_texts, texts, chars)
+    print(f"{'legacy':>8} {legacy / 1e6:8.1f} Mchars/s")
+    print(f"{'current':>8} {single / 1e6:8.1f} Mchars/s  ({single / legacy:.1f}x)")
+    print(f"{'batch':>8} {batch / 1e6:8.1f} Mchars/s  ({batch / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Per-panel render time and resident memory over many consecutive analyses.
+
+    python -m benchmarks.bench_rendering --analyses 1000
+
+Each mode runs in its own interpreter. `legacy` builds what run_analysis
+used to build per call (two plotly figures, two 800x400 WordClouds drawn
+into matplotlib figures that are never closed, the AgGrid options);
+`current` uses utils.visualization (HTML gauge/pie, cached PNG clouds).
+Texts are drawn from a pool, as repeated messages are common in practice.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import warnings
+from collections import Counter, defaultdict
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def legacy_panels(text, prob, clean, abusive, tokens):
+    import io
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import plotly.express as px
+    from st_aggrid import GridOptionsBuilder
+    from wordcloud import WordCloud
+    from utils.preprocessing import clean_text
+    from utils.settings import STOP_WORDS
+
+    def gauge():
+        fig = px.bar(x=[prob], y=["Toxicity"], orientation="h", range_x=[0, 1], text=[f"{prob:.2f}"])
+        fig.update_layout(height=150, paper_bgcolor="rgba(0,0,0,0)", font_color="white")
+        fig.to_json()
+
+    def pie():
+        fig = px.pie(names=["Clean", "Abusive"], values=[clean, abusive])
+        fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", font_color="white")
+        fig.to_json()
+
+    def table():
+        import pandas as pd
+        df = pd.DataFrame({"Abusive Word": tokens})
+        GridOptionsBuilder.from_dataframe(df).build()
+
+    def show(wc):
+        fig, ax = plt.subplots()   # never closed, as in the original app
+        ax.imshow(wc)
+        ax.axis("off")
+        fig.savefig(io.BytesIO(), format="png")   # what st.pyplot does
+
+    def clouds():
+        words = [w for w in clean_text(text).split() if w not in tokens and w not in STOP_WORDS]
+        if words:
+            show(WordCloud(width=800, height=400, background_color="black", colormap="cool").generate(" ".join(words)))
+        if tokens:
+            show(WordCloud(width=800, height=400, background_color="black",
+                           colormap="autumn").generate_from_frequencies(Counter(tokens)))
+
+    return {"gauge": gauge, "pie": pie, "table": table, "wordclouds": clouds}
+
+
+def current_panels(text, prob, clean, abusive, tokens):
+    from utils.visualization import (
+        gauge_html, pie_html, wordcloud_png, non_abusive_frequencies, abusive_frequencies
+    )
+
+    def table():
+        import pandas as pd
+        pd.DataFrame({"Abusive Word": tokens})
+
+    def clouds():
+        wordcloud_png(non_abusive_frequencies(text, tokens), "cool")
+        wordcloud_png(abusive_frequencies(tokens), "autumn")
+
+    return {
+        "gauge": lambda: gauge_html(prob),
+        "pie": lambda: pie_html(clean, abusive),
+        "table": table,
+        "wordclouds": clouds,
+    }
+
+
+def run(mode, analyses, pool):
+    warnings.filterwarnings("ignore")
+    from benchmarks.bench_lexicon import synthetic_messages
+    from utils.scoring import analyze_text, load_pipeline
+
+    pipeline = load_pipeline()
+    texts = synthetic_messages(pool, random.Random(2))
+    rng = random.Random(4)
+    panels_for = legacy_panels if mode == "legacy" else current_panels
+
+    timings = defaultdict(float)
+    start_rss = rss_mb()
+    for _ in range(analyses):
+        text = rng.choice(texts)
+        cleaned, _, prob, tokens, _, _ = analyze_text(text, pipeline)
+        total, abusive = len(cleaned.split()), len(tokens)
+        for name, render in panels_for(text, prob, total - abusive, abusive, tokens).items():
+            t0 = time.perf_counter()
+            render()
+            timings[name] += time.perf_counter() - t0
+    return {
+        "ms": {k: v / analyses * 1e3 for k, v in timings.items()},
+        "rss_start": start_rss,
+        "rss_end": rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--analyses", type=int, default=1000)
+    parser.add_argument("--pool", type=int, default=200, help="distinct messages to draw from")
+    parser.add_argument("--mode", choices=["legacy", "current"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run(args.mode, args.analyses, args.pool)))
+        return
+
+    results = {}
+    for mode in ("legacy", "current"):
+        out = subprocess.check_output(
+            [sys.executable, "-m", "benchmarks.bench_rendering", "--mode", mode,
+             "--analyses", str(args.analyses), "--pool", str(args.pool)],
+            stderr=subprocess.DEVNULL,
+        )
+        results[mode] = json.loads(out)
+
+    print(f"{args.analyses} analyses, {args.pool} distinct messages")
+    print(f"{'panel':>12} {'legacy ms':>10} {'current ms':>11}")
+    for panel in results["legacy"]["ms"]:
+        print(f"{panel:>12} {results['legacy']['ms'][panel]:10.2f} {results['current']['ms'][panel]:11.2f}")
+    for mode, r in results.items():
+        print(f"{mode:>12} RSS {r['rss_start']:.0f} MB -> {r['rss_end']:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
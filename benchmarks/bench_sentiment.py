@@ -0,0 +1,110 @@
+"""Parity and throughput of the vectorized lexicon sentiment engine vs. TextBlob.
+
+    python -m benchmarks.bench_sentiment --messages 20000
+
+The corpus mixes the abuse-style synthetic messages with sentences built
+around sentiment words, modifiers, negations, "!", emoticons and
+contractions, which is where the two engines could disagree.
+"""
+import argparse
+import random
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_lexicon import synthetic_messages
+from utils.sentiment_analysis import (
+    get_lexicon, lexicon_polarities, sentiment_label, textblob_polarity, NEGATIONS
+)
+from utils.settings import ROOT_DIR
+
+
+def sentiment_messages(count, rng):
+    lex = get_lexicon()
+    words = [w for w in lex.index if w.isalpha()]
+    modifiers = [w for w in words if lex.modifier[lex.index[w]]]
+    filler = "i you it the a this that was is so game chat today movie u ok".split()
+    extras = ["!", "!!", ":)", ":(", "<3", ":D", "(!)", "don't", "isn't", "it's", "...", ",",
+              ":'(", ";'(", ":'''(", "'so'", "good\0bad"]
+    messages = []
+    for _ in range(count):
+        tokens = []
+        for _ in range(rng.randint(3, 25)):
+            r = rng.random()
+            if r < 0.45:
+                tokens.append(rng.choice(filler))
+            elif r < 0.7:
+                tokens.append(rng.choice(words))
+            elif r < 0.8:
+                tokens.append(rng.choice(modifiers))
+            elif r < 0.88:
+                tokens.append(rng.choice(NEGATIONS[:2] + NEGATIONS[3:]))
+            else:
+                tokens.append(rng.choice(extras))
+        text = " ".join(tokens)
+        messages.append(text.capitalize() if rng.random() < 0.5 else text)
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    rng = random.Random(11)
+    half = args.messages // 2
+    sample = pd.read_csv(f"{ROOT_DIR}/data/sample_data.csv")["text"].tolist()
+    messages = sample + synthetic_messages(half, rng) + sentiment_messages(args.messages - half, rng)
+    textblob_polarity("warm-up")   # keep TextBlob's import out of the timing
+
+    # A NUL inside one message must not shift the tokens of the rest of its batch
+    batch = ["so good", "bad\0news happy", "\0", "very bad"]
+    alone = [lexicon_polarities([m])[0] for m in batch]
+    if list(lexicon_polarities(batch)) != alone:
+        sys.exit(f"NUL byte broke batch scoring: {list(lexicon_polarities(batch))} != {alone}")
+
+    start = time.perf_counter()
+    reference = np.array([textblob_polarity(m) for m in messages])
+    textblob_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    fast = np.concatenate([
+        lexicon_polarities(messages[i:i + args.batch_size])
+        for i in range(0, len(messages), args.batch_size)
+    ])
+    lexicon_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for m in messages[:2000]:
+        lexicon_polarities([m])
+    single_s = (time.perf_counter() - start) / min(len(messages), 2000) * len(messages)
+
+    error = np.abs(fast - reference)
+    agree = np.mean([sentiment_label(a) == sentiment_label(b) for a, b in zip(fast, reference)])
+    print(f"parity over {len(messages)} messages")
+    print(f"  label agreement      {agree:.2%}")
+    print(f"  exact polarity       {np.mean(error < 1e-9):.2%}")
+    print(f"  mean |error|         {error.mean():.5f}")
+    print(f"  max |error|          {error.max():.4f}")
+
+    worst = np.argsort(error)[::-1][:3]
+    for i in worst:
+        if error[i] > 1e-9:
+            print(f"    {reference[i]:+.3f} vs {fast[i]:+.3f}  {messages[i][:70]!r}")
+
+    print(f"\n{'engine':>22} {'msgs/s':>10} {'speedup':>8}")
+    base = len(messages) / textblob_s
+    for name, seconds in (("textblob", textblob_s),
+                          ("lexicon, per message", single_s),
+                          (f"lexicon, batch {args.batch_size}", lexicon_s)):
+        rate = len(messages) / seconds
+        print(f"{name:>22} {rate:10.0f} {rate / base:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
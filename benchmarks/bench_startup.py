@@ -0,0 +1,69 @@
+"""Cold-start cost of the scoring path and the Streamlit app.
+
+    python -m benchmarks.bench_startup --runs 3
+
+Every measurement is taken in a fresh interpreter (cold process), then
+repeated inside the same process once everything is loaded (warm).
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+SCORING = r"""
+import json, time, warnings
+warnings.filterwarnings("ignore")
+t0 = time.perf_counter()
+from utils.scoring import analyze_text
+t1 = time.perf_counter()
+analyze_text("you are such an idiot")
+t2 = time.perf_counter()
+for _ in range(20):
+    analyze_text("you are such an idiot")
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "first response": t2 - t1, "warm response": (t3 - t2) / 20}))
+"""
+
+APP = r"""
+import json, logging, time, warnings
+warnings.filterwarnings("ignore")
+logging.disable(logging.CRITICAL)
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("main.py", default_timeout=120)
+t0 = time.perf_counter(); at.run(); t1 = time.perf_counter()
+at.run(); t2 = time.perf_counter()
+at.text_area[0].input("you are such an idiot").run()
+t3 = time.perf_counter(); at.button[0].click().run(); t4 = time.perf_counter()
+at.button[0].click().run(); t5 = time.perf_counter()
+print(json.dumps({"first page": t1 - t0, "warm rerun": t2 - t1,
+                  "first analysis": t4 - t3, "warm analysis": t5 - t4}))
+"""
+
+EAGER = r"""
+import json, time, warnings
+warnings.filterwarnings("ignore")
+t0 = time.perf_counter()
+import plotly.express, wordcloud, matplotlib.pyplot, st_aggrid, textblob, nltk
+print(json.dumps({"chart/nlp imports": time.perf_counter() - t0}))
+"""
+
+
+def measure(code, runs):
+    samples = [json.loads(subprocess.check_output([sys.executable, "-c", code], stderr=subprocess.DEVNULL))
+               for _ in range(runs)]
+    return {k: statistics.median(s[k] for s in samples) for k in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    for name, code in [("scoring", SCORING), ("app", APP), ("deferred", EAGER)]:
+        for stage, seconds in measure(code, args.runs).items():
+            print(f"{name:>9}  {stage:<18} {seconds * 1e3:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
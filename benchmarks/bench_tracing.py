@@ -0,0 +1,65 @@
+"""Cost of stage tracing: disabled vs. sampled vs. always on.
+
+    python -m benchmarks.bench_tracing --messages 5000
+
+Scores the same synthetic messages one at a time (analyze_text, no cache)
+and in batches (analyze_texts) at several sample rates, then times an
+empty span on its own.
+"""
+import argparse
+import time
+import warnings
+
+from benchmarks.corpus import messages
+from utils import tracing
+from utils.scoring import analyze_text, analyze_texts, load_pipeline
+
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    pipeline = load_pipeline()
+    corpus = messages(args.messages)
+    analyze_texts(corpus[:100], pipeline)   # warm-up
+
+    def single():
+        for text in corpus:
+            analyze_text(text, pipeline)
+
+    def batch():
+        analyze_texts(corpus, pipeline, batch_size=500)
+
+    print(f"{'sample rate':>11} {'single us/msg':>14} {'batch us/msg':>13}")
+    for rate in (0.0, 0.01, 0.1, 1.0):
+        tracing.set_sample_rate(rate)
+        s = best_of(single, args.repeat) / len(corpus) * 1e6
+        b = best_of(batch, args.repeat) / len(corpus) * 1e6
+        print(f"{rate:11g} {s:14.1f} {b:13.2f}")
+
+    n = 1_000_000
+    for rate, label in ((0.0, "no trace"), (1.0, "in trace")):
+        tracing.set_sample_rate(rate)
+        with tracing.trace("bench"):
+            start = time.perf_counter()
+            for _ in range(n):
+                with tracing.span("x"):
+                    pass
+            elapsed = time.perf_counter() - start
+        print(f"empty span, {label}: {elapsed / n * 1e9:.0f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Synthetic labeled chat corpus for benchmarks and load tests.
+
+    python -m benchmarks.corpus --rows 100000 --abuse-density 0.1 -o corpus.csv
+
+Messages mix English and Hinglish filler, mentions, links and emoji with
+terms drawn from utils.abuse_words.abusive_words. A share of the abusive
+terms is obfuscated the way users dodge filters (masked vowels, leetspeak,
+stretched letters, shouting). Everything is seeded, so a given set of
+arguments always yields the same corpus.
+"""
+import argparse
+import csv
+import random
+import sys
+
+from utils.abuse_words import abusive_words
+
+ENGLISH = ("the you are this what so really just please thanks today game chat lol ok why not "
+           "was is it me my your we they good great nice day movie team match play again").split()
+HINGLISH = "yaar kya hai bhai tum nahi mera tera kuch bhi accha theek chal abhi kal woh".split()
+NOISE = ("@player1", "@mod", "#gg", "#fail", "https://t.co/x1", "www.example.com", "😂", "🔥", "!!", "??")
+
+_LEET = str.maketrans({"a": "@", "i": "1", "o": "0", "s": "$", "e": "3"})
+
+
+def obfuscate(term, rng):
+    kind = rng.randrange(4)
+    if kind == 0:   # mask vowels: f*ck, ch*tiya
+        return "".join("*" if c in "aeiou" and 0 < i < len(term) - 1 else c for i, c in enumerate(term))
+    if kind == 1:   # leetspeak: 1d10t
+        return term.translate(_LEET)
+    if kind == 2:   # stretched: stuuupid
+        i = rng.randrange(len(term))
+        return term[:i] + term[i] * rng.randint(2, 4) + term[i:]
+    return term.upper()
+
+
+def generate(count, min_words=5, max_words=30, abuse_density=0.05,
+             obfuscation=0.3, hinglish=0.3, noise=0.05, seed=0, terms=None):
+    """
+    Yield (text, label) pairs. `abuse_density` is the share of words that
+    are abusive terms (drawn from `terms`, default the whole lexicon);
+    label is 1 when a message contains at least one.
+    """
+    rng = random.Random(seed)
+    terms = sorted(abusive_words if terms is None else terms)
+    for _ in range(count):
+        words = []
+        abusive = 0
+        for _ in range(rng.randint(min_words, max_words)):
+            r = rng.random()
+            if r < abuse_density:
+                term = rng.choice(terms)
+                words.append(obfuscate(term, rng) if rng.random() < obfuscation else term)
+                abusive += 1
+            elif r < abuse_density + noise:
+                words.append(rng.choice(NOISE))
+            else:
+                words.append(rng.choice(HINGLISH if rng.random() < hinglish else ENGLISH))
+        text = " ".join(words)
+        yield (text.capitalize() if rng.random() < 0.5 else text), int(abusive > 0)
+
+
+def messages(count, **kwargs):
+    return [text for text, _ in generate(count, **kwargs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--min-words", type=int, default=5)
+    parser.add_argument("--max-words", type=int, default=30)
+    parser.add_argument("--abuse-density", type=float, default=0.05, help="share of words that are abusive")
+    parser.add_argument("--obfuscation", type=float, default=0.3, help="share of abusive terms obfuscated")
+    parser.add_argument("--hinglish", type=float, default=0.3, help="share of filler words in Hinglish")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="CSV path (default: stdout)")
+    args = parser.parse_args()
+
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    writer = csv.writer(out)
+    writer.writerow(["text", "label"])
+    for text, label in generate(args.rows, args.min_words, args.max_words, args.abuse_density,
+                                args.obfuscation, args.hinglish, seed=args.seed):
+        writer.writerow([text, "abusive" if label else "non-abusive"])
+    if args.output:
+        out.close()
+
+
+if __name__ == "__main__":
+    main()
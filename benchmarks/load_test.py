@@ -0,0 +1,105 @@
+"""Load test for serve.py with micro-batching on and off.
+
+    python -m benchmarks.load_test --clients 64 --requests 4000
+
+Starts the service twice on a local port (once with --no-batching), drives
+it with concurrent keep-alive clients posting to /score and reports
+latency percentiles and throughput for each run.
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.bench_lexicon import synthetic_messages
+
+
+async def client(host, port, messages, latencies, rejected):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for text in messages:
+            body = json.dumps({"text": text}).encode()
+            request = (
+                f"POST /score HTTP/1.1\r\nHost: {host}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+            ).encode() + body
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while (line := await reader.readline()) not in (b"\r\n", b""):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            if status == 429:
+                rejected.append(1)
+            else:
+                latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def drive(host, port, messages, clients):
+    latencies, rejected = [], []
+    per_client = [messages[i::clients] for i in range(clients)]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, m, latencies, rejected) for m in per_client))
+    return latencies, len(rejected), time.perf_counter() - start
+
+
+async def wait_ready(host, port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("service did not start")
+
+
+def run_case(args, messages, extra):
+    cmd = [sys.executable, "-W", "ignore", "serve.py", "--host", args.host, "--port", str(args.port), *extra]
+    server = subprocess.Popen(cmd, stdout=subprocess.DEVNULL)
+    try:
+        asyncio.run(wait_ready(args.host, args.port))
+        return asyncio.run(drive(args.host, args.port, messages, args.clients))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    messages = synthetic_messages(args.requests, random.Random(3))
+    cases = {
+        "batching": ["--max-batch", str(args.max_batch), "--max-wait-ms", str(args.max_wait_ms)],
+        "no batching": ["--no-batching"],
+    }
+
+    print(f"{'mode':>12} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'429s':>6}")
+    for name, extra in cases.items():
+        latencies, rejected, elapsed = run_case(args, messages, extra)
+        p50, p95, p99 = np.percentile(np.array(latencies) * 1e3, [50, 95, 99])
+        rate = len(latencies) / elapsed
+        print(f"{name:>12} {rate:8.0f} {p50:8.1f} {p95:8.1f} {p99:8.1f} {rejected:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Per-stage latency and throughput, checked against a JSON baseline.
+
+    python -m benchmarks.suite --save benchmarks/baseline.json   # record
+    python -m benchmarks.suite --compare benchmarks/baseline.json --threshold 0.25
+
+Times clean_text, normalize_censored, detect_abusive_tokens, analyze_text
+(no result cache) and highlight_abusive one message at a time on a
+seeded synthetic corpus. Every stage is run `--repeat` times and each
+message's median time over the runs is kept, so a stall during one run
+does not move the numbers. With --compare the process exits 1 if any
+stage's throughput drops, or its p95 latency rises, by more than
+--threshold. A fixed pure-Python workload is timed before every run and
+the baseline is scaled by the median speed ratio, so a busy or throttled
+machine does not read as a regression.
+Runs offline on CPU only: nothing is downloaded, no GPU is touched.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from benchmarks.corpus import messages
+from utils.abuse_words import detect_abusive_tokens
+from utils.highlight import highlight_abusive
+from utils.preprocessing import clean_text, normalize_censored
+from utils.scoring import analyze_text, load_pipeline
+
+
+def stages(pipeline):
+    return {
+        "clean_text": clean_text,
+        "normalize_censored": normalize_censored,
+        "detect_abusive_tokens": detect_abusive_tokens,
+        "analyze_text": lambda text: analyze_text(text, pipeline),
+        "highlight": highlight_abusive,
+    }
+
+
+def time_stage(fn, corpus, repeat, calibrations=None):
+    """Per-message median over `repeat` runs; appends a calibration before each run to `calibrations`."""
+    for text in corpus[:50]:   # warm-up: lazy imports, compiled lexicons
+        fn(text)
+    laps = np.empty((repeat, len(corpus)))
+    clock = time.perf_counter_ns
+    for run in laps:
+        if calibrations is not None:
+            calibrations.append(calibrate(3))
+        for i, text in enumerate(corpus):
+            start = clock()
+            fn(text)
+            run[i] = clock() - start
+    typical = np.median(laps, axis=0)
+    return {
+        "msgs_per_s": len(corpus) / (typical.sum() / 1e9),
+        "p50_us": float(np.percentile(typical, 50)) / 1e3,
+        "p95_us": float(np.percentile(typical, 95)) / 1e3,
+        "p99_us": float(np.percentile(typical, 99)) / 1e3,
+    }
+
+
+def calibrate(repeat=5):
+    """Seconds for a fixed pure-Python workload, used to scale a baseline to this machine's current speed."""
+    text = "the quick brown fox jumps over the lazy dog " * 4
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(2000):
+            counts = {}
+            for word in text.split():
+                counts[word] = counts.get(word, 0) + 1
+            " ".join(sorted(counts)).upper().replace("O", "0")
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def compare(results, baseline, threshold, speed=1.0):
+    """
+    Human-readable lines for every stage that regressed. `speed` is how
+    much slower this machine runs the calibration workload than when the
+    baseline was recorded; the baseline is scaled by it first.
+    """
+    failures = []
+    for stage, now in results.items():
+        before = baseline["stages"].get(stage)
+        if before is None:
+            continue
+        expected_rate = before["msgs_per_s"] / speed
+        expected_p95 = before["p95_us"] * speed
+        if now["msgs_per_s"] < expected_rate * (1 - threshold):
+            failures.append(f"{stage}: {now['msgs_per_s']:,.0f} msgs/s vs {expected_rate:,.0f} expected")
+        if now["p95_us"] > expected_p95 * (1 + threshold):
+            failures.append(f"{stage}: p95 {now['p95_us']:.1f} us vs {expected_p95:.1f} expected")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--min-words", type=int, default=5)
+    parser.add_argument("--max-words", type=int, default=30)
+    parser.add_argument("--abuse-density", type=float, default=0.05)
+    parser.add_argument("--obfuscation", type=float, default=0.3)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--stages", help="comma-separated subset of stages")
+    parser.add_argument("--save", metavar="JSON", help="write results as the new baseline")
+    parser.add_argument("--compare", metavar="JSON", help="baseline to check against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    corpus_args = {
+        "count": args.messages, "min_words": args.min_words, "max_words": args.max_words,
+        "abuse_density": args.abuse_density, "obfuscation": args.obfuscation,
+    }
+    corpus = messages(**corpus_args)
+    selected = stages(load_pipeline())
+    if args.stages:
+        selected = {name: selected[name] for name in args.stages.split(",")}
+
+    results = {}
+    # Sampled between all runs of all stages; one sample swings too much to scale by
+    calibrations = []
+    print(f"{'stage':>22} {'msgs/s':>10} {'p50 us':>8} {'p95 us':>8} {'p99 us':>8}")
+    for name, fn in selected.items():
+        r = results[name] = time_stage(fn, corpus, args.repeat, calibrations)
+        print(f"{name:>22} {r['msgs_per_s']:10,.0f} {r['p50_us']:8.1f} {r['p95_us']:8.1f} {r['p99_us']:8.1f}")
+    calibration = float(np.median(calibrations))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "corpus": corpus_args,
+            "repeat": args.repeat,
+            "calibration_s": calibration,
+        },
+        "stages": results,
+    }
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["meta"].get("corpus") != corpus_args:
+            print("warning: corpus settings differ from the baseline's", file=sys.stderr)
+        speed = calibration / baseline["meta"].get("calibration_s", calibration)
+        print(f"machine speed vs. baseline: {1 / speed:.2f}x (baseline scaled accordingly)")
+        failures = compare(results, baseline, args.threshold, speed)
+        if failures:
+            print(f"Regressions beyond {args.threshold:.0%}:")
+            for line in failures:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regression beyond {args.threshold:.0%} against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
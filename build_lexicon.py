@@ -0,0 +1,58 @@
+# build_lexicon.py — compile the abuse lexicon
+#
+#   python build_lexicon.py            # data/lexicon/*.tsv -> data/lexicon/lexicon.idx
+#   python build_lexicon.py --check    # validate the sources only
+#
+# Reads lexicon.tsv (term, category, weight) and suggestions.tsv, and
+# writes the binary index that services load at startup, including the
+# per-language partitions used for language routing. The index is
+# written to a temporary file and moved into place, so running processes
+# pick up the new version on their next check (LEXICON_RELOAD_INTERVAL)
+# without a restart. Duplicate terms are dropped with a warning; malformed
+# lines, unknown categories and terms with stray punctuation fail the build.
+import argparse
+import os
+import sys
+import time
+
+from utils.lexicon import CATEGORIES, Lexicon, read_sources
+from utils.settings import LEXICON_INDEX_PATH, LEXICON_PATH, LEXICON_SUGGESTIONS_PATH
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile the abuse lexicon into a binary index")
+    parser.add_argument("--lexicon", default=LEXICON_PATH)
+    parser.add_argument("--suggestions", default=LEXICON_SUGGESTIONS_PATH)
+    parser.add_argument("-o", "--output", default=LEXICON_INDEX_PATH)
+    parser.add_argument("--check", action="store_true", help="validate only, do not write the index")
+    parser.add_argument("--strict", action="store_true", help="treat duplicates as errors")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        release, entries, suggestions, duplicates = read_sources(args.lexicon, args.suggestions)
+    except ValueError as exc:
+        sys.exit(f"error: {exc}")
+    for term in sorted(set(duplicates)):
+        print(f"warning: duplicate term {term!r} ignored", file=sys.stderr)
+    known = {term for term, _, _ in entries}
+    for term in sorted(set(suggestions) - known):
+        print(f"warning: suggestion for unknown term {term!r}", file=sys.stderr)
+    if duplicates and args.strict:
+        sys.exit("error: duplicate terms")
+
+    counts = {c: sum(1 for _, category, _ in entries if category == c) for c in CATEGORIES}
+    print(f"lexicon {release}: {len(entries):,} terms ("
+          + ", ".join(f"{c} {n:,}" for c, n in counts.items()) + f"), {len(suggestions):,} suggestions")
+    if args.check:
+        return
+
+    lexicon = Lexicon.from_entries(release, entries, suggestions)
+    lexicon.save(args.output)
+    print(f"wrote {args.output} ({os.path.getsize(args.output) / 1024:,.1f} KiB, "
+          f"version {lexicon.version}) in {time.perf_counter() - start:.2f}s")
+    print("language partitions: " + ", ".join(f"{lang} {len(m):,}" for lang, m in lexicon.partitions.items()))
+
+
+if __name__ == "__main__":
+    main()
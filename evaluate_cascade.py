@@ -0,0 +1,126 @@
+# evaluate_cascade.py — tune the scoring cascade against the full pipeline
+#
+#   python evaluate_cascade.py --data labeled.csv
+#   python evaluate_cascade.py --data labeled.csv --min-hits 1,2,3 --short-words 0,3,5 --show 5
+#   python evaluate_cascade.py --synthetic 20000 --report cascade.csv
+#
+# Scores the set once with the full pipeline (analyze_texts) and once per
+# cascade setting (utils.cascade). For every setting it reports the share
+# of messages each tier decided, how often label and severity agree with
+# the full pipeline, precision/recall against the labels and the time per
+# message. The model tier agrees by construction, so every disagreement
+# comes from a lexicon shortcut; --show prints some of them.
+import argparse
+import time
+import warnings
+from itertools import product
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import precision_recall_fscore_support
+
+from utils.cascade import Cascade
+from utils.scoring import analyze_texts, load_pipeline, worker_model_path
+
+LABELS = {"non-abusive": 0, "abusive": 1, "0": 0, "1": 1}
+
+
+# ---------------- Data ----------------
+def load_data(path, text_column, label_column):
+    data = pd.read_csv(path, usecols=[text_column, label_column]).dropna()
+    y = data[label_column].astype(str).str.strip().str.lower().map(LABELS)
+    if y.isna().any():
+        raise ValueError(f"unknown labels: {sorted(data[label_column][y.isna()].astype(str).unique())[:5]}")
+    return data[text_column].astype(str).tolist(), y.to_numpy()
+
+
+def synthetic_data(rows):
+    from benchmarks.corpus import generate
+    pairs = list(generate(rows, abuse_density=0.02, seed=7))
+    return [text for text, _ in pairs], np.array([label for _, label in pairs])
+
+
+# ---------------- Evaluation ----------------
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def scores(y, pred):
+    p, r, f1, _ = precision_recall_fscore_support(y, pred, average="binary", zero_division=0)
+    return p, r, f1
+
+
+def evaluate(texts, y, pipeline, settings, batch_size=1000, sentiment=False, show=0):
+    full, full_s = timed(lambda: analyze_texts(texts, pipeline, batch_size=batch_size))
+    full_label = full["label"].to_numpy()
+    full_severity = full["severity"].to_numpy()
+    rows = [{
+        "setting": "full pipeline",
+        "lexicon_share": 0.0,
+        "label_agree": 1.0,
+        "severity_agree": 1.0,
+        **dict(zip(("precision", "recall", "f1"), scores(y, full_label))),
+        "us_per_msg": full_s / len(texts) * 1e6,
+        "speedup": 1.0,
+    }]
+
+    for min_hits, short_words in settings:
+        cascade = Cascade(min_hits or None, short_words)
+        parts, seconds = timed(lambda: [cascade.score(texts[i:i + batch_size], pipeline, sentiment)
+                                        for i in range(0, len(texts), batch_size)])
+        result = pd.concat(parts, ignore_index=True)
+        label = result["label"].to_numpy()
+        severity = result["severity"].to_numpy()
+        rows.append({
+            "setting": f"min_hits={min_hits} short_words={short_words}",
+            "lexicon_share": cascade.stats()["tiers"]["lexicon"]["fraction"],
+            "label_agree": (label == full_label).mean(),
+            "severity_agree": (severity == full_severity).mean(),
+            **dict(zip(("precision", "recall", "f1"), scores(y, label))),
+            "us_per_msg": seconds / len(texts) * 1e6,
+            "speedup": full_s / seconds,
+        })
+
+        for i in np.flatnonzero((label != full_label) | (severity != full_severity))[:show]:
+            print(f"  [{rows[-1]['setting']}] label {y[i]}: cascade {label[i]}/{severity[i]}, "
+                  f"full {full_label[i]}/{full_severity[i]}: {texts[i][:80]!r}")
+    return pd.DataFrame(rows)
+
+
+# ---------------- Main ----------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare cascade verdicts with the full pipeline")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--data", help="labeled CSV")
+    source.add_argument("--synthetic", type=int, metavar="ROWS", help="use a generated corpus instead")
+    parser.add_argument("--text-column", default="text")
+    parser.add_argument("--label-column", default="label")
+    parser.add_argument("--model", default=worker_model_path())
+    parser.add_argument("--min-hits", default="1,2,3", help="comma-separated; 0 disables the abusive shortcut")
+    parser.add_argument("--short-words", default="0,3,5", help="comma-separated; 0 disables the clean shortcut")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--sentiment", action="store_true", help="compute sentiment in the cascade too")
+    parser.add_argument("--show", type=int, default=0, help="print up to N disagreements per setting")
+    parser.add_argument("--report", help="also write the table to this CSV")
+    args = parser.parse_args(argv)
+
+    warnings.filterwarnings("ignore")
+    if args.data:
+        texts, y = load_data(args.data, args.text_column, args.label_column)
+    else:
+        texts, y = synthetic_data(args.synthetic)
+    pipeline = load_pipeline(args.model)
+    analyze_texts(texts[:100], pipeline)   # warm-up
+
+    settings = list(product(map(int, args.min_hits.split(",")), map(int, args.short_words.split(","))))
+    report = evaluate(texts, y, pipeline, settings, args.batch_size, args.sentiment, args.show)
+    print(f"{len(texts):,} messages, {y.mean():.1%} labeled abusive")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+    if args.report:
+        report.to_csv(args.report, index=False)
+
+
+if __name__ == "__main__":
+    main()
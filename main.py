@@ -3,20 +3,31 @@
 # ============================
 
 import streamlit as st
-import joblib
-import re
+import json
+import os
+import tempfile
+import time
+from collections import deque
+from contextlib import nullcontext
+from functools import partial
 import pandas as pd
 import numpy as np
-from st_aggrid import AgGrid, GridOptionsBuilder
-import plotly.express as px
-from textblob import TextBlob
-from nltk.corpus import stopwords
-import nltk
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-from collections import Counter
-
-from utils.abuse_words import abusive_words, suggestions, detect_abusive_tokens
+# wordcloud and st_aggrid are imported inside the panels that use them,
+# so a plain score never pays for them.
+
+from utils.abuse_words import get_lexicon
+from utils.scoring import load_pipeline, model_version, get_result_cache, analyze_text, toxicity_level
+from utils.export import FORMATS, export_results
+from utils.highlight import highlight_abusive
+from utils.history import get_history
+from utils.incremental import IncrementalAnalyzer
+from utils.longdoc import AGGREGATES, analyze_document
+from utils.memory import profiler, rss_mb, session_sizes, trim_session
+from utils.tracing import Trace, metrics, rolling_percentiles, span, trace
+from utils.visualization import (
+    gauge_html, pie_html, wordcloud_png, non_abusive_frequencies, abusive_frequencies
+)
+from utils.settings import REALTIME_DEBOUNCE_SECONDS, LONGDOC_WINDOW_WORDS, MEMORY_PROFILE, SESSION_MEMORY_CAP_MB
 
 # ---------------- Page Config ----------------
 st.set_page_config(
@@ -258,79 +269,27 @@ details, summary {
 """, unsafe_allow_html=True)
 
 
-# ---------------- NLTK ----------------
-nltk.download("stopwords")
-stop_words = set(stopwords.words("english"))
-
 # ---------------- Load Model ----------------
-pipeline = joblib.load("abuse_model.joblib")
+@st.cache_resource(show_spinner="Loading model...")
+def get_pipeline(version):
+    # Loaded once per server process (and again only when the file changes)
+    return load_pipeline()
 
-# ---------------- Utils ----------------
-def clean_text(text):
-    text = text.lower()
-    text = re.sub(r"http\S+|www\.\S+", " ", text)
-    text = re.sub(r"@\w+|#\w+", " ", text)
-    text = re.sub(r"[^a-z0-9\s\*]", " ", text)
-    return re.sub(r"\s+", " ", text).strip()
-
-def normalize_censored(text):
-    text = re.sub(r"f\*+k", "fuck", text, flags=re.I)
-    text = re.sub(r"a\*+hole", "asshole", text, flags=re.I)
-    return text
-
-def toxicity_level(prob, abusive_count):
-    if abusive_count == 0:
-        return "Low"
-    if prob < 0.2:
-        return "Low"
-    elif prob < 0.5:
-        return "Medium"
-    else:
-        return "High"
-
-def analyze_text(text):
-    text = normalize_censored(text)
-    cleaned = clean_text(text)
-    pred = pipeline.predict([cleaned])[0]
-    prob = pipeline.predict_proba([cleaned])[0][1]
-    abusive_tokens = detect_abusive_tokens(text)
-    polarity = TextBlob(text).sentiment.polarity
-    sentiment = "Positive" if polarity > 0.1 else "Negative" if polarity < -0.1 else "Neutral"
-    return cleaned, pred, prob, abusive_tokens, sentiment, polarity
+pipeline = get_pipeline(model_version())
+result_cache = get_result_cache()
 
+# ---------------- Utils ----------------
 def build_abuse_table(abusive_tokens):
+    lexicon = get_lexicon()
     return pd.DataFrame({
         "Abusive Word": abusive_tokens,
+        "Category": [lexicon.category(w) or "—" for w in abusive_tokens],
+        "Severity Weight": [lexicon.weight(w) for w in abusive_tokens],
         "Suggested Replacement": [
-            suggestions.get(w.lower(), "—") for w in abusive_tokens
+            lexicon.suggestion(w, "—") for w in abusive_tokens
         ]
     })
 
-def non_abusive_wordcloud(text, abusive_tokens):
-    words = [
-        w for w in clean_text(text).split()
-        if w not in abusive_tokens and w not in stop_words
-    ]
-    if not words:
-        return None
-    return WordCloud(
-        width=800,
-        height=400,
-        background_color="black",
-        colormap="cool"
-    ).generate(" ".join(words))
-
-def abusive_wordcloud(abusive_tokens):
-    if not abusive_tokens:
-        return None
-    freq = Counter([w.lower() for w in abusive_tokens])
-    return WordCloud(
-        width=800,
-        height=400,
-        background_color="black",
-        colormap="autumn"
-    ).generate_from_frequencies(freq)
-
 # ---------------- Header ----------------
 st.markdown("""
 <h1 style="text-align:center;font-size:3rem;color:#38bdf8;">
@@ -344,36 +303,79 @@ Real-time Abuse Detection • Sentiment • Toxicity Analytics
 # ---------------- Sidebar ----------------
 st.sidebar.markdown("<h2>⚙️ Control Panel</h2>", unsafe_allow_html=True)
 real_time = st.sidebar.toggle("⚡ Real-Time Analysis", value=False)
-
-if "history" not in st.session_state:
-    st.session_state.history = []
+diagnostics = st.sidebar.toggle("🩺 Diagnostics", value=False)
+memory_profiling = diagnostics and st.sidebar.toggle(
+    "🧠 Memory Profiling", value=MEMORY_PROFILE,
+    help="tracemalloc around each analysis: what it allocated and kept, by source line"
+)
+long_doc = st.sidebar.toggle("📄 Long-Document Mode", value=False)
+
+if long_doc:
+    with st.sidebar.expander("📄 Long-Document Settings", expanded=False):
+        doc_options = {
+            "mode": st.radio("Windows", ["sentence", "tokens"], horizontal=True),
+            "window_words": st.slider("Words per window", 10, 200, LONGDOC_WINDOW_WORDS, step=10),
+            "aggregate": st.selectbox("Document score", AGGREGATES),
+            "top_k": st.slider("k (topk)", 1, 10, 3),
+            "max_windows": st.number_input("Max windows (0 = all)", 0, 100000, 1000, step=100) or None,
+            "time_budget": (st.number_input("Time budget, ms (0 = none)", 0, 60000, 2000, step=250) / 1000) or None,
+            "stop_on_high": st.checkbox("Stop at the first High window"),
+        }
+
+history = get_history()
 
 with st.sidebar.expander("📜 Analysis History", expanded=True):
-    for i, t in enumerate(reversed(st.session_state.history[-15:]), 1):
-        st.write(f"{i}. {t}")
+    for i, r in enumerate(history.recent(15), 1):
+        st.write(f"{i}. {r.preview}" + (f" — **{r.severity}**" if r.severity else ""))
+
+if history.db is not None:
+    with st.sidebar.expander("🗂️ Stored History", expanded=False):
+        page_size = 20
+        pages = max(1, -(-history.db.count() // page_size))
+        page = st.number_input("Page", min_value=1, max_value=pages, value=1) - 1
+        for r in history.db.page(page, page_size):
+            st.write(f"{time.strftime('%m-%d %H:%M', time.localtime(r.timestamp))} · {r.severity} · {r.preview}")
+        counts = history.db.severity_counts()
+        if counts:
+            st.bar_chart(pd.DataFrame.from_dict(counts, orient="index").fillna(0))
+
+cache_stats = result_cache.stats()
+st.sidebar.caption(
+    f"🗄️ Result cache: {cache_stats['size']:,} entries • "
+    f"{cache_stats['hits']:,} hits / {cache_stats['misses']:,} misses • "
+    f"{cache_stats['evictions']:,} evicted"
+)
 
 # ---------------- Input ----------------
-st.markdown("<div class='glass'>", unsafe_allow_html=True)
-st.markdown("<h4 style='color:#38bdf8;'>✍️ Enter text</h4>", unsafe_allow_html=True)
-user_input = st.text_area("", height=160, placeholder="Type or paste text here...")
-st.markdown("</div>", unsafe_allow_html=True)
+tab_text, tab_bulk = st.tabs(["✍️ Single Text", "📂 Bulk CSV"])
+
+with tab_text:
+    st.markdown("<div class='glass'>", unsafe_allow_html=True)
+    st.markdown("<h4 style='color:#38bdf8;'>✍️ Enter text</h4>", unsafe_allow_html=True)
+    user_input = st.text_area("", height=160, placeholder="Type or paste text here...")
+    st.markdown("</div>", unsafe_allow_html=True)
 
-analyze_clicked = st.button("🔍 Analyze")
+    analyze_clicked = st.button("🔍 Analyze")
 
 # ---------------- Analysis ----------------
-def run_analysis(text):
-    cleaned, pred, prob, abusive_tokens, sentiment, polarity = analyze_text(text)
+def run_analysis(text, incremental=False):
+    if incremental:
+        # Real-time typing: only sentences that changed are rescored
+        if "incremental" not in st.session_state:
+            st.session_state.incremental = IncrementalAnalyzer(pipeline)
+        analyzer = st.session_state.incremental
+        analyzer.pipeline = pipeline
+        cleaned, pred, prob, abusive_tokens, sentiment, polarity = analyzer.analyze(text)
+    else:
+        cleaned, pred, prob, abusive_tokens, sentiment, polarity = analyze_text(text, pipeline, cache=result_cache)
     severity = toxicity_level(prob, len(abusive_tokens))
 
     total = len(cleaned.split())
     abusive = len(abusive_tokens)
     clean = total - abusive
 
-    st.session_state.history.append({
-        "text": text,
-        "toxicity": prob,
-        "severity": severity
-    })
+    with span("history"):
+        history.add(text, prob, severity)
 
     # KPIs
     st.markdown(f"""
@@ -386,13 +388,8 @@ def run_analysis(text):
 
     
     # Highlighted Text
-    highlighted = text
-    for w in abusive_tokens:
-        highlighted = re.sub(
-            f"(?i){re.escape(w)}",
-            f"<span class='abusive-word'>{w}</span>",
-            highlighted
-        )
+    with span("highlight"):
+        highlighted, _ = highlight_abusive(text, css_class="abusive-word")
     st.markdown(f"<div class='glass'>{highlighted}</div>", unsafe_allow_html=True)
 
     # Sentiment
@@ -419,29 +416,113 @@ def run_analysis(text):
     for r in reasons:
         st.markdown(f"- {r}")
 
-    # Toxicity Gauge
-    gauge = px.bar(
-        x=[prob], y=["Toxicity"], orientation="h",
-        range_x=[0, 1], text=[f"{prob:.2f}"]
-    )
-    gauge.update_layout(height=150, paper_bgcolor="rgba(0,0,0,0)", font_color="white")
-    st.plotly_chart(gauge, use_container_width=True)
+    # Charts & word clouds are the expensive part; while typing in
+    # real-time mode they are rebuilt at most once per debounce interval.
+    now = time.monotonic()
+    last = st.session_state.get("visuals")
+    if incremental and last and last["text"] != text and now - last["at"] < REALTIME_DEBOUNCE_SECONDS:
+        st.caption(f"📉 Charts refresh every {REALTIME_DEBOUNCE_SECONDS:g}s while typing")
+        # Re-run on a timer until the charts have caught up with `text`
+        st.fragment(run_every=REALTIME_DEBOUNCE_SECONDS)(refresh_visuals)(text, prob, clean, abusive, abusive_tokens)
+    else:
+        visuals = last
+        if not last or last["text"] != text:
+            with span("visuals"):
+                visuals = build_visuals(text, prob, clean, abusive, abusive_tokens)
+            visuals["at"] = now
+            st.session_state.visuals = visuals
+        with span("render"):
+            render_visuals(visuals)
+
+def refresh_visuals(text, prob, clean, abusive, abusive_tokens):
+    # Debounced render: shows the last charts until they are a full interval
+    # old, then rebuilds them for `text` and reruns the app, whose next pass
+    # renders them directly and so drops this fragment's timer
+    visuals = st.session_state.get("visuals")
+    now = time.monotonic()
+    if visuals is None or (visuals["text"] != text and now - visuals["at"] >= REALTIME_DEBOUNCE_SECONDS):
+        with span("visuals"):
+            visuals = build_visuals(text, prob, clean, abusive, abusive_tokens)
+        visuals["at"] = now
+        st.session_state.visuals = visuals
+        st.rerun(scope="app")
+    with span("render"):
+        render_visuals(visuals)
+
+def run_document_analysis(text, options):
+    doc = analyze_document(text, pipeline, **options)
+    windows = doc.windows
+    toxic = windows[windows["severity"] != "Low"].sort_values("prob", ascending=False)
+    scored = len(windows) + doc.skipped
+
+    with span("history"):
+        history.add(text, doc.prob, doc.severity)
 
-    # Severity Pie
-    fig = px.pie(
-        names=["Clean", "Abusive"],
-        values=[clean, abusive]
+    st.markdown(f"""
+    <div style="display:flex;gap:20px;">
+        <div class="kpi-card">🧩 Windows<br><h2>{scored} / {doc.total_windows}</h2></div>
+        <div class="kpi-card">⚠️ Toxic passages<br><h2>{len(toxic)}</h2></div>
+        <div class="kpi-card">🧪 Toxicity<br><h2>{doc.severity}</h2></div>
+    </div>
+    """, unsafe_allow_html=True)
+    notes = [f"{doc.skipped} empty skipped"] if doc.skipped else []
+    if doc.truncated:
+        notes.insert(0, "stopped early" if doc.stopped_early else "window cap reached")
+        st.caption(f"⏱️ Scored {scored} of {doc.total_windows} windows ({', '.join(notes)}) in {doc.elapsed * 1e3:.0f} ms")
+    else:
+        note = f" ({notes[0]})" if notes else ""
+        st.caption(f"⏱️ Scored {doc.total_windows} windows{note} in {doc.elapsed * 1e3:.0f} ms")
+
+    st.markdown(gauge_html(doc.prob), unsafe_allow_html=True)
+    if len(windows):
+        st.markdown("### 📈 Toxicity by window")
+        st.bar_chart(windows["prob"])
+
+    if len(toxic):
+        st.markdown("### 🔥 Toxic passages")
+        with span("highlight"):
+            for row in toxic.head(20).itertuples():
+                passage, _ = highlight_abusive(row.text, css_class="abusive-word")
+                st.markdown(
+                    f"<div class='glass'><b>{row.severity}</b> · {row.prob:.2f} · chars {row.start}–{row.end}"
+                    f"<br>{passage}</div>",
+                    unsafe_allow_html=True
+                )
+
+    st.download_button(
+        "⬇️ Download windows CSV",
+        windows.to_csv(index=False),
+        file_name="toxiguard_windows.csv",
+        mime="text/csv"
     )
-    fig.update_layout(paper_bgcolor="rgba(0,0,0,0)", font_color="white")
-    st.plotly_chart(fig, use_container_width=True)
+
+def build_visuals(text, prob, clean, abusive, abusive_tokens):
+    # Gauge and pie are plain HTML; table and word clouds are only built
+    # when their panels are switched on (see render_visuals).
+    return {
+        "gauge": gauge_html(prob),
+        "pie": pie_html(clean, abusive),
+        "text": text,
+        "tokens": abusive_tokens,
+    }
+
+def render_visuals(visuals):
+    st.markdown(visuals["gauge"], unsafe_allow_html=True)
+    st.markdown(visuals["pie"], unsafe_allow_html=True)
+
+    abusive_tokens = visuals["tokens"]
 
     # Table + CSV
     if abusive_tokens:
         st.markdown("### 📊 Abusive Words & Suggestions")
         df_table = build_abuse_table(abusive_tokens)
-        gb = GridOptionsBuilder.from_dataframe(df_table)
-        gb.configure_default_column(sortable=True, filter=True)
-        AgGrid(df_table, gridOptions=gb.build(), height=200)
+        if st.toggle("Interactive table", key="show_table"):
+            from st_aggrid import AgGrid, GridOptionsBuilder
+            gb = GridOptionsBuilder.from_dataframe(df_table)
+            gb.configure_default_column(sortable=True, filter=True)
+            AgGrid(df_table, gridOptions=gb.build(), height=200)
+        else:
+            st.dataframe(df_table, hide_index=True, use_container_width=True)
 
         st.download_button(
             "⬇️ Download CSV",
@@ -451,32 +532,235 @@ def run_analysis(text):
         )
 
     # Word Clouds
+    if not st.toggle("☁️ Word clouds", key="show_clouds"):
+        return
+    if "clouds" not in visuals:
+        visuals["clouds"] = (
+            wordcloud_png(non_abusive_frequencies(visuals["text"], abusive_tokens), "cool"),
+            wordcloud_png(abusive_frequencies(abusive_tokens), "autumn"),
+        )
+    wc_clean, wc_abuse = visuals["clouds"]
     col1, col2 = st.columns(2)
 
     with col1:
-        wc_clean = non_abusive_wordcloud(text, abusive_tokens)
         if wc_clean:
             st.markdown("### ☁️ Non-Abusive Word Cloud")
-            fig, ax = plt.subplots()
-            ax.imshow(wc_clean)
-            ax.axis("off")
-            st.pyplot(fig)
+            st.image(wc_clean, use_container_width=True)
 
     with col2:
-        wc_abuse = abusive_wordcloud(abusive_tokens)
         if wc_abuse:
             st.markdown("### 🔥 Abusive Word Cloud")
-            fig, ax = plt.subplots()
-            ax.imshow(wc_abuse)
-            ax.axis("off")
-            st.pyplot(fig)
+            st.image(wc_abuse, use_container_width=True)
+
+# ---------------- Bulk Scoring ----------------
+EXPORT_MIME = {"csv": "text/csv", "csv.gz": "application/gzip", "parquet": "application/vnd.apache.parquet"}
+
+try:
+    # Streamlit with deferred downloads calls `data` only when the button is clicked
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    DEFERRED_DOWNLOADS = hasattr(MediaFileManager, "add_deferred")
+except ImportError:
+    DEFERRED_DOWNLOADS = False
+
+
+def read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def new_export_path(fmt):
+    """A temporary file for this session's export; the previous one is deleted."""
+    old = st.session_state.get("bulk_export")
+    if old and os.path.exists(old):
+        os.remove(old)
+    fd, path = tempfile.mkstemp(prefix="toxiguard-", suffix="." + fmt)
+    os.close(fd)
+    st.session_state.bulk_export = path
+    return path
+
+
+def run_bulk(df, column, batch_size, fmt):
+    texts = df[column].fillna("").astype(str).tolist()
+    total = len(texts)
+    progress = st.progress(0.0, text=f"Scoring {total:,} rows...")
+
+    # Results go straight to the export file; only counts and a preview stay in memory
+    path = new_export_path(fmt)
+    preview = []
+    counts = {"abusive": 0, "High": 0}
+
+    def on_chunk(scores, done):
+        counts["abusive"] += int((scores["label"] == 1).sum())
+        counts["High"] += int((scores["severity"] == "High").sum())
+        shown = sum(len(p) for p in preview)
+        if shown < 1000:
+            preview.append(scores.drop(columns="spans").head(1000 - shown))
+        progress.progress(done / total, text=f"Scored {done:,} / {total:,} rows")
+
+    start = time.perf_counter()
+    export_results(texts, path, fmt, ids=df.index.to_numpy(), pipeline=pipeline, batch_size=batch_size,
+                   chunk_rows=max(batch_size, 10000), include_text=True, on_chunk=on_chunk)
+    elapsed = time.perf_counter() - start
+
+    results = pd.concat(preview, ignore_index=True).set_axis(df.index[:sum(len(p) for p in preview)])
+    results.insert(0, column, texts[:len(results)])
+    progress.progress(1.0, text=f"Scored {total:,} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)")
+
+    st.markdown(f"""
+    <div style="display:flex;gap:20px;">
+        <div class="kpi-card">📄 Rows<br><h2>{total:,}</h2></div>
+        <div class="kpi-card">⚠️ Abusive<br><h2>{counts["abusive"]:,}</h2></div>
+        <div class="kpi-card">🔥 High<br><h2>{counts["High"]:,}</h2></div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.dataframe(results, use_container_width=True)
+    size = os.path.getsize(path)
+    size = f"{size / 1e6:,.1f} MB" if size >= 1e5 else f"{size / 1e3:,.0f} KB"
+    st.download_button(
+        f"⬇️ Download Scored {fmt.upper()} ({size})",
+        partial(read_file, path) if DEFERRED_DOWNLOADS else read_file(path),
+        file_name=f"toxiguard_bulk_report.{fmt}",
+        mime=EXPORT_MIME[fmt],
+        on_click="ignore"
+    )
 
 # ---------------- Trigger ----------------
-if user_input.strip():
-    if user_input not in st.session_state.history:
-        st.session_state.history.append(user_input)
-    if analyze_clicked or real_time:
-        run_analysis(user_input)
+with tab_text:
+    if analyze_clicked:
+        # Keep the result on screen across reruns caused by other widgets
+        # (e.g. switching on a lazy panel)
+        st.session_state.analyzed = user_input
+    shown = st.session_state.get("analyzed") == user_input
+    if user_input.strip():
+        if analyze_clicked or real_time or shown:
+            # Diagnostics always times the analysis; otherwise it is sampled
+            profiling = profiler.profile("run_analysis") if memory_profiling else nullcontext()
+            with profiling as memory_report:
+                with trace("run_analysis", force=diagnostics) as analysis_trace:
+                    if long_doc:
+                        run_document_analysis(user_input, doc_options)
+                    else:
+                        run_analysis(user_input, incremental=real_time and not analyze_clicked)
+            if memory_report is not None:
+                st.session_state.setdefault("memory_reports", deque(maxlen=20)).append(memory_report)
+            if isinstance(analysis_trace, Trace):
+                st.session_state.last_trace = analysis_trace
+                st.session_state.setdefault("traces", deque(maxlen=200)).append(analysis_trace)
+
+with tab_bulk:
+    uploaded = st.file_uploader("Upload a CSV of messages", type=["csv"])
+    if uploaded is not None:
+        bulk_df = pd.read_csv(uploaded)
+        text_cols = [c for c in bulk_df.columns if pd.api.types.is_string_dtype(bulk_df[c])] or list(bulk_df.columns)
+        default = text_cols.index("text") if "text" in text_cols else 0
+        column = st.selectbox("Text column", text_cols, index=default)
+        batch_size = st.select_slider("Batch size", options=[256, 512, 1000, 2000, 5000], value=1000)
+        export_fmt = st.radio("Export format", FORMATS, index=FORMATS.index("csv.gz"), horizontal=True)
+        if bulk_df.empty:
+            st.warning("The uploaded file has no rows.")
+        elif st.button("🚀 Score File"):
+            run_bulk(bulk_df, column, batch_size, export_fmt)
+
+# ---------------- Memory ----------------
+# Shared by every session, so not part of any session's size
+SHARED_OBJECTS = (pipeline, history.db)
+
+
+def keep_newest(key, n):
+    def trim(state):
+        items = state.get(key)
+        if not items or len(items) <= n:
+            return False
+        for _ in range(len(items) - n):
+            items.popleft()
+        return True
+    return trim
+
+
+# Cheapest loss first: renders and diagnostics are rebuilt on the next
+# analysis, the sentence cache only costs rescoring, history is gone.
+SESSION_TRIMMERS = [
+    ("cached renders", lambda state: state.pop("visuals", None) is not None),
+    ("memory reports", keep_newest("memory_reports", 1)),
+    ("timing traces", keep_newest("traces", 20)),
+    ("real-time sentence cache", lambda state: "incremental" in state and state.incremental.trim(50) > 0),
+    ("history", lambda state: history.trim(15) > 0),
+]
+
+if SESSION_MEMORY_CAP_MB:
+    before, after, trimmed = trim_session(
+        st.session_state, SESSION_MEMORY_CAP_MB * 1e6, SESSION_TRIMMERS, SHARED_OBJECTS
+    )
+    if trimmed:
+        st.session_state.memory_trim = {"at": time.time(), "before": before, "after": after, "trimmed": trimmed}
+
+# ---------------- Diagnostics ----------------
+if diagnostics:
+    with st.sidebar.expander("🩺 Diagnostics", expanded=True):
+        last = st.session_state.get("last_trace")
+        if last is None:
+            st.caption("Run an analysis to see where the time goes.")
+        else:
+            st.markdown(f"**Last analysis:** {last.total * 1e3:.1f} ms")
+            breakdown = pd.DataFrame({"ms": [v * 1e3 for v in last.stages.values()]}, index=list(last.stages))
+            st.bar_chart(breakdown, horizontal=True)
+
+            window = st.session_state.traces
+            rolling = pd.DataFrame.from_dict(
+                rolling_percentiles(window), orient="index", columns=["p50 ms", "p95 ms", "n"]
+            )
+            st.markdown(f"**Session, last {len(window)} analyses**")
+            st.dataframe(rolling.round(2), use_container_width=True)
+        st.download_button(
+            "⬇️ Process metrics (JSON)",
+            json.dumps(metrics.snapshot(), indent=2),
+            file_name="toxiguard_metrics.json",
+            mime="application/json"
+        )
+
+    with st.sidebar.expander("🧠 Memory", expanded=memory_profiling):
+        sizes = session_sizes(st.session_state, SHARED_OBJECTS)
+        rss = rss_mb()
+        st.markdown(
+            f"**Session state:** {sum(sizes.values()) / 1e3:,.1f} KB"
+            + (f" · **Process RSS:** {rss:,.0f} MB" if rss is not None else "")
+        )
+        st.dataframe(
+            pd.DataFrame({"KB": [b / 1e3 for b in sizes.values()]}, index=list(sizes)).round(1),
+            use_container_width=True
+        )
+        last_trim = st.session_state.get("memory_trim")
+        if SESSION_MEMORY_CAP_MB:
+            st.caption(
+                f"Cap {SESSION_MEMORY_CAP_MB:g} MB"
+                + (f" · last trim: {', '.join(last_trim['trimmed'])} "
+                   f"({last_trim['before'] / 1e3:,.0f} → {last_trim['after'] / 1e3:,.0f} KB)" if last_trim else "")
+            )
+
+        reports = st.session_state.get("memory_reports")
+        if reports:
+            last = reports[-1]
+            st.markdown(
+                f"**Last analysis:** kept {last['kept_kb']:,.1f} KB · peak {last['peak_kb']:,.1f} KB · "
+                f"{last['seconds'] * 1e3:,.0f} ms traced"
+            )
+            st.dataframe(pd.DataFrame(last["top"]).round(1), hide_index=True, use_container_width=True)
+        elif memory_profiling:
+            st.caption("Run an analysis to see what it allocates.")
+
+        st.download_button(
+            "⬇️ Memory report (JSON)",
+            json.dumps({
+                "rss_mb": rss,
+                "session_bytes": sizes,
+                "cap_mb": SESSION_MEMORY_CAP_MB,
+                "last_trim": last_trim,
+                "analyses": list(reports or ()),
+            }, indent=2),
+            file_name="toxiguard_memory.json",
+            mime="application/json"
+        )
 
 # ---------------- Footer ----------------
 st.markdown("""
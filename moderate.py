@@ -0,0 +1,345 @@
+# moderate.py — streaming chat moderation
+#
+#   python moderate.py < chat.jsonl > verdicts.jsonl
+#   python moderate.py --socket /tmp/toxiguard.sock -o verdicts.jsonl
+#
+# Input is one JSON object per line: {"user": ..., "channel": ..., "text": ...,
+# "timestamp": ...}, the timestamp in epoch seconds or ISO 8601 (arrival
+# time when missing); an "id" is echoed back. With --socket, any number of
+# local clients can connect and write such lines.
+#
+# Every message gets a "verdict" line with its score and its user's
+# sliding window (utils.moderation); a user crossing the escalation rules
+# also gets an "escalation" line, and unreadable input an "error" line.
+#
+# Reading, scoring and writing are joined by bounded queues. Messages are
+# scored in small batches (--max-batch, --max-wait-ms); when scoring falls
+# behind, the queue fills and the reader stops taking input, so the
+# producer (pipe or socket client) blocks instead of memory growing. A
+# summary goes to stderr when the input ends.
+import argparse
+import asyncio
+import json
+import math
+import os
+import signal
+import stat
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from utils.cache import ResultCache
+from utils.cascade import Cascade
+from utils.moderation import ModerationState
+from utils.scoring import load_pipeline, analyze_texts, worker_model_path
+from utils.settings import (
+    RESULT_CACHE_SIZE, RESULT_CACHE_TTL, CASCADE_MIN_HITS, CASCADE_SHORT_WORDS,
+    MODERATION_WINDOW_SECONDS, MODERATION_WINDOW_BUCKETS, MODERATION_MAX_USERS,
+    MODERATION_ESCALATE_HIGH, MODERATION_ESCALATE_TOXICITY, MODERATION_ESCALATE_MIN_MESSAGES,
+)
+from utils.tracing import Histogram, metrics
+
+MAX_LINE = 64 * 1024
+
+Message = namedtuple("Message", "id user channel text timestamp received")
+
+
+# ---------------- Input ----------------
+def parse_timestamp(value):
+    if value is None:
+        return time.time()
+    timestamp = None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        timestamp = float(value)
+    elif isinstance(value, str):
+        try:
+            timestamp = float(value)
+        except ValueError:
+            try:
+                timestamp = datetime.fromisoformat(value).timestamp()
+            except (ValueError, OverflowError, OSError):
+                pass
+    if timestamp is None or not math.isfinite(timestamp):
+        raise ValueError(f"bad timestamp {value!r}")
+    return timestamp
+
+
+def _is_name(value):
+    # Users and channels key the windows and are echoed back: str or int only
+    return isinstance(value, (str, int)) and not isinstance(value, bool)
+
+
+def parse_message(line, received):
+    try:
+        obj = json.loads(line)
+    except ValueError:
+        raise ValueError("not valid JSON") from None
+    if not isinstance(obj, dict):
+        raise ValueError("expected a JSON object")
+    user, channel, text = obj.get("user"), obj.get("channel"), obj.get("text")
+    if not _is_name(user) or not isinstance(text, str):
+        raise ValueError("expected 'user' (string or integer) and a string 'text'")
+    if channel is not None and not _is_name(channel):
+        raise ValueError("'channel' must be a string or integer")
+    return Message(obj.get("id"), user, channel, text, parse_timestamp(obj.get("timestamp")), received)
+
+
+async def stdin_lines():
+    """Lines of stdin; a pipe is read without blocking the event loop."""
+    if stat.S_ISREG(os.fstat(sys.stdin.fileno()).st_mode):
+        # A redirected file never blocks; the queue paces it
+        for line in sys.stdin.buffer:
+            yield line
+        return
+    reader = asyncio.StreamReader(limit=MAX_LINE)
+    loop = asyncio.get_running_loop()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin.buffer)
+    async for line in stream_lines(reader):
+        yield line
+
+
+async def stream_lines(reader):
+    while True:
+        try:
+            line = await reader.readline()
+        except ValueError:
+            # Longer than MAX_LINE: the reader has already dropped it
+            yield None
+            continue
+        if not line:
+            return
+        yield line
+
+
+# ---------------- Pipeline ----------------
+def make_scorer(model_path, cache=None, cascade=None):
+    def score(texts):
+        # load_pipeline is cached and reloads when the artifact changes
+        pipeline = load_pipeline(model_path)
+        if cascade is not None:
+            return cascade.score(texts, pipeline)
+        return analyze_texts(texts, pipeline, batch_size=len(texts) or 1, cache=cache)
+    return score
+
+
+class Moderator:
+    """Bounded queues from the readers to the scorer to the writer."""
+
+    def __init__(self, scorer, state, out, max_batch=256, max_wait=0.01, queue_size=1024, executor=None):
+        self.scorer = scorer
+        self.state = state
+        self.out = out
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.executor = executor
+        self.inbox = asyncio.Queue(maxsize=queue_size)
+        self.outbox = asyncio.Queue(maxsize=queue_size)
+        self.latency = Histogram()
+        self.messages = self.errors = self.batches = self.max_queue = 0
+
+    async def feed(self, lines):
+        async for line in lines:
+            await self.put_line(line)
+
+    async def put_line(self, line):
+        if line is None:
+            await self.error(f"line longer than {MAX_LINE} bytes")
+            return
+        line = line.strip()
+        if not line:
+            return
+        try:
+            message = parse_message(line, time.perf_counter())
+        except ValueError as exc:
+            await self.error(str(exc), line=line[:200].decode("utf-8", "replace"))
+            return
+        # Waits while the queue is full: that is the backpressure
+        await self.inbox.put(message)
+        self.max_queue = max(self.max_queue, self.inbox.qsize())
+
+    async def error(self, message, **fields):
+        self.errors += 1
+        await self.outbox.put({"event": "error", "error": message, **fields})
+
+    async def close_input(self):
+        await self.inbox.put(None)
+
+    async def score_loop(self):
+        loop = asyncio.get_running_loop()
+        end = False
+        while not end:
+            first = await self.inbox.get()
+            if first is None:
+                break
+            batch = [first]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    message = self.inbox.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        message = await asyncio.wait_for(self.inbox.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if message is None:
+                    end = True
+                    break
+                batch.append(message)
+            try:
+                results = await loop.run_in_executor(self.executor, self.scorer, [m.text for m in batch])
+            except Exception as exc:
+                for message in batch:
+                    await self.error(f"scoring failed: {exc}", user=message.user, id=message.id)
+                continue
+            await self.emit(batch, results)
+        await self.outbox.put(None)
+
+    async def emit(self, batch, results):
+        self.batches += 1
+        done = time.perf_counter()
+        columns = zip(results["prob"].tolist(), results["label"].tolist(),
+                      results["severity"].tolist(), results["language"].tolist())
+        for message, (prob, label, severity, language) in zip(batch, columns):
+            # One bad message must not end the stream for everyone else
+            try:
+                (count, toxicity, high), reason = self.state.observe(message.user, message.timestamp, prob, severity)
+            except Exception as exc:
+                await self.error(f"window update failed: {exc}", user=message.user, id=message.id)
+                continue
+            self.messages += 1
+            latency = done - message.received
+            self.latency.observe(latency)
+            verdict = {
+                "event": "verdict", "user": message.user, "channel": message.channel,
+                "timestamp": message.timestamp, "prob": round(prob, 4), "label": label,
+                "severity": severity, "language": language, "window_messages": count,
+                "window_toxicity": round(toxicity, 4), "window_high": high,
+                "latency_ms": round(latency * 1e3, 2),
+            }
+            if message.id is not None:
+                verdict["id"] = message.id
+            await self.outbox.put(verdict)
+            if reason:
+                await self.outbox.put({
+                    "event": "escalation", "user": message.user, "channel": message.channel,
+                    "timestamp": message.timestamp, "reason": reason, "window_seconds": self.state.window,
+                    "window_messages": count, "window_toxicity": round(toxicity, 4), "window_high": high,
+                })
+
+    async def write_loop(self):
+        while True:
+            event = await self.outbox.get()
+            if event is None:
+                break
+            self.out.write(json.dumps(event, ensure_ascii=False) + "\n")
+            if self.outbox.empty():
+                self.out.flush()
+        self.out.flush()
+
+    def summary(self, elapsed):
+        return {
+            "messages": self.messages,
+            "errors": self.errors,
+            "escalations": self.state.escalations,
+            "seconds": round(elapsed, 3),
+            "messages_per_s": round(self.messages / max(elapsed, 1e-9), 1),
+            "batches": self.batches,
+            "mean_batch": round(self.messages / max(self.batches, 1), 1),
+            # null, not NaN (invalid JSON), when nothing was scored
+            "latency_ms": {f"p{q}": round(self.latency.quantile(q / 100) * 1e3, 2) if self.latency.count else None
+                           for q in (50, 95, 99)},
+            "max_queue": self.max_queue,
+            "users": len(self.state),
+        }
+
+
+# ---------------- Main ----------------
+async def moderate(args):
+    # One scoring thread: the model call is CPU-bound, batching is what
+    # buys throughput (as in serve.py)
+    executor = ThreadPoolExecutor(max_workers=1)
+    cache = None if args.no_cache or args.cascade else ResultCache(args.cache_size, RESULT_CACHE_TTL)
+    cascade = Cascade(args.cascade_min_hits or None, args.cascade_short_words) if args.cascade else None
+    scorer = make_scorer(args.model, cache, cascade)
+    scorer(["warm up"])
+    metrics.reset()
+
+    state = ModerationState(args.window, args.buckets, args.max_users, args.escalate_high,
+                            args.escalate_toxicity, args.min_messages)
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    moderator = Moderator(scorer, state, out, args.max_batch, args.max_wait_ms / 1000, args.queue_size, executor)
+    tasks = [asyncio.create_task(moderator.score_loop()), asyncio.create_task(moderator.write_loop())]
+    # SIGTERM stops like Ctrl-C: the summary is still printed
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+    start = time.perf_counter()
+    try:
+        if args.socket:
+            if os.path.exists(args.socket):
+                os.remove(args.socket)
+            server = await asyncio.start_unix_server(
+                lambda reader, writer: client(moderator, reader, writer), args.socket, limit=MAX_LINE)
+            print(f"Listening on {args.socket}", file=sys.stderr, flush=True)
+            try:
+                async with server:
+                    await server.serve_forever()
+            finally:
+                os.remove(args.socket)
+        else:
+            await moderator.feed(stdin_lines())
+            await moderator.close_input()
+            await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        executor.shutdown()
+        if args.output:
+            out.close()
+        print(json.dumps(moderator.summary(time.perf_counter() - start)), file=sys.stderr, flush=True)
+
+
+async def client(moderator, reader, writer):
+    try:
+        await moderator.feed(stream_lines(reader))
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Streaming chat moderation over JSONL")
+    parser.add_argument("--socket", help="listen on this Unix socket instead of reading stdin")
+    parser.add_argument("-o", "--output", help="write events here instead of stdout")
+    parser.add_argument("--model", default=worker_model_path())
+    parser.add_argument("--max-batch", type=int, default=256, help="max messages per scoring batch")
+    parser.add_argument("--max-wait-ms", type=float, default=10.0, help="max time a message waits for its batch")
+    parser.add_argument("--queue-size", type=int, default=1024, help="messages queued before input is paused")
+    parser.add_argument("--no-cache", action="store_true", help="disable the result cache")
+    parser.add_argument("--cache-size", type=int, default=RESULT_CACHE_SIZE)
+    parser.add_argument("--cascade", action="store_true",
+                        help="decide clear-cut messages from the lexicon, send only the rest to the model")
+    parser.add_argument("--cascade-min-hits", type=int, default=CASCADE_MIN_HITS)
+    parser.add_argument("--cascade-short-words", type=int, default=CASCADE_SHORT_WORDS)
+    parser.add_argument("--window", type=float, default=MODERATION_WINDOW_SECONDS, help="sliding window in seconds")
+    parser.add_argument("--buckets", type=int, default=MODERATION_WINDOW_BUCKETS, help="time buckets per window")
+    parser.add_argument("--max-users", type=int, default=MODERATION_MAX_USERS)
+    parser.add_argument("--escalate-high", type=int, default=MODERATION_ESCALATE_HIGH,
+                        help="High-severity messages in a window that escalate a user (0 disables)")
+    parser.add_argument("--escalate-toxicity", type=float, default=MODERATION_ESCALATE_TOXICITY,
+                        help="rolling mean toxicity that escalates a user")
+    parser.add_argument("--min-messages", type=int, default=MODERATION_ESCALATE_MIN_MESSAGES,
+                        help="messages in the window before rolling toxicity counts")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(moderate(args))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+if __name__ == "__main__":
+    main()
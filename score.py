@@ -0,0 +1,232 @@
+# score.py — headless bulk scoring
+#
+#   python score.py comments.csv -o scored.csv
+#   python score.py chat.jsonl -o scored.parquet --workers 8 --chunk-size 50000
+#
+# The input is streamed in fixed-size chunks, scored by a pool of worker
+# processes (each loads the model once) and written incrementally. After
+# every chunk a checkpoint is saved next to the output, so re-running the
+# same command after a crash resumes from the last completed chunk.
+#
+# --cascade scores with utils.cascade: clear-cut rows are decided from the
+# lexicon, a "tier" column says which tier decided each row, and
+# --no-sentiment leaves polarity empty.
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import pandas as pd
+
+from utils.cascade import Cascade, TIERS
+from utils.scoring import load_pipeline, analyze_texts, worker_model_path
+from utils.settings import CASCADE_MIN_HITS, CASCADE_SHORT_WORDS
+
+# ---------------- Worker ----------------
+_pipeline = None
+_cascade = None
+
+
+def _init_worker(model_path, cascade=None):
+    """`cascade` is None or (min_hits, short_words, sentiment)."""
+    global _pipeline, _cascade
+    _pipeline = load_pipeline(model_path)
+    _cascade = cascade and (Cascade(*cascade[:2]), cascade[2])
+
+
+def _score_chunk(texts, batch_size):
+    if _cascade is not None:
+        cascade, sentiment = _cascade
+        return pd.concat([cascade.score(texts[i:i + batch_size], _pipeline, sentiment)
+                          for i in range(0, len(texts), batch_size)] or [cascade.score([], _pipeline)],
+                         ignore_index=True)
+    return analyze_texts(texts, _pipeline, batch_size=batch_size).reset_index(drop=True)
+
+
+# ---------------- Input ----------------
+def iter_chunks(path, columns, chunk_size, skip_rows=0):
+    """Yield DataFrames of at most `chunk_size` rows, starting after `skip_rows`."""
+    if path.endswith((".jsonl", ".ndjson")):
+        with open(path, "rb") as f:
+            # Skipped lines are never parsed, only read
+            lines = islice(f, skip_rows, None)
+            while True:
+                block = list(islice(lines, chunk_size))
+                if not block:
+                    break
+                # Blank lines still count as rows so offsets stay line-based
+                records = [json.loads(line) if line.strip() else {} for line in block]
+                yield pd.DataFrame.from_records(records, columns=columns)
+    else:
+        # A predicate, not range(): a row-number set would grow with skip_rows
+        skip = (lambda i: 0 < i <= skip_rows) if skip_rows else None
+        yield from pd.read_csv(path, usecols=columns, skiprows=skip, chunksize=chunk_size)
+
+
+# ---------------- Output ----------------
+class CsvSink:
+    def __init__(self, path):
+        self.path = path
+
+    def open(self, state):
+        if state:
+            # Drop anything written after the last checkpoint
+            with open(self.path, "r+b") as f:
+                f.truncate(state["bytes"])
+        self.file = open(self.path, "ab" if state else "wb")
+
+    def write(self, df):
+        df.to_csv(self.file, header=self.file.tell() == 0, index=False)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        return {"bytes": self.file.tell()}
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    """Parquet output as a directory of part files, one per chunk."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def open(self, state):
+        if not state and os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        os.makedirs(self.path, exist_ok=True)
+        self.parts = state["parts"] if state else 0
+        for name in os.listdir(self.path):
+            if name.startswith("part-") and int(name[5:11]) >= self.parts:
+                os.remove(os.path.join(self.path, name))
+
+    def write(self, df):
+        df.to_parquet(os.path.join(self.path, f"part-{self.parts:06d}.parquet"), index=False)
+        self.parts += 1
+        return {"parts": self.parts}
+
+    def close(self):
+        pass
+
+
+def make_sink(path):
+    return ParquetSink(path) if path.endswith(".parquet") else CsvSink(path)
+
+
+# ---------------- Checkpoint ----------------
+def input_fingerprint(path):
+    stat = os.stat(path)
+    return {"input": os.path.abspath(path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def load_checkpoint(path, fingerprint):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        state = json.load(f)
+    if {k: state.get(k) for k in fingerprint} != fingerprint:
+        sys.exit(f"{path} belongs to a different input; pass --restart to start over")
+    return state
+
+
+def save_checkpoint(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+# ---------------- Main ----------------
+def run(args):
+    checkpoint_path = args.output + ".ckpt"
+    fingerprint = input_fingerprint(args.input)
+    state = None if args.restart else load_checkpoint(checkpoint_path, fingerprint)
+    rows_done = state["rows"] if state else 0
+    if rows_done:
+        print(f"Resuming after {rows_done:,} rows")
+
+    columns = [args.text_column] + ([args.id_column] if args.id_column else [])
+    chunks = iter_chunks(args.input, columns, args.chunk_size, rows_done)
+
+    sink = make_sink(args.output)
+    sink.open(state)
+    tiers = dict.fromkeys(TIERS, 0)
+
+    def write(chunk, scores):
+        nonlocal rows_done, state
+        if "tier" in scores:
+            for tier, n in scores["tier"].value_counts().items():
+                tiers[tier] += n
+        if args.id_column:
+            scores.insert(0, args.id_column, chunk[args.id_column].to_numpy())
+        scores.insert(0, "row", range(rows_done, rows_done + len(scores)))
+        state = {**fingerprint, **sink.write(scores), "rows": rows_done + len(scores)}
+        save_checkpoint(checkpoint_path, state)
+        rows_done = state["rows"]
+        rate = (rows_done - start_rows) / max(time.perf_counter() - start, 1e-9)
+        print(f"\r{rows_done:,} rows  {rate:,.0f} rows/s", end="", flush=True)
+
+    def texts_of(chunk):
+        return chunk[args.text_column].fillna("").astype(str).tolist()
+
+    cascade = (args.cascade_min_hits or None, args.cascade_short_words, not args.no_sentiment) if args.cascade else None
+    start, start_rows = time.perf_counter(), rows_done
+    try:
+        if args.workers <= 1:
+            _init_worker(args.model, cascade)
+            for chunk in chunks:
+                write(chunk, _score_chunk(texts_of(chunk), args.batch_size))
+        else:
+            with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(args.model, cascade)) as pool:
+                # Bounded in-flight window keeps memory flat; results are
+                # written in input order so the checkpoint is a clean prefix.
+                pending = deque()
+                for chunk in chunks:
+                    pending.append((chunk, pool.submit(_score_chunk, texts_of(chunk), args.batch_size)))
+                    if len(pending) >= args.workers * 2:
+                        chunk, future = pending.popleft()
+                        write(chunk, future.result())
+                while pending:
+                    chunk, future = pending.popleft()
+                    write(chunk, future.result())
+    finally:
+        sink.close()
+        print()
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    print(f"Scored {rows_done:,} rows -> {args.output}")
+    scored = sum(tiers.values())
+    if scored:
+        print("Decided by tier: " + ", ".join(f"{t} {n / scored:.1%}" for t, n in tiers.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk abuse scoring for CSV/JSONL files")
+    parser.add_argument("input", help="input .csv or .jsonl file")
+    parser.add_argument("-o", "--output", required=True, help="output .csv or .parquet")
+    parser.add_argument("--text-column", default="text")
+    parser.add_argument("--id-column", default=None, help="column copied through to the output")
+    parser.add_argument("--chunk-size", type=int, default=20000, help="rows per chunk")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per classifier call")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--model", default=worker_model_path())
+    parser.add_argument("--restart", action="store_true", help="ignore any existing checkpoint")
+    parser.add_argument("--cascade", action="store_true",
+                        help="decide clear-cut rows from the lexicon, send only the rest to the model")
+    parser.add_argument("--cascade-min-hits", type=int, default=CASCADE_MIN_HITS)
+    parser.add_argument("--cascade-short-words", type=int, default=CASCADE_SHORT_WORDS)
+    parser.add_argument("--no-sentiment", action="store_true", help="skip sentiment (with --cascade)")
+    args = parser.parse_args(argv)
+    if args.no_sentiment and not args.cascade:
+        parser.error("--no-sentiment needs --cascade")
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+# select_model.py — accuracy vs. serving cost
+#
+#   python select_model.py --data labeled.csv
+#   python select_model.py --data labeled.csv --latency-budget-ms 0.5 --report selection.csv
+#
+# Cross-validates every vectorizer x classifier candidate in parallel, then
+# measures what each one costs to serve: single-message latency, batch
+# throughput, artifact size and load time. Candidates that no other
+# candidate beats on both F1 and latency form the Pareto front. The best F1
+# within the latency budget is written as the artifact main.py loads.
+import argparse
+import fnmatch
+import io
+import os
+import time
+import warnings
+from itertools import product
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.model_selection import StratifiedKFold, cross_validate
+from sklearn.naive_bayes import ComplementNB
+from sklearn.pipeline import Pipeline
+
+from utils.compact_model import export_compact
+from utils.preprocessing import preprocess_texts
+from utils.scoring import MODEL_PATH
+
+# ---------------- Grid ----------------
+VECTORIZERS = {
+    "word1": lambda n: TfidfVectorizer(max_features=n),
+    "word12": lambda n: TfidfVectorizer(ngram_range=(1, 2), max_features=n, sublinear_tf=True),
+    "char25": lambda n: TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 5), max_features=n, sublinear_tf=True),
+}
+MAX_FEATURES = (5000, 50000)
+CLASSIFIERS = {
+    "logreg": lambda: LogisticRegression(max_iter=1000),
+    "sgd": lambda: SGDClassifier(loss="log_loss", alpha=1e-5, random_state=42),
+    "cnb": lambda: ComplementNB(),
+}
+
+
+def candidates():
+    for (vec, make_vec), n, (clf, make_clf) in product(VECTORIZERS.items(), MAX_FEATURES, CLASSIFIERS.items()):
+        yield f"{vec}-{n // 1000}k+{clf}", Pipeline([("tfidf", make_vec(n)), ("clf", make_clf())])
+
+
+# ---------------- Data ----------------
+def load_data(path, text_column, label_column):
+    data = pd.read_csv(path, usecols=[text_column, label_column]).dropna()
+    y = data[label_column].astype(str).str.strip().str.lower().map(
+        {"non-abusive": 0, "abusive": 1, "0": 0, "1": 1}
+    )
+    if y.isna().any():
+        raise ValueError(f"unknown labels: {sorted(data[label_column][y.isna()].astype(str).unique())[:5]}")
+    return preprocess_texts(data[text_column].astype(str)).tolist(), y.to_numpy()
+
+
+# ---------------- Serving cost ----------------
+def serving_cost(pipeline, texts, batch_size, repeat):
+    single = []
+    for text in texts[:repeat]:
+        start = time.perf_counter()
+        pipeline.predict_proba([text])
+        single.append(time.perf_counter() - start)
+
+    batch = (texts * (batch_size // max(len(texts), 1) + 1))[:batch_size]
+    start = time.perf_counter()
+    pipeline.predict_proba(batch)
+    throughput = len(batch) / (time.perf_counter() - start)
+
+    buf = io.BytesIO()
+    joblib.dump(pipeline, buf)
+    size = buf.tell()
+    buf.seek(0)
+    start = time.perf_counter()
+    joblib.load(buf)
+    load_ms = (time.perf_counter() - start) * 1e3
+    return {
+        "latency_ms": float(np.median(single)) * 1e3,
+        "p95_ms": float(np.percentile(single, 95)) * 1e3,
+        "rows_per_s": throughput,
+        "size_kb": size / 1024,
+        "load_ms": load_ms,
+    }
+
+
+def pareto_front(df):
+    """Rows not dominated on (higher f1, lower latency)."""
+    front = []
+    for _, row in df.iterrows():
+        dominated = (
+            (df["f1"] >= row["f1"]) & (df["latency_ms"] <= row["latency_ms"])
+            & ((df["f1"] > row["f1"]) | (df["latency_ms"] < row["latency_ms"]))
+        ).any()
+        front.append(not dominated)
+    return front
+
+
+# ---------------- Main ----------------
+def run(args):
+    texts, y = load_data(args.data, args.text_column, args.label_column)
+    folds = min(args.folds, int(np.bincount(y, minlength=2).min()))
+    if folds < 2:
+        raise SystemExit("need at least two examples of each label for cross-validation")
+    cv = StratifiedKFold(folds, shuffle=True, random_state=42)
+    print(f"{len(texts):,} rows, {folds}-fold CV, {args.jobs} jobs")
+
+    rows, fitted = [], {}
+    for name, pipeline in candidates():
+        if args.only and not any(fnmatch.fnmatch(name, pattern) for pattern in args.only.split(",")):
+            continue
+        start = time.perf_counter()
+        scores = cross_validate(
+            pipeline, texts, y, cv=cv, n_jobs=args.jobs, error_score="raise",
+            scoring={"precision": "precision", "recall": "recall", "f1": "f1"},
+        )
+        pipeline.fit(texts, y)
+        fitted[name] = pipeline
+        rows.append({
+            "model": name,
+            "precision": scores["test_precision"].mean(),
+            "recall": scores["test_recall"].mean(),
+            "f1": scores["test_f1"].mean(),
+            **serving_cost(pipeline, texts, args.batch_size, args.repeat),
+            "train_s": time.perf_counter() - start,
+        })
+        print(f"  {name:<22} f1 {rows[-1]['f1']:.3f}  {rows[-1]['latency_ms']:.3f} ms/msg", flush=True)
+
+    if not rows:
+        raise SystemExit(f"no candidate matches --only {args.only!r}")
+    df = pd.DataFrame(rows)
+    df["pareto"] = pareto_front(df)
+    df = df.sort_values(["pareto", "f1", "latency_ms"], ascending=[False, False, True]).reset_index(drop=True)
+    with pd.option_context("display.width", 160, "display.max_columns", None):
+        print(df.round(3).to_string(index=False))
+    if args.report:
+        df.to_csv(args.report, index=False)
+        print(f"Report written to {args.report}")
+
+    if args.choose:
+        eligible = df[df["model"] == args.choose]
+        if eligible.empty:
+            raise SystemExit(f"unknown candidate {args.choose!r}")
+    else:
+        eligible = df if args.latency_budget_ms is None else df[df["latency_ms"] <= args.latency_budget_ms]
+        if eligible.empty:
+            raise SystemExit("no candidate fits the latency budget")
+    chosen = eligible.sort_values(["f1", "latency_ms"], ascending=[False, True]).iloc[0]["model"]
+
+    if args.dry_run:
+        print(f"Would choose {chosen}")
+        return
+    joblib.dump(fitted[chosen], args.output)
+    print(f"Chose {chosen} -> {args.output}")
+    compact = os.path.splitext(args.output)[0] + ".tgm"
+    try:
+        export_compact(fitted[chosen], compact)
+        print(f"Compact model saved as '{compact}'")
+    except ValueError:
+        # Only word-unigram TF-IDF + a logistic model has a compact form; an
+        # older .tgm is ignored because it predates the new joblib file.
+        print("Chosen model has no compact export")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-validated model selection with serving cost")
+    parser.add_argument("--data", default="data/sample_data.csv")
+    parser.add_argument("--text-column", default="text")
+    parser.add_argument("--label-column", default="label")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--jobs", type=int, default=-1, help="parallel CV jobs (-1: all cores)")
+    parser.add_argument("--only", help="comma-separated name patterns to run, e.g. 'word1-*,*+sgd'")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows for the throughput measurement")
+    parser.add_argument("--repeat", type=int, default=200, help="messages for the latency measurement")
+    parser.add_argument("--latency-budget-ms", type=float, help="max median single-message latency")
+    parser.add_argument("--choose", help="write this candidate instead of the best one")
+    parser.add_argument("--report", help="write the table as CSV")
+    parser.add_argument("-o", "--output", default=MODEL_PATH)
+    parser.add_argument("--dry-run", action="store_true", help="report only, write no artifact")
+    warnings.filterwarnings("ignore", category=UserWarning)
+    run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# serve.py — local HTTP scoring service
+#
+#   python serve.py --port 8080
+#
+#   POST /score        {"text": "..."}          -> one result
+#   POST /score/batch  {"texts": ["...", ...]}  -> {"results": [...]}
+#   GET  /healthz
+#   GET  /metrics       Prometheus text; /metrics.json for the same as JSON
+#
+# With --cascade, clear-cut messages are decided by the lexicon tier and
+# only the rest reach the model (see utils.cascade); results carry a
+# "tier" field and polarity is null unless the request has "sentiment": true.
+#
+# Concurrent /score requests are coalesced into micro-batches (bounded by
+# --max-batch and --max-wait-ms) and scored with one pipeline call. When
+# the queue is full the service answers 429 instead of queueing forever.
+import argparse
+import asyncio
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from utils.cache import ResultCache
+from utils.cascade import Cascade
+from utils.microbatch import MicroBatcher, QueueFullError
+from utils.scoring import load_pipeline, analyze_texts, worker_model_path
+from utils.settings import (
+    RESULT_CACHE_SIZE, RESULT_CACHE_TTL, RESULT_CACHE_DB, TRACE_SAMPLE_RATE,
+    CASCADE_MIN_HITS, CASCADE_SHORT_WORDS,
+)
+from utils.tracing import metrics, set_sample_rate
+
+MAX_BODY = 8 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+# ---------------- Scoring ----------------
+def make_scorer(model_path, cache=None, cascade=None):
+    def score(items):
+        # items are (text, wants sentiment) pairs
+        texts = [text for text, _ in items]
+        # load_pipeline is cached and reloads when the artifact changes
+        pipeline = load_pipeline(model_path)
+        if cascade is not None:
+            return cascade.score(texts, pipeline, sentiment=[s for _, s in items]).to_dict("records")
+        return analyze_texts(texts, pipeline, batch_size=len(texts) or 1, cache=cache).to_dict("records")
+    return score
+
+
+# ---------------- HTTP ----------------
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+async def read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "malformed request line")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "bad Content-Length")
+    if length > MAX_BODY:
+        raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "body too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, target.split("?", 1)[0], headers, body
+
+
+def write_response(writer, status, payload, keep_alive):
+    # str payloads are plain text (the Prometheus exposition), anything else JSON
+    if isinstance(payload, str):
+        body, content_type = payload.encode(), "text/plain; version=0.0.4; charset=utf-8"
+    else:
+        body, content_type = json.dumps(payload).encode(), "application/json"
+    head = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode() + body)
+
+
+def parse_json(body, key, kind):
+    try:
+        request = json.loads(body)
+        value = request[key]
+    except (ValueError, KeyError, TypeError):
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"expected a JSON object with '{key}'")
+    if not isinstance(value, kind):
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"'{key}' must be a {kind.__name__}")
+    return value, bool(request.get("sentiment", False))
+
+
+class ScoringService:
+    def __init__(self, batcher, cache=None, cascade=None, max_batch_request=1000):
+        self.batcher = batcher
+        self.cache = cache
+        self.cascade = cascade
+        self.max_batch_request = max_batch_request
+
+    async def dispatch(self, method, path, body):
+        if path == "/healthz" and method == "GET":
+            return HTTPStatus.OK, {
+                "status": "ok",
+                "queue": self.batcher.qsize(),
+                "batches": self.batcher.batches,
+                "scored": self.batcher.items,
+                "cache": self.cache.stats() if self.cache else None,
+                "cascade": self.cascade.stats() if self.cascade else None,
+            }
+
+        if path == "/metrics" and method == "GET":
+            text = metrics.prometheus()
+            return HTTPStatus.OK, text + self.cascade.prometheus() if self.cascade else text
+
+        if path == "/metrics.json" and method == "GET":
+            snapshot = metrics.snapshot()
+            if self.cascade:
+                snapshot["cascade"] = self.cascade.stats()
+            return HTTPStatus.OK, snapshot
+
+        if path == "/score" and method == "POST":
+            text, sentiment = parse_json(body, "text", str)
+            return HTTPStatus.OK, await self.batcher.submit((text, sentiment))
+
+        if path == "/score/batch" and method == "POST":
+            texts, sentiment = parse_json(body, "texts", list)
+            if len(texts) > self.max_batch_request:
+                raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                                f"at most {self.max_batch_request} texts per request")
+            if self.batcher.full():
+                raise QueueFullError
+            items = [(str(t), sentiment) for t in texts]
+            return HTTPStatus.OK, {"results": await self.batcher.run_batch(items)}
+
+        if path in ("/healthz", "/metrics", "/metrics.json", "/score", "/score/batch"):
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "method not allowed")
+        raise HttpError(HTTPStatus.NOT_FOUND, "not found")
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                    status, payload = await self.dispatch(method, path, body)
+                except QueueFullError:
+                    status, payload, keep_alive = HTTPStatus.TOO_MANY_REQUESTS, {"error": "queue full, retry later"}, True
+                except HttpError as exc:
+                    status, payload, keep_alive = exc.status, {"error": str(exc)}, False
+                except Exception:
+                    # A bug in one request must not drop the connection without an answer
+                    logger.exception("request failed")
+                    status, payload, keep_alive = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"}, False
+                write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+# ---------------- Main ----------------
+async def serve(args):
+    # A single scoring thread: the model call is CPU-bound, batching is
+    # what buys throughput, not concurrency.
+    executor = ThreadPoolExecutor(max_workers=1)
+    # Cascade results are not cached: the lexicon tier is cheaper than a lookup
+    cache = None if args.no_cache or args.cascade else ResultCache(args.cache_size, RESULT_CACHE_TTL, args.cache_db)
+    cascade = Cascade(args.cascade_min_hits or None, args.cascade_short_words) if args.cascade else None
+    scorer = make_scorer(args.model, cache, cascade)
+    scorer([("warm up", True)])
+    metrics.reset()
+    if cascade:
+        cascade.reset()
+
+    batcher = MicroBatcher(
+        scorer,
+        max_batch=1 if args.no_batching else args.max_batch,
+        max_wait=0 if args.no_batching else args.max_wait_ms / 1000,
+        max_queue=args.queue_size,
+        executor=executor,
+    )
+    batcher.start()
+    service = ScoringService(batcher, cache, cascade)
+
+    server = await asyncio.start_server(service.handle, args.host, args.port)
+    print(f"Serving on http://{args.host}:{args.port}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+        executor.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP scoring service for ToxiGuard")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--model", default=worker_model_path())
+    parser.add_argument("--max-batch", type=int, default=64, help="max requests per micro-batch")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="max time a request waits for its batch")
+    parser.add_argument("--queue-size", type=int, default=1024, help="pending requests before answering 429")
+    parser.add_argument("--no-batching", action="store_true", help="score every request on its own")
+    parser.add_argument("--no-cache", action="store_true", help="disable the result cache")
+    parser.add_argument("--cache-size", type=int, default=RESULT_CACHE_SIZE)
+    parser.add_argument("--cache-db", default=RESULT_CACHE_DB, help="SQLite file shared between service processes")
+    parser.add_argument("--cascade", action="store_true",
+                        help="decide clear-cut messages from the lexicon, send only the rest to the model")
+    parser.add_argument("--cascade-min-hits", type=int, default=CASCADE_MIN_HITS,
+                        help="distinct lexicon terms that make a message abusive without the model (0 disables)")
+    parser.add_argument("--cascade-short-words", type=int, default=CASCADE_SHORT_WORDS,
+                        help="messages this short with no lexicon hit are clean without the model (0 disables)")
+    parser.add_argument("--trace-sample-rate", type=float, default=TRACE_SAMPLE_RATE,
+                        help="share of batches timed into /metrics (0 disables)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        set_sample_rate(args.trace_sample_rate)
+    except ValueError as exc:
+        parser.error(str(exc))
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
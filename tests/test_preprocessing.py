@@ -0,0 +1,47 @@
+"""Golden outputs that lock in train/serve parity of utils.preprocessing.
+
+    python -m pytest -q tests
+
+train_model.py cleans its data with preprocess_texts and every scorer calls
+preprocess, so both must keep producing the text the shipped model saw.
+"""
+import random
+
+import pandas as pd
+import pytest
+
+from benchmarks.bench_preprocessing import GOLDEN, legacy_clean_text, random_corpus
+from utils.preprocessing import clean_text, clean_texts, preprocess, preprocess_texts
+
+EXPECTED = {
+    "I HATE you!!!": "i hate you",
+    "what the f**k": "what the fuck",
+    "visit http://x.com/a?b=1 now": "visit now",
+    "@user hi #tag": "hi",
+    "you 1d10t": "you idiot",
+    "ümlaut café naïve": "mlaut caf na ve",
+    "go   to   hell": "go to hell",
+}
+
+
+@pytest.mark.parametrize("text", GOLDEN)
+def test_clean_text_matches_legacy(text):
+    assert clean_text(text) == legacy_clean_text(text)
+
+
+def test_clean_text_matches_legacy_on_random_corpus():
+    corpus = random_corpus(5000, random.Random(11))
+    assert [clean_text(t) for t in corpus] == [legacy_clean_text(t) for t in corpus]
+
+
+@pytest.mark.parametrize("text, expected", EXPECTED.items())
+def test_preprocess_golden(text, expected):
+    assert preprocess(text) == expected
+
+
+def test_batch_matches_single():
+    texts = GOLDEN + list(EXPECTED)
+    single = [preprocess(t) for t in texts]
+    assert list(preprocess_texts(texts)) == single
+    assert list(preprocess_texts(pd.Series(texts))) == single
+    assert list(clean_texts(texts)) == [clean_text(t) for t in texts]
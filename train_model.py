@@ -1,40 +1,206 @@
 # train_model.py
+#
+#   python train_model.py                                  # in-memory, data/sample_data.csv
+#   python train_model.py --stream logs.csv --workers 8    # out-of-core, any size
+#   python train_model.py --data chats.csv --language hi   # abuse_model.hi.joblib
+#
+# Streaming mode reads the CSV in chunks, cleans and hashes each chunk in a
+# worker process and fits an SGD logistic regression with partial_fit, so
+# memory stays flat however large the corpus is. Rows whose text hashes
+# into the holdout fraction form the validation stream.
+#
+# With --language only the rows identified as that language are used, and
+# the model is saved as abuse_model.<lang>.joblib, which language routing
+# then uses for those messages.
+import argparse
+import os
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
 from sklearn.pipeline import Pipeline
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 import joblib
-from utils.preprocessing import clean_text, normalize_censored
+from utils.abuse_words import get_lexicon
+from utils.compact_model import export_compact
+from utils.language import identifier
+from utils.preprocessing import normalize_censored_texts, preprocess_texts
+
+LABELS = {"non-abusive": 0, "abusive": 1, "0": 0, "1": 1}
+
+
+# ---------------- In-memory training ----------------
+def train_in_memory(path, output, language=None):
+    data = pd.read_csv(path)
+
+    if language:
+        seeds = get_lexicon().token_languages
+        normalized = normalize_censored_texts(data['text'].astype(str))
+        data = data[normalized.map(lambda t: identifier.identify(t, seeds)) == language]
+        print(f"{len(data):,} rows identified as '{language}'")
+
+    # Convert labels to 0 (non-abusive) and 1 (abusive)
+    data['label'] = data['label'].map({"non-abusive": 0, "abusive": 1})
+
+    # Clean the text
+    data['text'] = preprocess_texts(data['text'].astype(str))
+
+    X = data['text']
+    y = data['label']
+
+    # ---------------- Split data ----------------
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    # ---------------- Create pipeline ----------------
+    pipeline = Pipeline([
+        ('tfidf', TfidfVectorizer(max_features=5000)),
+        ('clf', LogisticRegression(max_iter=1000))
+    ])
+
+    # ---------------- Train model ----------------
+    pipeline.fit(X_train, y_train)
+
+    # ---------------- Evaluate ----------------
+    accuracy = pipeline.score(X_test, y_test)
+    print(f"Model accuracy: {accuracy*100:.2f}%")
+
+    # ---------------- Save model ----------------
+    joblib.dump(pipeline, output)
+    print(f"Model saved as '{output}'")
+
+    # Compact, memory-mapped copy for workers that should not load sklearn
+    compact = os.path.splitext(output)[0] + ".tgm"
+    export_compact(pipeline, compact)
+    print(f"Compact model saved as '{compact}'")
+
+
+# ---------------- Streaming training ----------------
+def make_vectorizer(n_features):
+    # Stateless, so every worker hashes with an identical copy
+    return HashingVectorizer(n_features=n_features, alternate_sign=False, norm="l2")
+
+
+def in_holdout(texts, holdout):
+    """Split by a hash of the text so duplicates never straddle train and validation."""
+    cutoff = int(holdout * 1000)
+    return np.fromiter(
+        (zlib.crc32(t.encode("utf-8", "surrogatepass")) % 1000 < cutoff for t in texts),
+        dtype=bool, count=len(texts),
+    )
+
+
+def prepare_chunk(texts, labels, n_features, holdout):
+    """Worker: clean, hash and split one chunk."""
+    cleaned = preprocess_texts(texts)
+    X = make_vectorizer(n_features).transform(cleaned)
+    try:
+        y = np.array([LABELS[label] for label in labels], dtype=np.int8)
+    except KeyError as e:
+        raise ValueError(f"unknown label {e.args[0]!r}, expected one of {sorted(LABELS)}") from None
+    return X, y, in_holdout(texts, holdout)
+
+
+def iter_prepared(args, pool):
+    """Prepared chunks in file order, with at most workers * 2 in flight."""
+    reader = pd.read_csv(args.stream, usecols=[args.text_column, args.label_column],
+                         chunksize=args.chunk_size, dtype={args.label_column: str})
+    pending = deque()
+    for chunk in reader:
+        chunk = chunk.dropna(subset=[args.label_column])
+        texts = chunk[args.text_column].fillna("").astype(str).tolist()
+        labels = chunk[args.label_column].str.strip().str.lower().tolist()
+        pending.append(pool.submit(prepare_chunk, texts, labels, args.n_features, args.holdout))
+        if len(pending) >= args.workers * 2:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def peak_rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def reset_peak_rss():
+    # Linux: writing 5 to clear_refs resets VmHWM, giving a per-epoch peak
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
 
-# ---------------- Load dataset ----------------
-data = pd.read_csv("data/sample_data.csv")  # updated path
+def train_streaming(args):
+    clf = SGDClassifier(loss="log_loss", alpha=args.alpha, random_state=42)
+    classes = np.array([0, 1])
 
-# Convert labels to 0 (non-abusive) and 1 (abusive)
-data['label'] = data['label'].map({"non-abusive": 0, "abusive": 1})
+    with ProcessPoolExecutor(args.workers) as pool:
+        for epoch in range(1, args.epochs + 1):
+            reset_peak_rss()
+            start = time.perf_counter()
+            rows = val_rows = correct = 0
+            val_loss = 0.0
+            for X, y, holdout in iter_prepared(args, pool):
+                rows += len(y)
+                train = ~holdout
+                if train.any():
+                    clf.partial_fit(X[train], y[train], classes=classes)
+                if holdout.any() and hasattr(clf, "coef_"):
+                    # Validation stream: scored with the model as it stands
+                    p = np.clip(clf.predict_proba(X[holdout])[:, 1], 1e-15, 1 - 1e-15)
+                    yv = y[holdout]
+                    val_loss -= np.sum(yv * np.log(p) + (1 - yv) * np.log(1 - p))
+                    correct += int(np.sum((p >= 0.5) == yv))
+                    val_rows += len(yv)
 
-# Clean the text
-data['text'] = data['text'].apply(lambda x: clean_text(normalize_censored(str(x))))
+            elapsed = time.perf_counter() - start
+            val = (f"val loss {val_loss / val_rows:.4f}  val acc {correct / val_rows:.2%} ({val_rows:,} rows)"
+                   if val_rows else "no validation rows")
+            print(f"epoch {epoch}: {rows:,} rows  {rows / max(elapsed, 1e-9):,.0f} rows/s  "
+                  f"peak RSS {peak_rss_mb():.0f} MB  {val}", flush=True)
 
-X = data['text']
-y = data['label']
+    pipeline = Pipeline([
+        ("hashing", make_vectorizer(args.n_features)),
+        ("clf", clf),
+    ])
+    joblib.dump(pipeline, args.output)
+    print(f"Model saved as '{args.output}'")
 
-# ---------------- Split data ----------------
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-# ---------------- Create pipeline ----------------
-pipeline = Pipeline([
-    ('tfidf', TfidfVectorizer(max_features=5000)),
-    ('clf', LogisticRegression(max_iter=1000))
-])
+def main():
+    parser = argparse.ArgumentParser(description="Train the abuse detection model")
+    parser.add_argument("--data", default="data/sample_data.csv", help="CSV for in-memory training")
+    parser.add_argument("-o", "--output", default="abuse_model.joblib")
+    parser.add_argument("--stream", metavar="CSV", help="train out-of-core on this CSV instead")
+    parser.add_argument("--text-column", default="text")
+    parser.add_argument("--label-column", default="label")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="rows per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--holdout", type=float, default=0.1, help="fraction of rows held out for validation")
+    parser.add_argument("--n-features", type=int, default=2 ** 20, help="hashing vectorizer width")
+    parser.add_argument("--alpha", type=float, default=1e-6, help="SGD regularization strength")
+    parser.add_argument("--language", choices=identifier.languages,
+                        help="train only on rows in this language (in-memory training)")
+    args = parser.parse_args()
 
-# ---------------- Train model ----------------
-pipeline.fit(X_train, y_train)
+    if args.stream:
+        if args.language:
+            parser.error("--language is only supported for in-memory training")
+        train_streaming(args)
+    else:
+        if args.language and args.output == parser.get_default("output"):
+            args.output = f"abuse_model.{args.language}.joblib"
+        train_in_memory(args.data, args.output, args.language)
 
-# ---------------- Evaluate ----------------
-accuracy = pipeline.score(X_test, y_test)
-print(f"Model accuracy: {accuracy*100:.2f}%")
 
-# ---------------- Save model ----------------
-joblib.dump(pipeline, "abuse_model.joblib")
-print("Model saved as 'abuse_model.joblib'")
+if __name__ == "__main__":
+    main()
@@ -1,107 +1,105 @@
 # abuse_words.py
-import re
-
-abusive_words = {
-
-    # ---------- ENGLISH: STRONG PROFANITY ----------
-    "fuck","fucking","fucked","fucker","motherfucker","mf",
-    "shit","bullshit","crap","asshole","ass","bitch",
-    "bastard","cunt","slut","whore","dick","dickhead",
-    "prick","pussy","scumbag", "toxic",
-
-    # ---------- ENGLISH: OBFUSCATED ----------
-    "f*ck","f**k","fuk","fuking","fuked","fuker",
-    "sh*t","bullsh*t","a**hole","a$$hole","b!tch",
-
-    # ---------- ENGLISH: INSULTS ----------
-    "idiot","stupid","dumb","moron","fool","foolish",
-    "loser","worthless","pathetic","ugly","jerk","trash",
-    "garbage","nonsense","cringe","lame","weirdo","creep",
-    "psycho","maniac","nutcase","degenerate", "bully", 
-
-    # ---------- ENGLISH: TOXIC / THREATS ----------
-    "hate","kill","murder","die","go die","drop dead",
-    "go to hell","burn in hell","suck","you suck",
-    "shut up","get lost","nobody cares","who asked",
-
-    # ---------- ENGLISH: NEGATIVE BEHAVIOR ----------
-    "annoying","irritating","frustrating","frustrated",
-    "rude","mean","cruel","vile","nasty","disgusting",
-    "horrible","terrible","awful","disrespectful",
-
-    # ---------- ENGLISH: PERSONAL ATTACK ----------
-    "sissy","wimp","geek","nerd","pig","dog","rat",
-
-    # ---------- HINDI / HINGLISH: STRONG ----------
-    "madarchod","behenchod","bhenchod","bhosdike",
-    "chutiya","chutiye","gandu","gaandu","lund",
-    "lodu","lawde","lavde","randi","kamina",
-    "kaminey","harami","haramkhor","bhadwe",
-    "chodu","kutti","kutte",
-
-    # ---------- HINDI: OBFUSCATED ----------
-    "m*darchod","behen***d","b***dike","ch*tiya",
-    "g*ndu","l*nd","l*d*u","bkl","bc",
-
-    # ---------- HINDI: INSULTS ----------
-    "pagal","bewakoof","nikamma","nalayak","bakwas",
-    "bakwaas","ghatiya","gadha","ullu","bhikari",
-    "tatti","andhbhakt","sala","saala","saali",
-    "idiot","stupid","dumb","hate","kill","loser",
-    "pathetic","ugly","shit", "murder",
-    "fool","trash","nonsense","moron","jerk","worthless",
-    "suck","sh*t","bastard","crap","damn","hell",
-    "foolish","f**k","go to hell","bitch","asshole",
-    "a**hole","fuck","fucking","fucked","fucker","fucks",
-    "fuk","fuking","fuked","fuker","motherf**ker","ass",
-    "piss","wtf","chodu","madarchod","randi","behenchod",
-    "lund","gandu","bhosdike","bhadwe","sala","chutiya","pagal",
-    "bewakoof)","harami", "kaminey", "kutte", "lodu",
-    "bullshit", "bullsh*t", "andhbhakt", "tatti", "bakwas", 
-    "bkl", "bc", "lawde", "frustrated", "frustrating", "irritating",
-    "annoying", "disrespectful", "rude", "mean", "cruel", 
-    "vile", "horrible", "terrible", "awful", "nasty",
-    "disgusting", "pathetic", "sissy", "wimp", "loser", "geek", 
-    "nerd", "motherfucker", "sale", "dalle"
-}
-
-# Normalize all words
-abusive_words = set(word.lower() for word in abusive_words)
-
-# SUGGESTED REPLACEMENTS
-
-suggestions = {
-    "idiot": "Try saying 'misinformed' or 'confused'.",
-    "stupid": "Use 'unwise' or 'not a good idea'.",
-    "dumb": "Try 'not well thought out'.",
-    "loser": "Say 'unlucky' or 'didn’t succeed this time'.",
-    "pathetic": "You could say 'disappointing'.",
-    "hate": "Replace with 'dislike' or 'prefer not to'.",
-    "kill": "Say 'stop' or 'end' instead.",
-    "shit": "Use 'problem' or 'mess'.",
-    "fuck": "Avoid profanity; explain calmly.",
-    "bitch": "Try 'rude behavior' instead.",
-    "asshole": "Describe the action, not the person.",
-    "chutiya": "Avoid insults; express disagreement politely.",
-    "gandu": "Avoid slang; state your concern respectfully.",
-    "harami": "Say 'unethical' or 'wrong behavior'.",
-    "pagal": "Use 'confused' or 'acting oddly'.",
-    "bewakoof": "Say 'mistaken' or 'incorrect'.",
-    "madarchod": "Avoid abusive language; stay respectful.",
-    "behenchod": "Avoid slurs; express frustration calmly."
-}
-
-
-def detect_abusive_tokens(text: str):
+import os
+import threading
+import time
+import warnings
+
+from .lexicon import Lexicon, LexiconMatcher  # noqa: F401  (LexiconMatcher is re-exported)
+from .settings import LEXICON_INDEX_PATH, LEXICON_PATH, LEXICON_RELOAD_INTERVAL, LEXICON_SUGGESTIONS_PATH
+
+# The lexicon lives in data/lexicon/ (lexicon.tsv, suggestions.tsv) and is
+# compiled into lexicon.idx by build_lexicon.py.
+
+
+# ---------------- Loading & Hot Reload ----------------
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _stamp():
+    return tuple(_mtime(p) for p in (LEXICON_INDEX_PATH, LEXICON_PATH, LEXICON_SUGGESTIONS_PATH))
+
+
+def load_lexicon():
+    """The compiled index when it is at least as new as the sources, else the sources themselves."""
+    index, *sources = _stamp()
+    if index is not None and all(s is None or index >= s for s in sources):
+        try:
+            return Lexicon.load(LEXICON_INDEX_PATH)
+        except ValueError as exc:
+            # e.g. written by an older build_lexicon.py; the sources still work
+            warnings.warn(f"{exc}; reading the lexicon sources instead", RuntimeWarning)
+    return Lexicon.from_sources(LEXICON_PATH, LEXICON_SUGGESTIONS_PATH)
+
+
+_lock = threading.Lock()
+_active = None
+_active_stamp = None
+_next_check = 0.0
+
+
+def reload(force=False):
     """
-    Detect abusive words & phrases (normal + obfuscated + Hinglish)
+    Load the lexicon again if its files changed (or `force`). The new
+    lexicon is built completely before it replaces the active one, so
+    callers see either the old or the new version, never a mix. A lexicon
+    that fails to load is reported and the active one is kept.
+    Returns True when the lexicon was replaced.
+    """
+    global _active, _active_stamp, _next_check
+    with _lock:
+        _next_check = time.monotonic() + LEXICON_RELOAD_INTERVAL
+        stamp = _stamp()
+        if _active is not None and stamp == _active_stamp and not force:
+            return False
+        try:
+            lexicon = load_lexicon()
+        except (OSError, ValueError, UnicodeDecodeError) as exc:
+            if _active is None:
+                raise
+            warnings.warn(f"keeping lexicon {_active.release}: {exc}", RuntimeWarning)
+            _active_stamp = stamp   # retried when the files change again
+            return False
+        _active, _active_stamp = lexicon, stamp
+        return True
+
+
+def get_lexicon():
+    """The active lexicon; its files are checked for changes at most every LEXICON_RELOAD_INTERVAL seconds."""
+    if _active is None or (LEXICON_RELOAD_INTERVAL and time.monotonic() >= _next_check):
+        reload()
+    return _active
+
+
+def __getattr__(name):
+    # Earlier module-level names; each read returns the active lexicon's
+    if name == "abusive_words":
+        return get_lexicon().terms
+    if name == "suggestions":
+        return get_lexicon().suggestions
+    if name == "abusive_matcher":
+        return get_lexicon().matcher
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# ---------------- Detection ----------------
+
+def find_abusive_spans(text: str, word_boundary: bool = True):
     """
-    text_lower = text.lower()
-    found = set()
+    Locate abusive words & phrases as (start, end, term) spans
+    """
+    return get_lexicon().matcher.find_all(text, word_boundary)
 
-    for word in abusive_words:
-        pattern = re.escape(word)
-        if re.search(pattern, text_lower):
-            found.add(word)
 
-    return sorted(found)
+def detect_abusive_tokens(text: str, word_boundary: bool = True):
+    """
+    Detect abusive words & phrases (normal + obfuscated + Hinglish)
+
+    `word_boundary=False` keeps the original substring semantics, where
+    every lexicon entry found anywhere in the text counts as a hit.
+    """
+    return sorted(get_lexicon().matcher.find_terms(text, word_boundary))
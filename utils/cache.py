@@ -0,0 +1,127 @@
+# cache.py
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    Bounded LRU of analysis results with a TTL, optionally backed by a
+    SQLite file that several worker processes can share.
+
+    Keys are built by `make_key` from the normalized text and a version
+    string; when the version changes (new model or lexicon) the in-memory
+    tier is dropped and old SQLite rows simply stop matching.
+    """
+
+    def __init__(self, max_size=50000, ttl=3600, db_path=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version = None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._puts = 0
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        self.db_hits = self.invalidations = 0
+        if db_path:
+            self._db = sqlite3.connect(db_path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+
+    # ---------------- Keys ----------------
+    def set_version(self, version):
+        if version != self.version:
+            with self._lock:
+                if self.version is not None:
+                    self.invalidations += 1
+                self._data.clear()
+                self.version = version
+
+    def make_key(self, text):
+        data = f"{self.version}\0{text}".encode("utf-8", "surrogatepass")
+        return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+    # ---------------- Lookup ----------------
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.expirations += 1
+
+        if self._db is not None:
+            # One connection shared by every thread: all access under the lock
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT value, expires FROM results WHERE key = ? AND expires > ?",
+                    (key, time.time()),
+                ).fetchone()
+            if row is not None:
+                value = json.loads(row[0])
+                self._store(key, value, now + min(self.ttl, row[1] - time.time()))
+                with self._lock:
+                    self.hits += 1
+                    self.db_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self._store(key, value, time.monotonic() + self.ttl)
+        if self._db is not None:
+            row = json.dumps(value)
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, expires) VALUES (?, ?, ?)",
+                    (key, row, time.time() + self.ttl),
+                )
+                self._puts += 1
+                if self._puts % 1000 == 0:
+                    self._db.execute("DELETE FROM results WHERE expires <= ?", (time.time(),))
+
+    def _store(self, key, value, expires):
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    # ---------------- Stats ----------------
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "db_hits": self.db_hits,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,139 @@
+# cascade.py
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from . import abuse_words
+from .preprocessing import clean_text, normalize_censored
+from .scoring import _abusive_column, _predict_routed, identify_language, load_pipeline, toxicity_levels
+from .sentiment_analysis import polarities
+from .settings import CASCADE_MIN_HITS, CASCADE_SHORT_WORDS
+from .tracing import span, trace
+
+TIERS = ("lexicon", "model")
+
+
+class Cascade:
+    """
+    Score messages cheapest tier first.
+
+      lexicon  `min_hits` or more distinct lexicon terms -> abusive (prob 1.0,
+               High); no hit and at most `short_words` words -> clean
+               (prob 0.0, Low)
+      model    everything else: TF-IDF + classifier, as in analyze_texts
+
+    `min_hits=None` and `short_words=0` switch the two shortcuts off, so
+    every message reaches the model. Sentiment is only computed when asked
+    for. Counters behind `stats()` are shared by all callers of one instance.
+    """
+
+    def __init__(self, min_hits=CASCADE_MIN_HITS, short_words=CASCADE_SHORT_WORDS):
+        self.min_hits = min_hits
+        self.short_words = short_words
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts = dict.fromkeys(TIERS, 0)
+            self.model_seconds = 0.0   # wall time of model-tier calls
+            self.sentiment_skipped = 0
+
+    # ---------------- Scoring ----------------
+    def score(self, texts, pipeline=None, sentiment=False):
+        """
+        DataFrame with the columns of analyze_texts plus `tier`. `sentiment`
+        is a bool or one bool per text; `polarity` is None where it is False.
+        """
+        if pipeline is None:
+            pipeline = load_pipeline()
+        with trace("cascade"):
+            with span("normalize"):
+                normalized = [normalize_censored(str(t)) for t in texts]
+            n = len(normalized)
+            lexicon = abuse_words.get_lexicon()
+            with span("language"):
+                language = [identify_language(t, lexicon) for t in normalized]
+            with span("lexicon"):
+                abusive_count = np.fromiter(
+                    (len(lexicon.matcher_for(lang).find_terms(t)) for lang, t in zip(language, normalized)), np.int32, n
+                )
+                words = np.fromiter((len(t.split()) for t in normalized), np.int32, n)
+
+            abusive = abusive_count >= self.min_hits if self.min_hits else np.zeros(n, dtype=bool)
+            clean = (abusive_count == 0) & (words <= self.short_words)
+            todo = np.flatnonzero(~(abusive | clean))
+
+            classes = pipeline.classes_
+            column = _abusive_column(pipeline)
+            prob = np.where(abusive, 1.0, 0.0)
+            label = np.where(abusive, classes[column], classes[1 - column]).astype(classes.dtype)
+            if len(todo):
+                start = time.perf_counter()
+                prob[todo], label[todo] = _predict_routed(
+                    pipeline, [clean_text(normalized[i]) for i in todo], [language[i] for i in todo]
+                )
+                model_seconds = time.perf_counter() - start
+            else:
+                model_seconds = 0.0
+
+            wanted = np.flatnonzero(np.broadcast_to(np.asarray(sentiment, dtype=bool), n))
+            polarity = np.full(n, None, dtype=object)
+            if len(wanted):
+                with span("sentiment"):
+                    polarity[wanted] = polarities([normalized[i] for i in wanted])
+                if len(wanted) == n:
+                    polarity = polarity.astype(np.float64)
+
+        tier = np.full(n, "lexicon", dtype=object)
+        tier[todo] = "model"
+        with self._lock:
+            self.counts["lexicon"] += n - len(todo)
+            self.counts["model"] += len(todo)
+            self.model_seconds += model_seconds
+            self.sentiment_skipped += n - len(wanted)
+
+        return pd.DataFrame({
+            "prob": prob,
+            "label": label,
+            "abusive_count": abusive_count,
+            "polarity": polarity,
+            "severity": toxicity_levels(prob, abusive_count),
+            "language": language,
+            "tier": tier,
+        })
+
+    # ---------------- Metrics ----------------
+    def stats(self):
+        """Per-tier counts and fractions, and the model time the lexicon tier saved."""
+        with self._lock:
+            counts = dict(self.counts)
+            model_seconds = self.model_seconds
+            sentiment_skipped = self.sentiment_skipped
+        total = sum(counts.values())
+        per_message = model_seconds / counts["model"] if counts["model"] else 0.0
+        return {
+            "messages": total,
+            "tiers": {t: {"count": c, "fraction": c / total if total else 0.0} for t, c in counts.items()},
+            "model_ms_per_message": per_message * 1e3,
+            # Estimate: what the shortcut messages would have cost in the model tier
+            "saved_s": counts["lexicon"] * per_message,
+            "sentiment_skipped": sentiment_skipped,
+        }
+
+    def prometheus(self):
+        s = self.stats()
+        lines = [
+            "# HELP toxiguard_cascade_messages_total Messages decided per cascade tier.",
+            "# TYPE toxiguard_cascade_messages_total counter",
+            *(f'toxiguard_cascade_messages_total{{tier="{t}"}} {v["count"]}' for t, v in s["tiers"].items()),
+            "# HELP toxiguard_cascade_saved_seconds Estimated model time skipped by the lexicon tier.",
+            "# TYPE toxiguard_cascade_saved_seconds gauge",
+            f"toxiguard_cascade_saved_seconds {s['saved_s']!r}",
+            "# HELP toxiguard_cascade_sentiment_skipped_total Messages scored without sentiment.",
+            "# TYPE toxiguard_cascade_sentiment_skipped_total counter",
+            f"toxiguard_cascade_sentiment_skipped_total {s['sentiment_skipped']}",
+        ]
+        return "\n".join(lines) + "\n"
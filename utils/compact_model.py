@@ -0,0 +1,157 @@
+# compact_model.py
+import mmap
+import re
+import struct
+
+import numpy as np
+
+# File layout, every section 8-byte aligned:
+#   header | token pattern (utf-8) | vocabulary (sorted, fixed-width UTF-32)
+#   | idf (float32) | coef (float32)
+MAGIC = b"TXGM"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHHIIIdqq")   # magic, version, flags, terms, width, pattern bytes, intercept, classes
+
+_LOWERCASE, _BINARY, _SUBLINEAR_TF, _USE_IDF, _L2 = (1 << i for i in range(5))
+
+
+def _aligned(n):
+    return (n + 7) & ~7
+
+
+# ---------------- Export ----------------
+def export_compact(pipeline, path):
+    """
+    Write a TfidfVectorizer + binary logistic model (LogisticRegression or
+    log-loss SGDClassifier) pipeline as a compact, memory-mappable artifact.
+    """
+    (_, tfidf), (_, clf) = pipeline.steps
+    unsupported = {
+        "analyzer": tfidf.analyzer != "word",
+        "ngram_range": tuple(tfidf.ngram_range) != (1, 1),
+        "preprocessor": tfidf.preprocessor is not None,
+        "tokenizer": tfidf.tokenizer is not None,
+        "strip_accents": tfidf.strip_accents is not None,
+        "norm": tfidf.norm not in ("l2", None),
+        "classes": len(clf.classes_) != 2,
+        # predict_proba must be sigmoid(coef . x + intercept)
+        "classifier": not (
+            type(clf).__name__ == "LogisticRegression"
+            or (type(clf).__name__ == "SGDClassifier" and clf.loss == "log_loss")
+        ),
+    }
+    bad = [name for name, flag in unsupported.items() if flag]
+    if bad:
+        raise ValueError(f"cannot export pipeline with custom {', '.join(bad)}")
+
+    terms = sorted(tfidf.vocabulary_, key=tfidf.vocabulary_.get)
+    order = np.argsort(np.array(terms))
+    vocab = np.array(terms)[order]
+    idf = (tfidf.idf_ if tfidf.use_idf else np.ones(len(terms)))[order].astype(np.float32)
+    coef = clf.coef_[0][order].astype(np.float32)
+    pattern = tfidf.token_pattern.encode("utf-8")
+
+    flags = (
+        (_LOWERCASE if tfidf.lowercase else 0)
+        | (_BINARY if tfidf.binary else 0)
+        | (_SUBLINEAR_TF if tfidf.sublinear_tf else 0)
+        | (_USE_IDF if tfidf.use_idf else 0)
+        | (_L2 if tfidf.norm == "l2" else 0)
+    )
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, flags, len(vocab), vocab.dtype.itemsize // 4, len(pattern),
+        float(clf.intercept_[0]), *(int(c) for c in clf.classes_),
+    )
+    with open(path, "wb") as f:
+        for section in (header, pattern, vocab.tobytes(), idf.tobytes(), coef.tobytes()):
+            f.write(section)
+            f.write(b"\0" * (_aligned(len(section)) - len(section)))
+
+
+# ---------------- Inference ----------------
+class CompactModel:
+    """
+    Memory-mapped model with a pure-NumPy `predict_proba` that reproduces
+    the exported TfidfVectorizer + LogisticRegression. The arrays are views
+    of the mapping, so every process that loads the file shares its pages.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = self._mmap
+        magic, version, flags, n_terms, width, pattern_len, intercept, *classes = _HEADER.unpack_from(buf)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compact model file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported format version {version}")
+
+        offset = _aligned(_HEADER.size)
+        pattern = bytes(buf[offset:offset + pattern_len]).decode("utf-8")
+        offset += _aligned(pattern_len)
+        self.vocabulary = np.frombuffer(buf, dtype=f"<U{max(width, 1)}", count=n_terms, offset=offset)
+        offset += _aligned(n_terms * width * 4)
+        self.idf = np.frombuffer(buf, dtype=np.float32, count=n_terms, offset=offset)
+        offset += _aligned(n_terms * 4)
+        self.coef = np.frombuffer(buf, dtype=np.float32, count=n_terms, offset=offset)
+
+        self.intercept = intercept
+        self.classes_ = np.array(classes)
+        self.lowercase = bool(flags & _LOWERCASE)
+        self.binary = bool(flags & _BINARY)
+        self.sublinear_tf = bool(flags & _SUBLINEAR_TF)
+        self.l2 = bool(flags & _L2)
+        self.token_pattern = re.compile(pattern)
+        self.model_version = None
+
+    def __len__(self):
+        return len(self.vocabulary)
+
+    def decision_function(self, texts):
+        findall = self.token_pattern.findall
+        if self.lowercase:
+            tokens = [findall(t.lower()) for t in texts]
+        else:
+            tokens = [findall(t) for t in texts]
+        counts = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+        scores = np.full(len(texts), self.intercept)
+        flat = [tok for toks in tokens for tok in toks]
+        if not flat or not len(self.vocabulary):
+            return scores
+
+        # Vocabulary lookup: binary search in the sorted string table, once
+        # per distinct token of the batch
+        distinct = {}
+        token_ids = np.fromiter((distinct.setdefault(t, len(distinct)) for t in flat),
+                                dtype=np.int64, count=len(flat))
+        words = np.array(list(distinct))
+        idx = np.searchsorted(self.vocabulary, words)
+        idx[idx == len(self.vocabulary)] = 0
+        idx[self.vocabulary[idx] != words] = -1
+        idx = idx[token_ids]
+        hit = idx >= 0
+        doc = np.repeat(np.arange(len(texts)), counts)[hit]
+        feature = idx[hit]
+
+        # Term counts per (text, feature), then tf-idf, norm and dot product
+        pairs, tf = np.unique(doc * len(self.vocabulary) + feature, return_counts=True)
+        doc, feature = np.divmod(pairs, len(self.vocabulary))
+        tf = tf.astype(np.float64)
+        if self.binary:
+            tf[:] = 1.0
+        elif self.sublinear_tf:
+            tf = np.log(tf) + 1.0
+        weight = tf * self.idf[feature]
+        # bincount returns int64 when nothing was weighted (no known token)
+        dot = np.bincount(doc, weights=weight * self.coef[feature], minlength=len(texts)).astype(np.float64)
+        if self.l2:
+            norm = np.sqrt(np.bincount(doc, weights=weight * weight, minlength=len(texts)))
+            np.divide(dot, norm, out=dot, where=norm > 0)
+        return scores + dot
+
+    def predict_proba(self, texts):
+        p = 1.0 / (1.0 + np.exp(-self.decision_function(texts)))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, texts):
+        return self.classes_[(self.decision_function(texts) > 0).astype(int)]
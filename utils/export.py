@@ -0,0 +1,176 @@
+# export.py
+import gzip
+import os
+
+import numpy as np
+import pandas as pd
+
+from .scoring import iter_analyze_texts
+from .settings import EXPORT_CHUNK_ROWS, EXPORT_GZIP_LEVEL
+
+# Written in this order with these types; `text` only when asked for.
+# Parquet stores terms and offsets as lists (terms[i] is at offsets[i]);
+# CSV joins terms with "|" and offsets as "start:end" with ";".
+EXPORT_COLUMNS = ("id", "text", "prob", "label", "severity", "language", "terms", "offsets")
+FORMATS = ("csv", "csv.gz", "parquet")
+
+
+def export_format(path):
+    """The export format implied by a file name."""
+    for fmt in sorted(FORMATS, key=len, reverse=True):
+        if path.endswith("." + fmt):
+            return fmt
+    raise ValueError(f"{path}: expected one of {', '.join('.' + f for f in FORMATS)}")
+
+
+def arrow_schema(id_type="int64", text=False):
+    import pyarrow as pa
+
+    offsets = pa.list_(pa.struct([("start", pa.int32()), ("end", pa.int32())]))
+    types = {
+        "id": pa.int64() if id_type == "int64" else pa.string(),
+        "text": pa.string(),
+        "prob": pa.float64(),
+        "label": pa.int8(),
+        "severity": pa.dictionary(pa.int8(), pa.string()),
+        "language": pa.dictionary(pa.int8(), pa.string()),
+        "terms": pa.list_(pa.string()),
+        "offsets": offsets,
+    }
+    return pa.schema([(name, types[name]) for name in EXPORT_COLUMNS if text or name != "text"])
+
+
+def export_frame(scores, ids, texts=None):
+    """
+    Export rows from a scored batch (iter_analyze_texts(..., spans=True))
+    and the ids (and texts) of its rows.
+    """
+    frame = {"id": ids}
+    if texts is not None:
+        frame["text"] = texts
+    spans = scores["spans"]
+    frame.update(
+        prob=scores["prob"].to_numpy(),
+        label=scores["label"].to_numpy().astype(np.int8),
+        severity=scores["severity"].to_numpy(),
+        language=scores["language"].to_numpy(),
+        terms=[[term for _, _, term in s] for s in spans],
+        offsets=[[{"start": start, "end": end} for start, end, _ in s] for s in spans],
+    )
+    return pd.DataFrame(frame)
+
+
+# ---------------- Writers ----------------
+
+class CsvExporter:
+    """CSV, written chunk by chunk; gzip-compressed with `compression="gzip"`."""
+
+    def __init__(self, file, schema, compression=None, level=EXPORT_GZIP_LEVEL):
+        import pyarrow as pa
+        import pyarrow.csv as pcsv
+
+        # Lists become strings; dictionary columns are written as their values
+        self.schema = pa.schema([
+            (f.name, pa.string() if pa.types.is_list(f.type) else
+             f.type.value_type if pa.types.is_dictionary(f.type) else f.type)
+            for f in schema
+        ])
+        self._own = isinstance(file, (str, os.PathLike))
+        self._raw = open(file, "wb") if self._own else file
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=level) if compression == "gzip" else None
+        self._writer = pcsv.CSVWriter(self._gzip or self._raw, self.schema)
+
+    def write(self, frame):
+        import pyarrow as pa
+
+        frame = frame.assign(
+            terms=["|".join(t) for t in frame["terms"]],
+            offsets=[";".join(f"{o['start']}:{o['end']}" for o in offs) for offs in frame["offsets"]],
+        )
+        self._writer.write_table(pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        self._writer.close()
+        if self._gzip is not None:
+            self._gzip.close()
+        if self._own:
+            self._raw.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ParquetExporter:
+    """One Parquet file, one row group per chunk, with a fixed schema."""
+
+    def __init__(self, file, schema, compression="zstd"):
+        import pyarrow.parquet as pq
+
+        self.schema = schema
+        self._writer = pq.ParquetWriter(file, schema, compression=compression)
+
+    def write(self, frame):
+        import pyarrow as pa
+
+        self._writer.write_table(pa.Table.from_pandas(frame, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_exporter(file, fmt, id_type="int64", text=False):
+    """A CsvExporter or ParquetExporter for `fmt` (see FORMATS) writing to a path or binary file."""
+    schema = arrow_schema(id_type, text)
+    if fmt == "parquet":
+        return ParquetExporter(file, schema)
+    if fmt in ("csv", "csv.gz"):
+        return CsvExporter(file, schema, "gzip" if fmt == "csv.gz" else None)
+    raise ValueError(f"unknown export format {fmt!r}, expected one of {FORMATS}")
+
+
+# ---------------- Scoring + Export ----------------
+
+def export_results(texts, file, fmt=None, ids=None, pipeline=None, batch_size=1000,
+                   chunk_rows=EXPORT_CHUNK_ROWS, include_text=False, on_chunk=None):
+    """
+    Score the sequence `texts` and write the export rows to `file` (a path,
+    or a binary file with `fmt`) `chunk_rows` at a time, so memory does not
+    grow with the number of rows. `ids` default to row numbers.
+    `on_chunk(scores, rows_done)` sees every scored chunk (columns of
+    iter_analyze_texts). Returns the number of rows written.
+    """
+    fmt = fmt or export_format(os.fspath(file))
+    ids = np.arange(len(texts)) if ids is None else np.asarray(ids)
+    id_type = "int64" if ids.dtype.kind in "iu" else "string"
+    done = 0
+    with open_exporter(file, fmt, id_type, include_text) as exporter:
+        def flush(frames):
+            nonlocal done
+            scores = pd.concat(frames, ignore_index=True)
+            n = len(scores)
+            chunk_ids = ids[done:done + n] if id_type == "int64" else [str(i) for i in ids[done:done + n]]
+            chunk_texts = [str(t) for t in texts[done:done + n]] if include_text else None
+            exporter.write(export_frame(scores, chunk_ids, chunk_texts))
+            done += n
+            if on_chunk is not None:
+                on_chunk(scores, done)
+
+        frames, rows = [], 0
+        for scores in iter_analyze_texts(texts, pipeline, batch_size, spans=True):
+            frames.append(scores)
+            rows += len(scores)
+            if rows >= chunk_rows:
+                flush(frames)
+                frames, rows = [], 0
+        if frames:
+            flush(frames)
+    return done
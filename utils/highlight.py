@@ -1,13 +1,59 @@
-import re
-from .abuse_words import abusive_words
-
-def highlight_abusive(text: str):
-    abusive_tokens = [w for w in re.findall(r'\b\w+\b', text.lower()) if w in abusive_words]
-    highlighted_text = text
-    for word in abusive_tokens:
-        highlighted_text = re.sub(
-            f"(?i){re.escape(word)}",
-            f"<span style='background-color:#ff5252;color:white;padding:2px 4px;border-radius:4px;'>{word}</span>",
-            highlighted_text
-        )
-    return highlighted_text, abusive_tokens
+from html import escape
+
+from .abuse_words import get_lexicon
+from .obfuscation import original_spans
+from .preprocessing import normalize_censored
+from .scoring import identify_language
+
+DEFAULT_STYLE = "background-color:#ff5252;color:white;padding:2px 4px;border-radius:4px;"
+
+
+def merge_spans(spans):
+    """
+    Sort (start, end, term) spans and merge overlapping or nested ones into
+    (start, end, terms) so every character is wrapped at most once.
+    """
+    merged = []
+    for start, end, term in sorted(spans):
+        if merged and start < merged[-1][1]:
+            last = merged[-1]
+            last[1] = max(last[1], end)
+            last[2].append(term)
+        else:
+            merged.append([start, end, [term]])
+    return [(s, e, terms) for s, e, terms in merged]
+
+
+def highlight_spans(text: str, spans, css_class=None, style=None):
+    """
+    Build HTML for `text` with every span wrapped in a <span> tag, in one
+    left-to-right pass. All user text is HTML-escaped.
+    """
+    attrs = ""
+    if css_class:
+        attrs += f" class='{css_class}'"
+    if style:
+        attrs += f" style='{style}'"
+
+    out = []
+    pos = 0
+    for start, end, _ in merge_spans(spans):
+        out.append(escape(text[pos:start]))
+        out.append(f"<span{attrs}>{escape(text[start:end])}</span>")
+        pos = end
+    out.append(escape(text[pos:]))
+    return "".join(out)
+
+
+def highlight_abusive(text: str, css_class=None):
+    """
+    HTML for `text` with its lexicon hits wrapped, and the hit terms. Hits
+    are found the way scoring finds them (normalized text, the language's
+    lexicon partition) and mapped back onto `text`, so "1d10t" is marked.
+    """
+    normalized = normalize_censored(text)
+    lexicon = get_lexicon()
+    matcher = lexicon.matcher_for(identify_language(normalized, lexicon))
+    spans = original_spans(text, normalized, matcher.find_all(normalized))
+    abusive_tokens = [term for _, _, term in spans]
+    return highlight_spans(text, spans, css_class, None if css_class else DEFAULT_STYLE), abusive_tokens
@@ -1,7 +1,142 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import deque, namedtuple
+
 import streamlit as st
 
-def add_to_history(text: str):
-    if "history" not in st.session_state:
-        st.session_state.history = []
-    if text not in st.session_state.history:
-        st.session_state.history.append(text)
+from .settings import HISTORY_CAPACITY, HISTORY_DB, HISTORY_PREVIEW_CHARS
+
+# Compact record: a digest for dedup and a short preview instead of the
+# full text, which may be arbitrarily long.
+HistoryRecord = namedtuple("HistoryRecord", "digest timestamp preview toxicity severity")
+
+
+def text_digest(text: str):
+    return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=12).hexdigest()
+
+
+class HistoryDB:
+    """SQLite log of analyses with paginated reads and aggregate stats."""
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            "id INTEGER PRIMARY KEY, digest TEXT NOT NULL, timestamp REAL NOT NULL, "
+            "preview TEXT NOT NULL, toxicity REAL, severity TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS history_ts ON history (timestamp)")
+
+    def insert(self, record):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO history (digest, timestamp, preview, toxicity, severity) VALUES (?, ?, ?, ?, ?)",
+                record,
+            )
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def page(self, page=0, page_size=20):
+        """Newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT digest, timestamp, preview, toxicity, severity FROM history "
+                "ORDER BY id DESC LIMIT ? OFFSET ?",
+                (page_size, page * page_size),
+            ).fetchall()
+        return [HistoryRecord(*row) for row in rows]
+
+    def severity_counts(self, bucket="%Y-%m-%d"):
+        """{period: {severity: count}} computed in SQL, oldest period first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT strftime(?, timestamp, 'unixepoch') AS period, severity, COUNT(*) "
+                "FROM history GROUP BY period, severity ORDER BY period",
+                (bucket,),
+            ).fetchall()
+        counts = {}
+        for period, severity, n in rows:
+            counts.setdefault(period, {})[severity] = n
+        return counts
+
+
+class HistoryStore:
+    """
+    Fixed-capacity ring buffer of analyses. Dedup is O(1) through a set of
+    text digests; the oldest record (and its digest) drops out when full.
+    An optional HistoryDB receives every record for long-term browsing.
+    """
+
+    def __init__(self, capacity=HISTORY_CAPACITY, db=None, preview_chars=HISTORY_PREVIEW_CHARS):
+        self.capacity = capacity
+        self.preview_chars = preview_chars
+        self.db = db
+        self._records = deque()
+        self._digests = set()
+
+    def __len__(self):
+        return len(self._records)
+
+    def __contains__(self, text):
+        return text_digest(text) in self._digests
+
+    def add(self, text, toxicity=None, severity=None):
+        """Record an analysis; returns False if the text is already in the buffer."""
+        digest = text_digest(text)
+        if digest in self._digests:
+            return False
+        if len(self._records) >= self.capacity:
+            self._digests.discard(self._records.popleft().digest)
+
+        preview = text if len(text) <= self.preview_chars else text[:self.preview_chars - 1] + "…"
+        record = HistoryRecord(
+            digest, time.time(), preview,
+            None if toxicity is None else float(toxicity), severity,
+        )
+        self._records.append(record)
+        self._digests.add(digest)
+        if self.db is not None:
+            self.db.insert(record)
+        return True
+
+    def recent(self, n=15):
+        """Newest first."""
+        return [self._records[-i] for i in range(1, min(n, len(self._records)) + 1)]
+
+    def trim(self, keep):
+        """Drop all but the newest `keep` records; returns how many were dropped."""
+        dropped = max(len(self._records) - keep, 0)
+        for _ in range(dropped):
+            self._digests.discard(self._records.popleft().digest)
+        return dropped
+
+    def clear(self):
+        self._records.clear()
+        self._digests.clear()
+
+
+_history_db = None
+
+
+def get_history_db():
+    global _history_db
+    if _history_db is None and HISTORY_DB:
+        _history_db = HistoryDB(HISTORY_DB)
+    return _history_db
+
+
+def get_history():
+    """Per-session store kept in st.session_state."""
+    if "history" not in st.session_state or not isinstance(st.session_state.history, HistoryStore):
+        st.session_state.history = HistoryStore(db=get_history_db())
+    return st.session_state.history
+
+
+def add_to_history(text: str, toxicity=None, severity=None):
+    return get_history().add(text, toxicity, severity)
@@ -0,0 +1,85 @@
+# incremental.py
+import re
+from collections import OrderedDict
+
+import numpy as np
+
+from .scoring import load_pipeline, iter_analyze_texts, result_version, sentiment_label
+
+# A sentence runs up to terminal punctuation or a line break
+_SENTENCE = re.compile(r"[^.!?\n]+(?:[.!?]+|\n|$)")
+
+
+def split_sentences(text):
+    return [m.group().strip() for m in _SENTENCE.finditer(text) if m.group().strip()]
+
+
+class IncrementalAnalyzer:
+    """
+    Real-time analysis that only rescores sentences it has not seen yet.
+
+    Per-sentence results are kept in a bounded LRU; the document verdict is
+    merged from them: the most toxic sentence decides the probability and
+    label, polarity is the word-weighted mean, abusive tokens are the union.
+    """
+
+    def __init__(self, pipeline=None, max_sentences=5000):
+        self.pipeline = pipeline
+        self.max_sentences = max_sentences
+        self.version = None
+        self.rescored = 0
+        self._sentences = OrderedDict()
+
+    def _score(self, sentences, pipeline):
+        # One batch pass gives the model input and the (routed) lexicon hits too
+        scores = next(iter_analyze_texts(sentences, pipeline, batch_size=len(sentences),
+                                         spans=True, cleaned_text=True))
+        for sentence, cleaned, prob, label, polarity, spans in zip(
+            sentences, scores["cleaned"], scores["prob"], scores["label"], scores["polarity"], scores["spans"]
+        ):
+            self._sentences[sentence] = (
+                cleaned, len(cleaned.split()), prob, label, polarity,
+                {term for _, _, term in spans},
+            )
+
+    def trim(self, keep):
+        """Forget all but the `keep` most recently used sentences; returns how many were dropped."""
+        dropped = max(len(self._sentences) - keep, 0)
+        for _ in range(dropped):
+            self._sentences.popitem(last=False)
+        return dropped
+
+    def analyze(self, text):
+        """Same return shape as utils.scoring.analyze_text."""
+        pipeline = self.pipeline if self.pipeline is not None else load_pipeline()
+        version = result_version(pipeline)
+        if version != self.version:
+            self._sentences.clear()
+            self.version = version
+
+        sentences = split_sentences(text)
+        changed = list(dict.fromkeys(s for s in sentences if s not in self._sentences))
+        self.rescored = len(changed)
+        if changed:
+            self._score(changed, pipeline)
+
+        parts = [self._sentences[s] for s in sentences]
+        for s in sentences:
+            self._sentences.move_to_end(s)
+        # Evict only now: a text longer than max_sentences needs all of its own
+        while len(self._sentences) > self.max_sentences:
+            self._sentences.popitem(last=False)
+        if not parts:
+            return "", 0, 0.0, [], "Neutral", 0.0
+
+        cleaned = " ".join(p[0] for p in parts if p[0])
+        words = np.array([p[1] for p in parts], dtype=np.float64)
+        probs = np.array([p[2] for p in parts])
+        polarities = np.array([p[4] for p in parts])
+
+        top = int(probs.argmax())
+        prob = probs[top]
+        pred = parts[top][3]
+        polarity = float(np.average(polarities, weights=words)) if words.sum() else 0.0
+        tokens = sorted({t for p in parts for t in p[5]})
+        return cleaned, pred, prob, tokens, sentiment_label(polarity), polarity
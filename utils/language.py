@@ -0,0 +1,160 @@
+# language.py
+import hashlib
+import math
+import re
+from collections import Counter
+
+from .settings import LANGUAGE_WORDLISTS
+
+MIXED = "mixed"
+UNDETERMINED = "und"
+
+# URLs, @mentions and #hashtags (as in utils.preprocessing): their words
+# only vote as lexicon seeds
+_NOISE = re.compile(r"(http\S+|www\.\S+|[@#]\w+)")
+_STRETCH = re.compile(r"(\w)\1\1+")
+_SCRIPTS = {"hi": re.compile(r"[\u0900-\u097f]")}   # Devanagari
+_MEMO_SIZE = 100_000
+_UNSEEN = object()
+
+
+class _WordTable(dict):
+    """str.translate table: word characters stay, everything else becomes a space."""
+
+    def __missing__(self, code):
+        ch = chr(code)
+        value = code if ch.isalnum() or ch == "_" else 32
+        self[code] = value
+        return value
+
+
+_WORD_TABLE = _WordTable()
+
+
+def words(text):
+    """The words of a lowercased `text`, split where the lexicon matcher sees word boundaries."""
+    return text.translate(_WORD_TABLE).split()
+
+
+def read_words(paths):
+    words = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                word = line.split("\t", 1)[0].strip().lower()
+                if word and not word.startswith("#"):
+                    words.append(word)
+    return words
+
+
+def _trigrams(word):
+    padded = f"^{word}$"
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+class LanguageIdentifier:
+    """
+    Offline language identification for short chat messages.
+
+    Every word votes for a language: words from exactly one word list vote
+    for it, words in another script for that script's language, and other
+    words through a character trigram model learned from the lists, when
+    it is confident enough. A message is the language its votes agree on,
+    MIXED when they disagree and UNDETERMINED without any vote.
+    """
+
+    def __init__(self, words, margin=0.5):
+        self.languages = tuple(words)
+        self.margin = margin
+        lists = {lang: set(ws) for lang, ws in words.items()}
+        self._known = {}
+        for lang, ws in lists.items():
+            for w in ws:
+                if len(w) > 1:
+                    self._known[w] = lang if w not in self._known else None
+        self._seeds = {}
+        self._votes = dict(self._known)
+
+        # Trigram frequencies per language. An unseen trigram costs every
+        # language the same, or the smaller word list would win every
+        # unfamiliar word.
+        counts = {lang: Counter(g for w in ws for g in _trigrams(w)) for lang, ws in lists.items()}
+        totals = {lang: sum(grams.values()) for lang, grams in counts.items()}
+        unseen = math.log(0.5 / max(totals.values()))
+        self._models = {
+            lang: ({g: math.log(c / totals[lang]) for g, c in grams.items()}, unseen)
+            for lang, grams in counts.items()
+        }
+
+        digest = hashlib.blake2b(digest_size=8)
+        for lang in self.languages:
+            digest.update(f"{lang}\0{' '.join(sorted(lists[lang]))}\0".encode())
+        digest.update(repr(margin).encode())
+        self.version = digest.hexdigest()
+
+    @classmethod
+    def from_files(cls, wordlists=LANGUAGE_WORDLISTS, margin=0.5):
+        return cls({lang: read_words(paths) for lang, paths in wordlists.items()}, margin)
+
+    # ---------------- Words ----------------
+    def _classify(self, word):
+        for lang, script in _SCRIPTS.items():
+            if script.search(word):
+                return lang
+        if len(word) < 3 or not word.isascii() or not word.isalpha():
+            return None
+        grams = _trigrams(word)
+        scores = sorted(
+            (sum(logp.get(g, unseen) for g in grams) / len(grams), lang)
+            for lang, (logp, unseen) in self._models.items()
+        )
+        (second, _), (best, lang) = scores[-2], scores[-1]
+        return lang if best - second >= self.margin else None
+
+    def word_language(self, word):
+        """The vote of one lowercased word (None when it has none), memoized."""
+        lang = self._votes.get(word, _UNSEEN)
+        if lang is _UNSEEN:
+            if len(self._votes) >= _MEMO_SIZE:
+                self._votes = {**self._known, **self._seeds}
+            base = _STRETCH.sub(r"\1", word)   # "stuuupid", "yaaaar"
+            lang = self._votes.get(base) if base != word else self._classify(word)
+            if lang is None and base != word:
+                lang = self._classify(base)
+            self._votes[word] = lang
+        return lang
+
+    def _use_seeds(self, seeds):
+        # Seeds and word lists share one table, so a word costs one lookup
+        if seeds is not self._seeds:
+            self._seeds = seeds
+            self._votes = {**self._known, **seeds}
+        return self._votes
+
+    # ---------------- Messages ----------------
+    def identify(self, text, seeds=None):
+        """
+        Language of `text`. `seeds` maps words to votes that take precedence
+        over the word lists (see Lexicon.token_languages); a seed of MIXED
+        makes the whole message MIXED.
+        """
+        votes = self._use_seeds(seeds or {})
+        lowered = text.lower()
+        if "http" in lowered or "www." in lowered or "@" in lowered or "#" in lowered:
+            parts = _NOISE.split(lowered)   # text, noise, text, ...
+            found = words(" ".join(parts[::2]))
+            found.extend(w for w in words(" ".join(parts[1::2])) if w in self._seeds)
+        else:
+            found = words(lowered)
+        langs = {votes.get(w, _UNSEEN) for w in found}
+        if _UNSEEN in langs:
+            langs = {self.word_language(w) for w in found}
+        langs.discard(None)
+        if not langs:
+            return UNDETERMINED
+        if len(langs) == 1 and MIXED not in langs:
+            return langs.pop()
+        return MIXED
+
+
+identifier = LanguageIdentifier.from_files()
@@ -0,0 +1,429 @@
+# lexicon.py
+import hashlib
+import json
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from functools import cached_property
+
+from .language import MIXED, words
+
+CATEGORIES = ("profanity", "insult", "threat", "hinglish")
+# Language partition of each category's terms (utils.language routing)
+CATEGORY_LANGUAGES = {"hinglish": "hi"}
+DEFAULT_LANGUAGE = "en"
+
+# Index file layout: header | metadata (JSON) | terms (utf-8, one per line)
+#   | category codes (uint8) | weights (float64) | automaton arrays (int32,
+#   transition characters as UTF-32) | per language partition: member term
+#   positions (int32) and its automaton arrays; all little-endian
+MAGIC = b"TXGL"
+FORMAT_VERSION = 2
+_HEADER = struct.Struct("<4sHHI")   # magic, version, reserved, metadata bytes
+_ARRAYS = ("trans_offsets", "trans_targets", "fail", "out_offsets", "out_terms")
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+def _key_word(term):
+    """The longest word of `term` (None when it has no word of two or more characters)."""
+    candidates = [w for w in words(term.lower()) if len(w) > 1]
+    return max(candidates, key=len) if candidates else None
+
+
+# ---------------- Compiled Matcher ----------------
+
+class LexiconMatcher:
+    """
+    Aho-Corasick automaton over a set of words & phrases.
+
+    Built once, then every lookup is a single left-to-right pass over the
+    text whose cost does not depend on how many terms are in the lexicon.
+    Matching is case-insensitive; offsets refer to the original text.
+
+    A matcher read from an index keeps the automaton as flat arrays and
+    turns a state into a dict the first time a text reaches it, so loading
+    does not depend on how many states the texts never visit.
+    """
+
+    def __init__(self, terms):
+        self._terms = sorted({t.lower() for t in terms if t})
+        self.version = hashlib.blake2b("\n".join(self._terms).encode(), digest_size=8).hexdigest()
+
+        goto = [{}]
+        outputs = [[]]
+        for term in self._terms:
+            state = 0
+            for ch in term:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    outputs.append([])
+                state = nxt
+            outputs[state].append((len(term), term))
+
+        # Breadth-first fail links; each state inherits the outputs of the
+        # longest proper suffix that is also a prefix in the trie.
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for ch, nxt in goto[state].items():
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                outputs[nxt].extend(outputs[fail[nxt]])
+                queue.append(nxt)
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [tuple(o) for o in outputs]
+        self._flat = None
+
+    @cached_property
+    def terms(self):
+        return frozenset(self._terms)
+
+    def __len__(self):
+        return len(self._terms)
+
+    def __contains__(self, term):
+        term = term.lower()
+        i = bisect_left(self._terms, term)
+        return i < len(self._terms) and self._terms[i] == term
+
+    # ---------------- Flat Form ----------------
+    def to_arrays(self):
+        """The automaton as flat arrays (see `from_arrays`)."""
+        index = {term: i for i, term in enumerate(self._terms)}
+        flat = {name: array("i", [0]) for name in ("trans_offsets", "out_offsets")}
+        flat.update(trans_targets=array("i"), fail=array("i", self._fail), out_terms=array("i"))
+        chars = []
+        for state in range(len(self._goto)):
+            goto, outputs = self._state(state)
+            chars.extend(goto)
+            flat["trans_targets"].extend(goto.values())
+            flat["trans_offsets"].append(len(flat["trans_targets"]))
+            flat["out_terms"].extend(index[term] for _, term in outputs)
+            flat["out_offsets"].append(len(flat["out_terms"]))
+        return self._terms, "".join(chars), flat
+
+    @classmethod
+    def from_arrays(cls, terms, chars, flat, version):
+        self = cls.__new__(cls)
+        self._terms = terms
+        self.version = version
+        self._fail = flat["fail"].tolist()   # followed on most characters; list indexing is faster
+        self._goto = [None] * len(self._fail)
+        self._outputs = [None] * len(self._fail)
+        self._flat = (chars, flat["trans_offsets"], flat["trans_targets"], flat["out_offsets"], flat["out_terms"])
+        return self
+
+    def _state(self, state):
+        goto = self._goto[state]
+        if goto is None:
+            chars, trans_offsets, targets, out_offsets, out_terms = self._flat
+            a, b = trans_offsets[state], trans_offsets[state + 1]
+            goto = dict(zip(chars[a:b], targets[a:b]))
+            a, b = out_offsets[state], out_offsets[state + 1]
+            terms = self._terms
+            self._outputs[state] = tuple((len(terms[k]), terms[k]) for k in out_terms[a:b])
+            self._goto[state] = goto
+        return goto, self._outputs[state]
+
+    # ---------------- Matching ----------------
+    def find_all(self, text: str, word_boundary: bool = True):
+        """
+        Return every (start, end, term) occurrence in `text`, ordered by
+        position. With `word_boundary` a match must not be glued to other
+        letters/digits, so "ass" no longer fires inside "class".
+        """
+        lowered = text.lower()
+        # str.lower() can expand a few characters ("İ" -> "i̇"); keep a map
+        # back to the original offsets only when that actually happens.
+        index = None
+        if len(lowered) != len(text):
+            index = [i for i, ch in enumerate(text) for _ in ch.lower()]
+            index.append(len(text))
+
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        n = len(lowered)
+        matches = []
+        state = 0
+
+        for i, ch in enumerate(lowered):
+            while True:
+                trans = goto[state]
+                if trans is None:
+                    trans = self._state(state)[0]
+                nxt = trans.get(ch)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            hits = outputs[state]
+            if hits is None:
+                hits = self._state(state)[1]
+            if not hits:
+                continue
+
+            end = i + 1
+            for length, term in hits:
+                start = end - length
+                if word_boundary and (
+                    (start > 0 and _is_word_char(lowered[start - 1]))
+                    or (end < n and _is_word_char(lowered[end]))
+                ):
+                    continue
+                if index is not None:
+                    matches.append((index[start], index[end], term))
+                else:
+                    matches.append((start, end, term))
+
+        matches.sort()
+        return matches
+
+    def find_terms(self, text: str, word_boundary: bool = True):
+        """Distinct terms present in `text`."""
+        return {term for _, _, term in self.find_all(text, word_boundary)}
+
+
+# ---------------- Sources ----------------
+
+def read_sources(lexicon_path, suggestions_path=None):
+    """
+    Parse lexicon.tsv (and suggestions.tsv). Returns (release, entries,
+    suggestions, duplicates): entries are (term, category, weight) with
+    the first occurrence of a term kept, duplicates the terms seen again.
+    """
+    release, entries, seen, duplicates = None, [], set(), []
+    with open(lexicon_path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = line.split("\t")
+            where = f"{lexicon_path}:{number}"
+            if fields[0] == "@version":
+                release = fields[1].strip() if len(fields) > 1 else ""
+                continue
+            if len(fields) != 3:
+                raise ValueError(f"{where}: expected term, category and weight, got {line!r}")
+            term, category, weight = fields[0].strip().lower(), fields[1].strip(), fields[2].strip()
+            if not term or not _is_word_char(term[0]) or not _is_word_char(term[-1]):
+                raise ValueError(f"{where}: term {fields[0]!r} must start and end with a letter or digit")
+            if category not in CATEGORIES:
+                raise ValueError(f"{where}: unknown category {category!r}, expected one of {CATEGORIES}")
+            try:
+                weight = float(weight)
+            except ValueError:
+                weight = -1.0
+            if not 0 <= weight <= 1:
+                raise ValueError(f"{where}: weight must be a number from 0 to 1, got {fields[2]!r}")
+            if term in seen:
+                duplicates.append(term)
+                continue
+            seen.add(term)
+            entries.append((term, category, weight))
+    if not release:
+        raise ValueError(f"{lexicon_path}: missing '@version' line")
+
+    suggestions = {}
+    if suggestions_path is not None and os.path.exists(suggestions_path):
+        with open(suggestions_path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip() or line.startswith("#"):
+                    continue
+                term, sep, text = line.rstrip("\n").partition("\t")
+                if not sep:
+                    raise ValueError(f"{suggestions_path}:{number}: expected term and suggestion")
+                suggestions[term.strip().lower()] = text.strip()
+    return release, entries, suggestions, duplicates
+
+
+# ---------------- Lexicon ----------------
+
+class Lexicon:
+    """
+    Terms with their category and severity weight, replacement suggestions
+    and the matcher, as one immutable unit: a reload swaps the whole object.
+    """
+
+    def __init__(self, release, matcher, categories, weights, suggestions, partitions=None):
+        self.release = release
+        self.matcher = matcher
+        self.version = matcher.version
+        self._categories = categories   # per sorted term, index into CATEGORIES
+        self._weights = weights
+        self.suggestions = suggestions
+        self._partitions = partitions
+
+    @classmethod
+    def from_entries(cls, release, entries, suggestions):
+        matcher = LexiconMatcher(term for term, _, _ in entries)
+        info = {term: (CATEGORIES.index(category), weight) for term, category, weight in entries}
+        categories = array("B", (info[t][0] for t in matcher._terms))
+        weights = array("d", (info[t][1] for t in matcher._terms))
+        return cls(release, matcher, categories, weights, suggestions)
+
+    @classmethod
+    def from_sources(cls, lexicon_path, suggestions_path=None):
+        release, entries, suggestions, _ = read_sources(lexicon_path, suggestions_path)
+        return cls.from_entries(release, entries, suggestions)
+
+    def __len__(self):
+        return len(self.matcher)
+
+    @property
+    def terms(self):
+        return self.matcher.terms
+
+    def _position(self, term):
+        terms = self.matcher._terms
+        i = bisect_left(terms, term.lower())
+        return i if i < len(terms) and terms[i] == term.lower() else None
+
+    def category(self, term):
+        i = self._position(term)
+        return None if i is None else CATEGORIES[self._categories[i]]
+
+    def weight(self, term):
+        i = self._position(term)
+        return None if i is None else self._weights[i]
+
+    def suggestion(self, term, default=None):
+        return self.suggestions.get(term.lower(), default)
+
+    # ---------------- Language Partitions ----------------
+    def _languages(self):
+        for term, code in zip(self.matcher._terms, self._categories):
+            yield term, CATEGORY_LANGUAGES.get(CATEGORIES[code], DEFAULT_LANGUAGE)
+
+    @property
+    def partitions(self):
+        """
+        Language -> matcher over that language's terms. Terms without a key
+        word (see `token_languages`) are in every partition.
+        """
+        if self._partitions is None:
+            members = {lang: [] for lang in sorted({DEFAULT_LANGUAGE, *CATEGORY_LANGUAGES.values()})}
+            for term, lang in self._languages():
+                for target in ([lang] if _key_word(term) else members):
+                    members[target].append(term)
+            self._partitions = {lang: LexiconMatcher(terms) for lang, terms in members.items()}
+        return self._partitions
+
+    @cached_property
+    def token_languages(self):
+        """
+        Seeds for LanguageIdentifier.identify: the longest word of every term
+        votes for the term's language (MIXED when terms of two languages
+        share it). A text containing a term therefore never routes to a
+        partition without it.
+        """
+        seeds = {}
+        for term, lang in self._languages():
+            word = _key_word(term)
+            if word is not None:
+                seeds[word] = lang if seeds.get(word, lang) == lang else MIXED
+        return seeds
+
+    def matcher_for(self, language):
+        """The partition matcher for `language`; the whole lexicon for MIXED or an unknown language."""
+        return self.partitions.get(language, self.matcher)
+
+    # ---------------- Index ----------------
+    def save(self, path):
+        """Write the binary index next to `path` first, then move it into place."""
+        terms, chars, flat = self.matcher.to_arrays()
+        sections = [
+            "\n".join(terms).encode("utf-8"),
+            _le(self._categories),
+            _le(self._weights),
+            chars.encode("utf-32-le"),
+            *(_le(flat[name]) for name in _ARRAYS),
+        ]
+        position = {term: i for i, term in enumerate(terms)}
+        for matcher in self.partitions.values():
+            members, chars, flat = matcher.to_arrays()
+            sections.append(_le(array("i", (position[t] for t in members))))
+            sections.append(chars.encode("utf-32-le"))
+            sections.extend(_le(flat[name]) for name in _ARRAYS)
+        meta = json.dumps({
+            "release": self.release,
+            "version": self.version,
+            "terms": len(terms),
+            "partitions": {lang: m.version for lang, m in self.partitions.items()},
+            "sections": [len(s) for s in sections],
+            "suggestions": self.suggestions,
+        }).encode("utf-8")
+
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, 0, len(meta)))
+            f.write(meta)
+            for section in sections:
+                f.write(section)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, _, meta_size = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path}: not a lexicon index (format {FORMAT_VERSION})")
+        offset = _HEADER.size
+        meta = json.loads(data[offset:offset + meta_size])
+        offset += meta_size
+        if offset + sum(meta["sections"]) != len(data):
+            raise ValueError(f"{path}: truncated lexicon index")
+
+        view = memoryview(data)
+        sections = []
+        for size in meta["sections"]:
+            sections.append(view[offset:offset + size])
+            offset += size
+        terms_blob, categories, weights, *rest = sections
+        terms = str(terms_blob, "utf-8").split("\n") if meta["terms"] else []
+        matcher = _matcher_from(terms, rest, meta["version"])
+        partitions = {}
+        offset = 1 + len(_ARRAYS)
+        for lang, version in meta["partitions"].items():
+            members = _from_le("i", rest[offset])
+            partitions[lang] = _matcher_from([terms[k] for k in members], rest[offset + 1:], version)
+            offset += 2 + len(_ARRAYS)
+        return cls(meta["release"], matcher, _from_le("B", categories), _from_le("d", weights),
+                   meta["suggestions"], partitions)
+
+
+def _matcher_from(terms, sections, version):
+    """A matcher from the transition characters and automaton arrays at the start of `sections`."""
+    chars, *arrays = sections[:1 + len(_ARRAYS)]
+    flat = {name: _from_le("i", raw) for name, raw in zip(_ARRAYS, arrays)}
+    return LexiconMatcher.from_arrays(terms, str(chars, "utf-32-le"), flat, version)
+
+
+def _le(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_le(typecode, raw):
+    values = array(typecode)
+    values.frombytes(raw)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
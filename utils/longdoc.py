@@ -0,0 +1,157 @@
+# longdoc.py
+import re
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .incremental import _SENTENCE
+from .scoring import SEVERITY_LEVELS, analyze_texts, iter_analyze_texts, load_pipeline
+from .settings import LONGDOC_BATCH_WINDOWS, LONGDOC_WINDOW_WORDS
+
+_WORD = re.compile(r"\S+")
+AGGREGATES = ("max", "mean", "topk")
+# Calls grow up to this many windows; past it the per-call overhead is a
+# few percent and larger calls only delay the early exit
+_MAX_CALL = 1024
+
+DocumentResult = namedtuple(
+    "DocumentResult", "prob label severity windows total_windows skipped truncated stopped_early elapsed"
+)
+
+
+# ---------------- Segmentation ----------------
+
+def _word_windows(text, start, end, size, stride):
+    words = [m.span() for m in _WORD.finditer(text, start, end)]
+    spans = []
+    for i in range(0, len(words), stride):
+        last = min(i + size, len(words)) - 1
+        spans.append((words[i][0], words[last][1]))
+        if last == len(words) - 1:
+            break
+    return spans
+
+
+def segment(text, mode="sentence", window_words=LONGDOC_WINDOW_WORDS, stride=None):
+    """
+    (start, end) character spans of the windows of `text`.
+
+    "sentence": one window per sentence; sentences longer than
+    `window_words` are cut into pieces of that many words.
+    "tokens": `window_words`-word windows every `stride` words (default:
+    no overlap).
+    """
+    if mode == "tokens":
+        return _word_windows(text, 0, len(text), window_words, stride or window_words)
+    if mode != "sentence":
+        raise ValueError(f"unknown segmentation mode {mode!r}")
+    spans = []
+    for m in _SENTENCE.finditer(text):
+        start, end = m.span()
+        sentence = m.group()
+        start += len(sentence) - len(sentence.lstrip())
+        end -= len(sentence) - len(sentence.rstrip())
+        if start >= end:
+            continue
+        if text.count(" ", start, end) < window_words:
+            spans.append((start, end))
+        else:
+            spans.extend(_word_windows(text, start, end, window_words, window_words))
+    return spans
+
+
+# ---------------- Aggregation ----------------
+
+def aggregate_probs(probs, how="max", top_k=3):
+    """Document probability from window probabilities: max, mean or mean of the top k."""
+    if not len(probs):
+        return 0.0
+    if how == "max":
+        return float(np.max(probs))
+    if how == "mean":
+        return float(np.mean(probs))
+    if how == "topk":
+        return float(np.mean(np.sort(probs)[-top_k:]))
+    raise ValueError(f"unknown aggregate {how!r}, expected one of {AGGREGATES}")
+
+
+# ---------------- Documents ----------------
+
+def analyze_document(text, pipeline=None, mode="sentence", window_words=LONGDOC_WINDOW_WORDS, stride=None,
+                     aggregate="max", top_k=3, max_windows=None, time_budget=None, stop_on_high=False,
+                     batch_size=LONGDOC_BATCH_WINDOWS):
+    """
+    Score a long text window by window.
+
+    Without a time budget or early exit all windows go through
+    analyze_texts as one batch. Otherwise they are scored in document
+    order, `batch_size` windows first and twice as many each call after
+    (up to 1,024), and scoring stops before `time_budget` seconds are exceeded or (with
+    `stop_on_high`) once a High-severity window was found.
+    `max_windows` keeps only the first windows. Windows with nothing left
+    after cleaning (punctuation, links, tags) are scored but dropped, so
+    the model's prior on an empty input does not count. The document
+    severity is that of its worst window; `prob` is aggregated with
+    `aggregate`.
+    """
+    if pipeline is None:
+        pipeline = load_pipeline()
+    start = time.perf_counter()
+    spans = segment(text, mode, window_words, stride)
+    total = len(spans)
+    if max_windows is not None and total > max_windows:
+        spans = spans[:max_windows]
+    texts = [text[s:e] for s, e in spans]
+
+    if time_budget is None and not stop_on_high:
+        batch_size = max(len(texts), 1)
+    frames = []
+    stopped_early = False
+    scoring_start = time.perf_counter()
+    done = 0
+    while done < len(texts):
+        frames.extend(iter_analyze_texts(texts[done:done + batch_size], pipeline, batch_size, cleaned_text=True))
+        done += len(frames[-1])
+        if done == len(texts):
+            break
+        last = frames[-1]
+        if stop_on_high and ((last["severity"] == "High") & (last["cleaned"] != "")).any():
+            stopped_early = True
+            break
+        # Every call has a fixed cost, so calls grow geometrically; under a
+        # budget they are also capped at what the remaining time can score
+        batch_size = max(min(batch_size * 2, _MAX_CALL), batch_size)
+        if time_budget is not None:
+            now = time.perf_counter()
+            fits = int((time_budget - (now - start)) / ((now - scoring_start) / done))
+            if fits < 1:
+                stopped_early = True
+                break
+            batch_size = min(batch_size, fits)
+
+    scores = pd.concat(frames) if frames else analyze_texts([], pipeline).assign(cleaned="")
+    scored = len(scores)
+    windows = pd.DataFrame({
+        "start": [s for s, _ in spans[:scored]],
+        "end": [e for _, e in spans[:scored]],
+        "text": texts[:scored],
+    })
+    windows = pd.concat([windows, scores.reset_index(drop=True)], axis=1)
+    empty = (windows["cleaned"] == "").to_numpy()
+    windows = windows[~empty].drop(columns="cleaned").reset_index(drop=True)
+
+    prob = aggregate_probs(windows["prob"].to_numpy(), aggregate, top_k)
+    worst = max((list(SEVERITY_LEVELS).index(s) for s in windows["severity"]), default=0)
+    return DocumentResult(
+        prob=prob,
+        label=int(prob >= 0.5),
+        severity=SEVERITY_LEVELS[worst],
+        windows=windows,
+        total_windows=total,
+        skipped=int(empty.sum()),
+        truncated=scored < total,
+        stopped_early=stopped_early,
+        elapsed=time.perf_counter() - start,
+    )
@@ -0,0 +1,156 @@
+# memory.py
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+
+import numpy as np
+import pandas as pd
+
+from .settings import MEMORY_PROFILE_FRAMES, MEMORY_PROFILE_TOP
+
+# Never walked: code and types are shared by every session
+_OPAQUE = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType)
+
+
+# ---------------- Object Sizes ----------------
+def deep_sizeof(obj, skip=()):
+    """
+    Estimated bytes held by `obj` and everything it references, each object
+    counted once. Objects in `skip` (e.g. the shared model) are not counted.
+    DataFrames count their deep memory usage, arrays their buffers.
+    """
+    seen = {id(o) for o in skip}
+    total = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, _OPAQUE):
+            continue
+        seen.add(id(o))
+        if isinstance(o, (pd.DataFrame, pd.Series, pd.Index)):
+            usage = o.memory_usage(deep=True)
+            total += int(usage.sum() if isinstance(o, pd.DataFrame) else usage)
+            continue
+        total += sys.getsizeof(o)
+        if isinstance(o, np.ndarray):
+            continue
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset, deque)):
+            stack.extend(o)
+        elif not isinstance(o, (str, bytes, bytearray, int, float, complex, bool)):
+            if hasattr(o, "__dict__"):
+                stack.append(vars(o))
+            for cls in type(o).__mro__:
+                for name in getattr(cls, "__slots__", ()):
+                    if hasattr(o, name):
+                        stack.append(getattr(o, name))
+    return total
+
+
+def session_sizes(state, skip=()):
+    """{key: estimated bytes} for a session_state (or any mapping), largest first."""
+    sizes = {key: deep_sizeof(state[key], skip) for key in list(state.keys())}
+    return dict(sorted(sizes.items(), key=lambda kv: kv[1], reverse=True))
+
+
+def trim_session(state, cap, trimmers, skip=()):
+    """
+    Run `trimmers` — (name, fn(state) -> bool) pairs, cheapest loss first —
+    until the session's estimated size is at most `cap` bytes. Returns the
+    size before, the size after and the names of the trimmers that freed
+    something.
+    """
+    before = size = sum(session_sizes(state, skip).values())
+    trimmed = []
+    for name, trim in trimmers:
+        if size <= cap:
+            break
+        if trim(state):
+            trimmed.append(name)
+            size = sum(session_sizes(state, skip).values())
+    return before, size, trimmed
+
+
+def rss_mb():
+    """Resident set size of this process (Linux), or None."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        return None
+
+
+# ---------------- Allocation Profiling ----------------
+def _where(frame):
+    path = frame.filename
+    marker = "site-packages" + os.sep
+    if marker in path:
+        path = path.split(marker, 1)[1]
+    elif path.startswith(os.getcwd()):
+        path = os.path.relpath(path)
+    return f"{path}:{frame.lineno}"
+
+
+class MemoryProfiler:
+    """
+    tracemalloc around a block of code: how much it allocated at peak, how
+    much it kept, and which source lines kept the most.
+
+    Tracing runs only while a block is profiled, so the rest of the process
+    is not slowed down and the final snapshot holds just what the block
+    kept (no before/after diff of the whole heap). Blocks are profiled one
+    at a time; counts are process-wide, so other sessions running at the
+    same time show up too. If tracing was already on (PYTHONTRACEMALLOC),
+    it is left on and the block is measured against a first snapshot.
+    """
+
+    def __init__(self, frames=MEMORY_PROFILE_FRAMES, top=MEMORY_PROFILE_TOP):
+        self.frames = frames
+        self.top = top
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def profile(self, name):
+        """Yields a dict that is filled in with the report when the block ends."""
+        with self._lock:
+            owned = not tracemalloc.is_tracing()
+            if owned:
+                tracemalloc.start(self.frames)
+                before = None
+            else:
+                before = tracemalloc.take_snapshot()
+            start = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            started = time.perf_counter()
+            report = {"name": name}
+            try:
+                yield report
+            finally:
+                elapsed = time.perf_counter() - started
+                current, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot()
+                if owned:
+                    tracemalloc.stop()
+                    stats = snapshot.statistics("lineno")
+                    top = [(s.traceback[0], s.size, s.count) for s in stats]
+                else:
+                    stats = snapshot.compare_to(before, "lineno")
+                    top = [(s.traceback[0], s.size_diff, s.count_diff) for s in stats]
+                top = [t for t in top if t[1] > 0 and t[0].filename != tracemalloc.__file__][:self.top]
+                report.update(
+                    at=time.time(),
+                    seconds=elapsed,
+                    kept_kb=(current - start) / 1024,
+                    peak_kb=(peak - start) / 1024,
+                    top=[{"where": _where(frame), "kept_kb": size / 1024, "blocks": count} for frame, size, count in top],
+                )
+
+
+profiler = MemoryProfiler()
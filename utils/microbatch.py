@@ -0,0 +1,87 @@
+# microbatch.py
+import asyncio
+
+
+class QueueFullError(Exception):
+    """Raised when the batcher is at capacity and the caller should back off."""
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-item requests into batches.
+
+    A batch is flushed as soon as it holds `max_batch` items or the oldest
+    item has waited `max_wait` seconds. `score_fn(list) -> list` runs in
+    `executor` so the event loop keeps accepting requests meanwhile.
+    """
+
+    def __init__(self, score_fn, max_batch=64, max_wait=0.005, max_queue=1024, executor=None):
+        self.score_fn = score_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.executor = executor
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.batches = 0
+        self.items = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def qsize(self):
+        return self.queue.qsize()
+
+    def full(self):
+        return self.queue.full()
+
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            raise QueueFullError from None
+        return await future
+
+    async def run_batch(self, items):
+        """Score a list directly on the batcher's executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.score_fn, items)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Drop requests whose caller already went away
+            batch = [(item, fut) for item, fut in batch if not fut.done()]
+            if not batch:
+                continue
+            try:
+                results = await self.run_batch([item for item, _ in batch])
+            except Exception as exc:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(exc)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, fut), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
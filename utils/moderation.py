@@ -0,0 +1,107 @@
+# moderation.py
+from array import array
+from collections import OrderedDict
+
+from .settings import (
+    MODERATION_WINDOW_SECONDS, MODERATION_WINDOW_BUCKETS, MODERATION_MAX_USERS,
+    MODERATION_ESCALATE_HIGH, MODERATION_ESCALATE_TOXICITY, MODERATION_ESCALATE_MIN_MESSAGES,
+)
+
+
+class UserWindow:
+    """
+    One user's messages over the last `buckets` time buckets: message count,
+    summed toxicity and High-severity count per bucket, in fixed-size arrays
+    (a ring indexed by bucket number), so memory does not grow with traffic.
+    """
+
+    __slots__ = ("bucket", "count", "prob", "high", "escalated")
+
+    def __init__(self, buckets):
+        self.bucket = array("q", [-1] * buckets)
+        self.count = array("l", [0] * buckets)
+        self.prob = array("d", [0.0] * buckets)
+        self.high = array("l", [0] * buckets)
+        self.escalated = None
+
+    def add(self, bucket, prob, high):
+        i = bucket % len(self.bucket)
+        if self.bucket[i] != bucket:
+            if self.bucket[i] > bucket:
+                return   # older than the window
+            self.bucket[i] = bucket
+            self.count[i] = self.high[i] = 0
+            self.prob[i] = 0.0
+        self.count[i] += 1
+        self.prob[i] += prob
+        self.high[i] += high
+
+    def totals(self, bucket):
+        """(messages, summed toxicity, High messages) in the window ending at `bucket`."""
+        first = bucket - len(self.bucket)
+        count = prob = high = 0
+        for i, b in enumerate(self.bucket):
+            if first < b <= bucket:
+                count += self.count[i]
+                prob += self.prob[i]
+                high += self.high[i]
+        return count, prob, high
+
+
+class ModerationState:
+    """
+    Per-user sliding windows and the escalation rules over them.
+
+    A user is escalated when the window holds `escalate_high` High-severity
+    messages, or at least `min_messages` messages averaging `escalate_toxicity`
+    or more; then not again until a full window has passed. Time is the
+    messages' own timestamps, so a replayed log behaves like the live chat.
+    The `max_users` least recently active users are kept.
+    """
+
+    def __init__(self, window=MODERATION_WINDOW_SECONDS, buckets=MODERATION_WINDOW_BUCKETS,
+                 max_users=MODERATION_MAX_USERS, escalate_high=MODERATION_ESCALATE_HIGH,
+                 escalate_toxicity=MODERATION_ESCALATE_TOXICITY, min_messages=MODERATION_ESCALATE_MIN_MESSAGES):
+        self.window = window
+        self.buckets = buckets
+        self.width = window / buckets
+        self.max_users = max_users
+        self.escalate_high = escalate_high
+        self.escalate_toxicity = escalate_toxicity
+        self.min_messages = min_messages
+        self._users = OrderedDict()
+        self.escalations = self.evictions = 0
+
+    def __len__(self):
+        return len(self._users)
+
+    def observe(self, user, timestamp, prob, severity):
+        """
+        Add one scored message. Returns (messages, rolling toxicity, High
+        count) for the user's window and the escalation reason or None.
+        """
+        state = self._users.get(user)
+        if state is None:
+            state = self._users[user] = UserWindow(self.buckets)
+            if len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+                self.evictions += 1
+        else:
+            self._users.move_to_end(user)
+
+        bucket = int(timestamp // self.width)
+        state.add(bucket, prob, severity == "High")
+        # A late message sees the window as it is now, not as it was then
+        count, total, high = state.totals(max(bucket, max(state.bucket)))
+        toxicity = total / count if count else 0.0
+
+        reason = None
+        if state.escalated is None or timestamp - state.escalated >= self.window:
+            if self.escalate_high and high >= self.escalate_high:
+                reason = "high_severity"
+            elif count >= self.min_messages and toxicity >= self.escalate_toxicity:
+                reason = "toxicity"
+            if reason:
+                state.escalated = timestamp
+                self.escalations += 1
+        return (count, toxicity, high), reason
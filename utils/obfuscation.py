@@ -0,0 +1,231 @@
+# obfuscation.py
+import hashlib
+import re
+import unicodedata
+from bisect import bisect_right
+from functools import lru_cache
+
+# Sentence punctuation around a word is not part of its spelling ("sh!t!")
+_EDGE = "\"'.,!?;:()[]{}<>"
+_TRIPLE = re.compile(r"([^\W\d_])\1\1")
+_REPEAT = re.compile(r"(.)\1\1")   # cheaper prefilter for _TRIPLE
+_RUN = re.compile(r"(.)\1+")
+_KINDS = ("fold", "mask", "ignore", "term", "alias")
+
+
+def load_rules(path):
+    """(kind, value, target) rows of a rules file; see data/obfuscation/rules.tsv."""
+    rules = []
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            kind, value, target = (line.split("\t") + ["", ""])[:3]
+            if kind not in _KINDS or not value:
+                raise ValueError(f"{path}:{number}: bad rule {line!r}")
+            rules.append((kind, value, target))
+    return rules
+
+
+def _base_letters():
+    """Accented Latin and fullwidth letters -> plain ASCII letters."""
+    table = {}
+    for code in [*range(0xC0, 0x250), *range(0xFF21, 0xFF5B)]:
+        base = "".join(c for c in unicodedata.normalize("NFKD", chr(code)) if not unicodedata.combining(c))
+        if base.isascii() and base.isalpha() and base != chr(code):
+            table[code] = base.lower()
+    return table
+
+
+@lru_cache(maxsize=4096)
+def _mask_pattern(word, masks):
+    # Variable-length fallback: every run of masks hides one or more letters
+    parts = re.split(f"[{re.escape(masks)}]+", word)
+    return re.compile(r"[^\W\d_]+".join(map(re.escape, parts)))
+
+
+class ObfuscationNormalizer:
+    """
+    Rewrites obfuscated words ("1d10t", "a$$hole", "f**k", "stuuupid",
+    Cyrillic lookalikes) to their canonical term.
+
+    Plain ASCII words are skipped; every other word is folded with
+    str.translate and looked up in a dict, so the cost per message does not
+    grow with the number of rules. Masked words go through indexes keyed
+    by length and first letter, or by first and last letter. Words that
+    do not resolve to a known term are left exactly as written.
+    """
+
+    def __init__(self, rules):
+        rules = list(rules)
+        self.version = hashlib.blake2b(repr(sorted(rules)).encode(), digest_size=8).hexdigest()
+
+        folds, masks, ignore, terms, aliases = {}, "", "", [], []
+        for kind, value, target in rules:
+            if kind == "fold":
+                for ch in value:
+                    folds[ch] = target.split()
+            elif kind == "mask":
+                masks += value
+            elif kind == "ignore":
+                ignore += value
+            elif kind == "term":
+                terms.append(value.lower())
+            else:
+                aliases.append((value.lower(), target.lower()))
+        clash = set(masks) & (set(folds) | set(ignore))
+        if clash:
+            raise ValueError(f"characters used both as masks and folds: {''.join(sorted(clash))}")
+
+        # One translate table with every character's first reading; the
+        # second reading of ambiguous characters (1 -> i, l) is only tried
+        # when the first spelling is not a known term
+        self._fold = _base_letters()
+        for ch in ignore:
+            self._fold[ord(ch)] = None
+        self._fold.update({ord(ch): letters[0] for ch, letters in folds.items()})
+        alternates = {ch: letters[1] for ch, letters in folds.items() if len(letters) > 1}
+        self._alternate = {ord(ch): letter for ch, letter in alternates.items()}
+        self._ambiguous = re.compile(f"[{re.escape(''.join(alternates))}]") if alternates else None
+
+        self.masks = masks
+        self.terms = {}
+        self._squeezed = {}
+        self._by_length = {}
+        self._by_ends = {}
+        for term in terms:
+            self.terms.setdefault(term, term)
+            self._squeezed.setdefault(_RUN.sub(r"\1", term), term)
+            self._by_length.setdefault((len(term), term[0]), []).append(term)
+            self._by_ends.setdefault((term[0], term[-1]), []).append(term)
+        for variant, term in aliases:
+            if term not in self.terms:
+                raise ValueError(f"alias {variant!r} points to unknown term {term!r}")
+            self.terms.setdefault(variant, term)
+
+        self._mask = re.compile(f"[{re.escape(masks)}]") if masks else None
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(load_rules(path))
+
+    def __len__(self):
+        return len(self.terms)
+
+    # ---------------- Lookup ----------------
+    def _unmask(self, word):
+        # The first letter must be visible: it anchors the index, and a
+        # leading "#" or "*" is a hashtag or emphasis, not a mask
+        if word[0] in self.masks:
+            return None
+        fixed = sum(1 for ch in word if ch not in self.masks)
+        if fixed < 2 or fixed < len(word) - fixed:
+            return None   # too little left to tell terms apart
+        # Same length: one mask per hidden letter
+        for term in self._by_length.get((len(word), word[0]), ()):
+            if all(ch == t or ch in self.masks for ch, t in zip(word, term)):
+                return term
+        if word[-1] in self.masks:
+            return None
+        pattern = _mask_pattern(word, self.masks)
+        for term in self._by_ends.get((word[0], word[-1]), ()):
+            if pattern.fullmatch(term):
+                return term
+        return None
+
+    def _resolve(self, folded, stretched):
+        term = self.terms.get(folded)
+        if term is None:
+            if self._mask is not None and self._mask.search(folded):
+                term = self._unmask(folded)
+            elif stretched and _TRIPLE.search(folded):
+                term = self._squeezed.get(_RUN.sub(r"\1", folded))
+        return term
+
+    def lookup(self, word, stretched=True):
+        """Canonical term for one word, or None. `stretched=False` skips the repeated-letter check."""
+        lowered = word.lower()
+        term = self._resolve(lowered.translate(self._fold), stretched)
+        if term is None and self._ambiguous is not None and self._ambiguous.search(lowered):
+            term = self._resolve(lowered.translate(self._alternate).translate(self._fold), stretched)
+        return term
+
+    def normalize(self, text):
+        stretched = _REPEAT.search(text) is not None
+        replacements = None
+        for word in text.split():
+            if word.isascii() and word.isalpha() and not stretched:
+                continue
+            lead = len(word) - len(word.lstrip(_EDGE))
+            core = word[lead:].rstrip(_EDGE)
+            if not core or "/" in core:   # links are dropped by clean_text anyway
+                continue
+            if core.isascii() and core.isalpha() and not (stretched and _TRIPLE.search(core)):
+                continue
+            term = self.lookup(core, stretched)
+            if term is not None and term != core.lower():
+                if replacements is None:
+                    replacements = {}
+                replacements[word] = word[:lead] + term + word[lead + len(core):]
+        if not replacements:
+            return text
+        return _rewrite(text, replacements)
+
+
+def _rewrite(text, replacements):
+    """Replace whole whitespace-delimited words, leaving the spacing as it was."""
+    spans = []
+    for word, new in replacements.items():
+        start = text.find(word)
+        while start != -1:
+            end = start + len(word)
+            if (not start or text[start - 1].isspace()) and (end == len(text) or text[end].isspace()):
+                spans.append((start, end, new))
+            start = text.find(word, end)
+    spans.sort()
+    parts = []
+    pos = 0
+    for start, end, new in spans:
+        parts.append(text[pos:start])
+        parts.append(new)
+        pos = end
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+_WORD = re.compile(r"\S+")
+
+
+def _common_prefix(a, b):
+    n = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        n += 1
+    return n
+
+
+def original_spans(text, normalized, spans):
+    """
+    Map (start, end, term) spans found in `normalized` (the output of
+    `normalize` for `text`) back to offsets into `text`. Normalizing only
+    rewrites whole whitespace-delimited words, so the words of both line
+    up; a span edge inside a rewritten word moves to the same edge of the
+    original word ("(f**k)" -> "(fuck)" keeps the brackets outside).
+    """
+    if text == normalized or not spans:
+        return spans
+    pairs = list(zip(_WORD.finditer(normalized), _WORD.finditer(text)))
+    starts = [new.start() for new, _ in pairs]
+
+    def edge(pos, is_end):
+        new, old = pairs[max(bisect_right(starts, pos - is_end) - 1, 0)]
+        a, b = new.group(), old.group()
+        if a == b:
+            return old.start() + pos - new.start()
+        if is_end:
+            return old.end() - min(new.end() - pos, _common_prefix(a[::-1], b[::-1]))
+        return old.start() + min(pos - new.start(), _common_prefix(a, b))
+
+    return [(edge(start, False), edge(end, True), term) for start, end, term in spans]
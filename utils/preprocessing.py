@@ -1,20 +1,62 @@
 import re
 
+from .obfuscation import ObfuscationNormalizer
+from .settings import OBFUSCATION_RULES_PATH
+
+# Shared by train_model.py and every serving path; the model is only as
+# good as the parity between the two, so keep all text normalization here.
+
+# Masked, leetspeak, stretched and lookalike spellings of abusive terms,
+# compiled from data/obfuscation/rules.tsv
+obfuscation = ObfuscationNormalizer.from_file(OBFUSCATION_RULES_PATH)
+
+# URLs, @mentions and #hashtags in one pass. A mention stops right before
+# an embedded URL so the URL rule still gets to remove it.
+_NOISE = re.compile(r"http\S+|www\.\S+|[@#](?:(?!http\S|www\.\S)\w)+")
+
+_KEEP = frozenset("abcdefghijklmnopqrstuvwxyz0123456789*")
+
+
+class _CleanTable(dict):
+    """str.translate table: keep [a-z0-9*], everything else becomes a space."""
+
+    def __missing__(self, code):
+        value = code if chr(code) in _KEEP else " "
+        self[code] = value
+        return value
+
+
+_CLEAN_TABLE = _CleanTable()
+
+
 def clean_text(text):
-    text = text.lower()
-    text = re.sub(r"http\S+|www\.\S+", " ", text)
-    text = re.sub(r"@\w+", " ", text)
-    text = re.sub(r"#\w+", " ", text)
-    text = re.sub(r"[^a-z0-9\s\*]", " ", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    text = _NOISE.sub(" ", text.lower())
+    return " ".join(text.translate(_CLEAN_TABLE).split())
+
 
 def normalize_censored(text):
-    replacements = {
-        r"f\*+k": "fuck",
-        r"a\*+hole": "asshole",
-        r"motherf\*+ker": "motherf**ker"
-    }
-    for pattern, replacement in replacements.items():
-        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
-    return text
+    return obfuscation.normalize(text)
+
+
+def preprocess(text):
+    """Model input for one raw message."""
+    return clean_text(normalize_censored(str(text)))
+
+
+def _map(fn, texts):
+    if hasattr(texts, "map") and hasattr(texts, "index"):
+        return texts.map(fn)
+    return [fn(t) for t in texts]
+
+
+def clean_texts(texts):
+    """Batch `clean_text`; a pandas Series stays a Series, anything else becomes a list."""
+    return _map(clean_text, texts)
+
+
+def normalize_censored_texts(texts):
+    return _map(normalize_censored, texts)
+
+
+def preprocess_texts(texts):
+    return _map(preprocess, texts)
@@ -0,0 +1,346 @@
+# scoring.py
+import os
+from functools import lru_cache
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from . import abuse_words
+from .cache import ResultCache
+from .compact_model import CompactModel
+from .obfuscation import original_spans
+from .language import UNDETERMINED, identifier as language_identifier
+from .preprocessing import clean_text, normalize_censored, obfuscation
+from .sentiment_analysis import polarities, polarity_of, sentiment_label
+from .settings import (
+    ROOT_DIR, RESULT_CACHE_SIZE, RESULT_CACHE_TTL, RESULT_CACHE_DB, SENTIMENT_ENGINE,
+    MODEL_ONLY_MEDIUM, MODEL_ONLY_HIGH, LANGUAGE_ROUTING,
+)
+from .tracing import span, trace
+
+MODEL_PATH = os.path.join(ROOT_DIR, "abuse_model.joblib")
+# Same model exported by train_model.py; loads without sklearn (see utils.compact_model)
+COMPACT_MODEL_PATH = os.path.join(ROOT_DIR, "abuse_model.tgm")
+
+SEVERITY_LEVELS = np.array(["Low", "Medium", "High"], dtype=object)
+
+
+# ---------------- Model ----------------
+
+def model_version(path: str = MODEL_PATH):
+    stat = os.stat(path)
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+
+def load_pipeline(path: str = MODEL_PATH):
+    """Load the model once; a changed file on disk is picked up on the next call."""
+    return _load_pipeline(path, model_version(path))
+
+
+def worker_model_path():
+    """The compact export when it is at least as new as the joblib model, else the joblib model."""
+    try:
+        if os.stat(COMPACT_MODEL_PATH).st_mtime_ns >= os.stat(MODEL_PATH).st_mtime_ns:
+            return COMPACT_MODEL_PATH
+    except FileNotFoundError:
+        pass
+    return MODEL_PATH
+
+
+@lru_cache(maxsize=4)
+def _load_pipeline(path, version):
+    pipeline = CompactModel(path) if path.endswith(".tgm") else joblib.load(path)
+    pipeline.model_version = f"{os.path.basename(path)}:{version}"
+    return pipeline
+
+
+def _abusive_column(pipeline):
+    # predict_proba columns follow pipeline.classes_, labels are 0/1
+    return list(pipeline.classes_).index(1)
+
+
+def _predict_proba(pipeline, texts):
+    """pipeline.predict_proba, with the vectorizer and classifier timed apart."""
+    steps = getattr(pipeline, "steps", None)
+    if steps is None:
+        # CompactModel: vectorizing and the dot product are one pass
+        with span("model"):
+            return pipeline.predict_proba(texts)
+    X = texts
+    with span("vectorize"):
+        for _, step in steps[:-1]:
+            if step is not None and step != "passthrough":
+                X = step.transform(X)
+    with span("classify"):
+        return steps[-1][1].predict_proba(X)
+
+
+# ---------------- Language Routing ----------------
+
+def language_model_path(language):
+    return os.path.join(ROOT_DIR, f"abuse_model.{language}.joblib")
+
+
+def language_pipelines():
+    """Language -> model for the languages that have their own abuse_model.<lang>.joblib."""
+    if not LANGUAGE_ROUTING:
+        return {}
+    pipelines = {}
+    for language in language_identifier.languages:
+        path = language_model_path(language)
+        if os.path.exists(path):
+            pipelines[language] = load_pipeline(path)
+    return pipelines
+
+
+def identify_language(text, lexicon=None):
+    """
+    Routing language of a normalized message: a language code, MIXED or
+    UNDETERMINED. With routing off it is always UNDETERMINED, which takes
+    the whole lexicon and the default model.
+    """
+    if not LANGUAGE_ROUTING:
+        return UNDETERMINED
+    lexicon = lexicon or abuse_words.get_lexicon()
+    return language_identifier.identify(text, lexicon.token_languages)
+
+
+def _predict_routed(pipeline, texts, languages):
+    """(prob, label) arrays for `texts`, each scored by its language's model if there is one."""
+    models = language_pipelines()
+    groups = {}
+    for i, language in enumerate(languages):
+        groups.setdefault(language if language in models else None, []).append(i)
+    prob = np.empty(len(texts))
+    label = np.empty(len(texts), dtype=pipeline.classes_.dtype)
+    for language, rows in groups.items():
+        model = models.get(language, pipeline)
+        proba = _predict_proba(model, texts if len(groups) == 1 else [texts[i] for i in rows])
+        prob[rows] = proba[:, _abusive_column(model)]
+        label[rows] = model.classes_[proba.argmax(axis=1)]
+    return prob, label
+
+
+# ---------------- Severity ----------------
+
+def toxicity_level(prob, abusive_count):
+    """
+    Severity from the model probability. Without a lexicon hit the model
+    needs more confidence (MODEL_ONLY_MEDIUM / MODEL_ONLY_HIGH), but it can
+    still raise the level on its own.
+    """
+    if abusive_count == 0:
+        medium, high = MODEL_ONLY_MEDIUM, MODEL_ONLY_HIGH
+    else:
+        medium, high = 0.2, 0.5
+    if prob < medium:
+        return "Low"
+    elif prob < high:
+        return "Medium"
+    else:
+        return "High"
+
+
+def toxicity_levels(prob, abusive_count):
+    """Vectorized `toxicity_level` over equal-length arrays."""
+    prob = np.asarray(prob)
+    hit = np.asarray(abusive_count) > 0
+    medium = np.where(hit, 0.2, MODEL_ONLY_MEDIUM)
+    high = np.where(hit, 0.5, MODEL_ONLY_HIGH)
+    idx = np.where(prob < medium, 0, np.where(prob < high, 1, 2))
+    return SEVERITY_LEVELS[idx]
+
+
+# ---------------- Result Cache ----------------
+
+_result_cache = None
+
+
+def get_result_cache():
+    """Process-wide cache configured from utils.settings."""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL, RESULT_CACHE_DB)
+    return _result_cache
+
+
+def result_version(pipeline):
+    """
+    Changes whenever the model artifact, abuse lexicon, obfuscation rules,
+    sentiment engine or language routing (word lists, language models) changes.
+    """
+    model = getattr(pipeline, "model_version", None) or f"object-{id(pipeline):x}"
+    routing = "off"
+    if LANGUAGE_ROUTING:
+        models = ",".join(f"{lang}={p.model_version}" for lang, p in language_pipelines().items())
+        routing = f"{language_identifier.version}:{models}"
+    return f"{model}|{abuse_words.get_lexicon().version}|{obfuscation.version}|{SENTIMENT_ENGINE}|{routing}"
+
+
+def _cache_key(cache, language, normalized):
+    # Keyed by the normalized text, not the model input: lexicon hits and
+    # polarity are computed on it, and cleaning drops URLs, tags and
+    # punctuation they depend on. Equal texts in different languages may
+    # take different models.
+    return cache.make_key(f"{language}\0{normalized}")
+
+
+# ---------------- Single Text ----------------
+
+def analyze_text(text, pipeline=None, cache=None):
+    """
+    Score one message. With a `cache`, texts that normalize to the same
+    text (and language) share one result.
+    """
+    if pipeline is None:
+        pipeline = load_pipeline()
+    with trace("analyze_text"):
+        with span("normalize"):
+            text = normalize_censored(text)
+            cleaned = clean_text(text)
+        lexicon = abuse_words.get_lexicon()
+        with span("language"):
+            language = identify_language(text, lexicon)
+
+        if cache is not None:
+            with span("cache"):
+                cache.set_version(result_version(pipeline))
+                key = _cache_key(cache, language, text)
+                hit = cache.get(key)
+            if hit is not None:
+                pred, prob, abusive_tokens, polarity = hit
+                return cleaned, pred, prob, list(abusive_tokens), sentiment_label(polarity), polarity
+
+        model = language_pipelines().get(language, pipeline)
+        proba = _predict_proba(model, [cleaned])[0]
+        pred = model.classes_[proba.argmax()]
+        prob = proba[_abusive_column(model)]
+        with span("lexicon"):
+            abusive_tokens = sorted(lexicon.matcher_for(language).find_terms(text))
+        with span("sentiment"):
+            polarity = polarity_of(text)
+        sentiment = sentiment_label(polarity)
+        if cache is not None:
+            cache.put(key, [pred.item(), float(prob), abusive_tokens, polarity])
+        return cleaned, pred, prob, abusive_tokens, sentiment, polarity
+
+
+# ---------------- Batch ----------------
+
+def _score_batch(batch, pipeline, cache=None, spans=False, cleaned_text=False):
+    with trace("score_batch"):
+        return _score_batch_traced(batch, pipeline, cache, spans, cleaned_text)
+
+
+def _score_batch_traced(batch, pipeline, cache, spans, cleaned_text):
+    with span("normalize"):
+        normalized = [normalize_censored(str(t)) for t in batch]
+        cleaned = [clean_text(t) for t in normalized]
+    n = len(batch)
+    lexicon = abuse_words.get_lexicon()
+    with span("language"):
+        language = [identify_language(t, lexicon) for t in normalized]
+    found = None
+    if spans:
+        # Every row needs its matches, cached or not
+        with span("lexicon"):
+            found = [lexicon.matcher_for(lang).find_all(t) for lang, t in zip(language, normalized)]
+
+    prob = np.empty(n)
+    label = np.empty(n, dtype=pipeline.classes_.dtype)
+    abusive_count = np.empty(n, dtype=np.int32)
+    polarity = np.empty(n)
+
+    todo = list(range(n))
+    if cache is not None:
+        with span("cache"):
+            cache.set_version(result_version(pipeline))
+            todo, waiting = [], {}
+            for i, key in enumerate(_cache_key(cache, lang, t) for lang, t in zip(language, normalized)):
+                if key in waiting:
+                    waiting[key].append(i)
+                    continue
+                hit = cache.get(key)
+                if hit is None:
+                    waiting[key] = [i]
+                    todo.append(i)
+                else:
+                    label[i], prob[i], tokens, polarity[i] = hit
+                    abusive_count[i] = len(tokens)
+
+    if todo:
+        # One TF-IDF transform + one classifier call per model in the batch
+        prob[todo], label[todo] = _predict_routed(pipeline, [cleaned[i] for i in todo], [language[i] for i in todo])
+        with span("lexicon"):
+            if found is None:
+                tokens = [sorted(lexicon.matcher_for(language[i]).find_terms(normalized[i])) for i in todo]
+            else:
+                tokens = [sorted({term for _, _, term in found[i]}) for i in todo]
+            abusive_count[todo] = [len(t) for t in tokens]
+        with span("sentiment"):
+            polarity[todo] = polarities([normalized[i] for i in todo])
+
+        if cache is not None:
+            for i, t in zip(todo, tokens):
+                key = _cache_key(cache, language[i], normalized[i])
+                cache.put(key, [label[i].item(), float(prob[i]), t, float(polarity[i])])
+                for j in waiting[key][1:]:
+                    label[j], prob[j], abusive_count[j], polarity[j] = label[i], prob[i], abusive_count[i], polarity[i]
+
+    df = pd.DataFrame({
+        "prob": prob,
+        "label": label,
+        "abusive_count": abusive_count,
+        "polarity": polarity,
+        "severity": toxicity_levels(prob, abusive_count),
+        "language": language,
+    })
+    if found is not None:
+        df["spans"] = [original_spans(str(t), norm, f) for t, norm, f in zip(batch, normalized, found)]
+    if cleaned_text:
+        df["cleaned"] = cleaned
+    return df
+
+
+def iter_analyze_texts(texts, pipeline=None, batch_size=1000, cache=None, spans=False, cleaned_text=False):
+    """
+    Score `texts` batch by batch, yielding one DataFrame per batch.
+    Row index continues across batches so the frames can be concatenated.
+    With `spans`, a "spans" column lists the (start, end, term) lexicon
+    matches of each row, as offsets into the text as given; with
+    `cleaned_text`, a "cleaned" column holds the model input.
+    """
+    if pipeline is None:
+        pipeline = load_pipeline()
+    offset = 0
+    batch = []
+    for text in texts:
+        batch.append(text)
+        if len(batch) == batch_size:
+            df = _score_batch(batch, pipeline, cache, spans, cleaned_text)
+            df.index += offset
+            offset += len(batch)
+            batch = []
+            yield df
+    if batch:
+        df = _score_batch(batch, pipeline, cache, spans, cleaned_text)
+        df.index += offset
+        yield df
+
+
+def analyze_texts(texts, pipeline=None, batch_size=1000, cache=None):
+    """
+    Columnar batch version of `analyze_text`.
+    Returns a DataFrame with prob, label, abusive_count, polarity, severity
+    and the routing language.
+    """
+    frames = list(iter_analyze_texts(texts, pipeline, batch_size, cache))
+    if not frames:
+        return pd.DataFrame({
+            "prob": np.empty(0), "label": np.empty(0, dtype=np.int64),
+            "abusive_count": np.empty(0, dtype=np.int32),
+            "polarity": np.empty(0), "severity": np.empty(0, dtype=object),
+            "language": np.empty(0, dtype=object),
+        })
+    return pd.concat(frames)
@@ -1,12 +1,253 @@
-from textblob import TextBlob
-
-def get_sentiment(text):
-    blob = TextBlob(text)
-    polarity = blob.sentiment.polarity
-    if polarity > 0.1:
-        sentiment = "Positive"
-    elif polarity < -0.1:
-        sentiment = "Negative"
-    else:
-        sentiment = "Neutral"
-    return sentiment, polarity
+# sentiment_analysis.py
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from .settings import SENTIMENT_ENGINE, SENTIMENT_LEXICON_PATH
+
+NEGATIONS = ("no", "not", "n't", "never")
+# Punctuation TextBlob splits off the edges of a token
+_EDGE = re.escape(".,;:!?()[]{}`@#$^&*+-|=~_")
+# TextBlob splits every quote and apostrophe into its own token
+_QUOTES = str.maketrans({c: " " for c in "'\"“”‘’"})
+
+SentimentLexicon = namedtuple(
+    "SentimentLexicon", "index faces polarity intensity word modifier adverb emoticon negation bang"
+)
+
+
+# ---------------- Labels ----------------
+def sentiment_label(polarity):
+    return "Positive" if polarity > 0.1 else "Negative" if polarity < -0.1 else "Neutral"
+
+
+# ---------------- Lexicon ----------------
+def compile_lexicon(path=SENTIMENT_LEXICON_PATH):
+    """
+    Dump TextBlob's English sentiment lexicon (en-sentiment.xml plus its
+    derived -ly adverbs and emoticons) to a TSV of
+    word, polarity, intensity, kind. Only needed when TextBlob changes.
+    """
+    from textblob._text import EMOTICONS
+    from textblob.en import sentiment
+
+    sentiment.load()
+    rows = {}
+    for (_, polarity), faces in EMOTICONS.items():
+        for face in faces:
+            if not face.isalpha():   # TextBlob never scores "XD" and the like
+                rows[face] = (polarity, 1.0, "emoticon")
+    rows["(!)"] = (0.0, 1.0, "emoticon")
+    for word, senses in dict.items(sentiment):
+        if " " in word:
+            continue   # multi-word forms never match a whitespace tokenizer
+        polarity, _, intensity = senses[None]
+        modifier = any(pos in senses for pos in sentiment.modifiers)
+        rows[word] = (polarity, intensity, "modifier" if modifier else "word")
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Compiled from TextBlob's en-sentiment.xml by utils.sentiment_analysis.compile_lexicon\n")
+        for word in sorted(rows):
+            polarity, intensity, kind = rows[word]
+            f.write(f"{word}\t{polarity!r}\t{intensity!r}\t{kind}\n")
+
+
+def load_lexicon(path=SENTIMENT_LEXICON_PATH):
+    """Lexicon as a token -> id dict and per-id NumPy arrays."""
+    words, polarity, intensity, kinds = [], [], [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            word, p, i, kind = line.rstrip("\n").split("\t")
+            words.append(word)
+            polarity.append(float(p))
+            intensity.append(float(i))
+            kinds.append(kind)
+
+    # Tokens are looked up lowercased. Negations and "!" get ids too; they
+    # are not scored themselves.
+    index = {w.lower(): n for n, w in enumerate(words)}
+    size = len(words)
+    for w in NEGATIONS + ("!",):
+        if w not in index:
+            index[w] = size
+            size += 1
+    size += 1   # last id: unknown token
+    pad = size - len(words)
+
+    def flag(values):
+        return np.concatenate([np.array(values, dtype=bool), np.zeros(pad, dtype=bool)])
+
+    kinds = np.array(kinds)
+    faces = [w for w, kind in zip(words, kinds) if kind == "emoticon"]
+    negation = np.zeros(size, dtype=bool)
+    negation[[index[w] for w in NEGATIONS]] = True
+    bang = np.zeros(size, dtype=bool)
+    bang[index["!"]] = True
+    return SentimentLexicon(
+        index,
+        faces,
+        np.concatenate([polarity, np.zeros(pad)]),
+        np.concatenate([intensity, np.ones(pad)]),
+        flag(kinds != "emoticon"),
+        flag(kinds == "modifier"),
+        flag([w.endswith("ly") for w in words]),
+        flag(kinds == "emoticon"),
+        negation,
+        bang,
+    )
+
+
+_lexicon = None
+_token_re = None
+_quoted_face_re = None
+
+
+def get_lexicon():
+    global _lexicon, _token_re, _quoted_face_re
+    if _lexicon is None:
+        _lexicon = load_lexicon()
+        # Emoticons are matched whole and case-sensitively, as TextBlob does;
+        # anything else is a word with its edge punctuation stripped, an
+        # ellipsis, or a lone "!" which boosts the preceding assessment.
+        faces = sorted(_lexicon.faces, key=len, reverse=True)
+        first = "".join(sorted({re.escape(f[0]) for f in faces}))
+        _token_re = re.compile(
+            rf"(?<!\S)(?=[{first}])(?:{'|'.join(map(re.escape, faces))})(?!\S)"
+            rf"|\.\.\.|!|[^\s{_EDGE}]+(?:[{_EDGE}]+[^\s{_EDGE}]+)*"
+        )
+        quoted = [f for f in faces if f.translate(_QUOTES) != f]
+        _quoted_face_re = re.compile(
+            rf"((?<!\S)(?:{'|'.join(map(re.escape, quoted))})(?!\S))" if quoted else r"(?!)"
+        )
+    return _lexicon
+
+
+def _split_quotes(text):
+    # Quotes become separators, except inside emoticons such as ":'("
+    if _quoted_face_re.search(text) is None:
+        return text.translate(_QUOTES)
+    parts = _quoted_face_re.split(text)
+    parts[::2] = [p.translate(_QUOTES) for p in parts[::2]]
+    return "".join(parts)
+
+
+# ---------------- Vectorized Engine ----------------
+def _previous(event, doc):
+    """For every token, the index of the last `event` token before it in the same text, else -1."""
+    idx = np.arange(len(event))
+    last = np.maximum.accumulate(np.where(event, idx, -1))
+    prev = np.empty_like(last)
+    prev[0] = -1
+    prev[1:] = last[:-1]
+    prev[(prev >= 0) & (doc[np.maximum(prev, 0)] != doc)] = -1
+    return prev
+
+
+def lexicon_polarities(texts):
+    """
+    TextBlob-compatible polarity for a batch of texts.
+
+    Tokens of the whole batch are laid out as one flat id array (CSR
+    style: ids plus a text index per token) and TextBlob's pattern rules
+    are applied with array operations instead of a per-token Python loop:
+    a modifier ("very", "-ly" adverbs) scales the next known word by its
+    intensity, a negation within one short word flips it (x -0.5), and
+    each trailing "!" multiplies it by 1.25. Polarity is the mean over
+    assessments.
+    """
+    lex = get_lexicon()
+    unknown = len(lex.polarity) - 1
+    get = lex.index.get
+    findall = _token_re.findall
+
+    tokens = [findall(_split_quotes(t.replace("n't", " n't"))) for t in texts]
+    counts = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+    out = np.zeros(len(texts))
+    if not counts.sum():
+        return out
+    flat = [tok.lower() for toks in tokens for tok in toks]
+
+    tid = np.fromiter((get(tok, unknown) for tok in flat), dtype=np.int64, count=len(flat))
+    length = np.fromiter(map(len, flat), dtype=np.int64, count=len(flat))
+    doc = np.repeat(np.arange(len(texts)), counts)
+    word = lex.word[tid]
+    negation = lex.negation[tid]
+
+    # Modifier state: set by a known modifier, kept across words of up to
+    # two letters. A negation right after an "-ly" modifier negates the
+    # modifier's assessment ("really not good") and leaves the state alone.
+    prev_m = _previous(word | ((length > 2) & ~negation), doc)
+    holder = np.maximum(prev_m, 0)
+    modified = (prev_m >= 0) & word[holder] & lex.modifier[tid[holder]]
+    consumed = negation & modified & lex.adverb[tid[holder]]
+    prev_m = _previous(word | ((length > 2) & ~consumed), doc)
+    holder = np.maximum(prev_m, 0)
+    merged = word & (prev_m >= 0) & word[holder] & lex.modifier[tid[holder]]
+
+    # Negation state: kept across one-letter words ("not a good")
+    prev_n = _previous(word | negation | (length > 1), doc)
+    negator = np.maximum(prev_n, 0)
+    negated = word & (prev_n >= 0) & negation[negator] & ~consumed[negator]
+
+    intensity = np.where(negated, 1.0 / lex.intensity[tid], lex.intensity[tid])
+    score = np.where(merged, np.clip(lex.polarity[tid] * intensity[holder], -1.0, 1.0), lex.polarity[tid])
+
+    # One assessment per emoticon or run of merged words; the last word's score stands
+    assessed = word | lex.emoticon[tid]
+    pos = np.flatnonzero(assessed)
+    if not len(pos):
+        return out
+    group = np.cumsum(~merged[pos]) - 1
+    n_groups = group[-1] + 1
+    last = np.r_[group[1:] != group[:-1], True]
+    group_of = np.full(len(tid), -1)
+    group_of[pos] = group
+    closes = np.zeros(len(tid), dtype=bool)
+    closes[pos[last]] = True
+
+    group_score = score[pos][last]
+    group_doc = doc[pos][last]
+    group_negated = np.zeros(n_groups, dtype=bool)
+    group_negated[group[negated[pos]]] = True
+
+    # A consumed negation, and every "!", applies to the latest assessment;
+    # a "!" is lost if a later word still merges into that assessment
+    prev_a = _previous(assessed, doc)
+    group_negated[group_of[prev_a[consumed & (prev_a >= 0)]]] = True
+    targets = prev_a[lex.bang[tid] & (prev_a >= 0)]
+    bangs = np.bincount(group_of[targets[closes[targets]]], minlength=n_groups)
+
+    group_score = np.clip(group_score * 1.25 ** bangs, -1.0, 1.0)
+    group_score = np.where(group_negated, group_score * -0.5, group_score)
+
+    totals = np.bincount(group_doc, weights=group_score, minlength=len(texts))
+    assessments = np.bincount(group_doc, minlength=len(texts))
+    np.divide(totals, assessments, out=out, where=assessments > 0)
+    return out
+
+
+# ---------------- TextBlob Engine ----------------
+def textblob_polarity(text):
+    # TextBlob drags in nltk + scipy.stats (~2s); only pay for it on first use
+    from textblob import TextBlob
+    return TextBlob(text).sentiment.polarity
+
+
+# ---------------- Public API ----------------
+def polarities(texts, engine=SENTIMENT_ENGINE):
+    """Polarity for every text, as a float array."""
+    if engine == "textblob":
+        return np.array([textblob_polarity(t) for t in texts], dtype=np.float64)
+    return lexicon_polarities(texts)
+
+
+def polarity_of(text, engine=SENTIMENT_ENGINE):
+    return float(polarities([text], engine)[0])
+
+
+def get_sentiment(text, engine=SENTIMENT_ENGINE):
+    polarity = polarity_of(text, engine)
+    return sentiment_label(polarity), polarity
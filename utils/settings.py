@@ -1,8 +1,116 @@
-import nltk
-from nltk.corpus import stopwords
+import os
 
-nltk.download('stopwords')
-STOP_WORDS = set(stopwords.words('english'))
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Vendored copy of the NLTK English stopword list, so nothing is ever
+# downloaded at runtime (air-gapped deployments block on nltk.download).
+STOPWORDS_PATH = os.path.join(ROOT_DIR, "data", "stopwords", "english")
+
+
+def load_stopwords(path=STOPWORDS_PATH):
+    with open(path, encoding="utf-8") as f:
+        return frozenset(line.strip() for line in f if line.strip())
+
+
+STOP_WORDS = load_stopwords()
+
+# Abuse lexicon (utils.abuse_words): terms with category and severity
+# weight, and replacement suggestions. build_lexicon.py compiles both into
+# lexicon.idx; running processes check the files every
+# LEXICON_RELOAD_INTERVAL seconds and swap in a changed lexicon (0 never
+# reloads).
+LEXICON_DIR = os.environ.get("TOXIGUARD_LEXICON_DIR") or os.path.join(ROOT_DIR, "data", "lexicon")
+LEXICON_PATH = os.path.join(LEXICON_DIR, "lexicon.tsv")
+LEXICON_SUGGESTIONS_PATH = os.path.join(LEXICON_DIR, "suggestions.tsv")
+LEXICON_INDEX_PATH = os.path.join(LEXICON_DIR, "lexicon.idx")
+LEXICON_RELOAD_INTERVAL = float(os.environ.get("TOXIGUARD_LEXICON_RELOAD_INTERVAL", "2.0"))
+
+# Obfuscation rules (utils.obfuscation): character folds, masks and the
+# canonical terms that "1d10t", "a$$hole" or "f**k" are rewritten to.
+OBFUSCATION_RULES_PATH = os.path.join(ROOT_DIR, "data", "obfuscation", "rules.tsv")
+
+# Sentiment polarity: "lexicon" scores batches with the vectorized engine in
+# utils.sentiment_analysis (TextBlob's lexicon, compiled to a TSV);
+# "textblob" runs TextBlob itself, one message at a time.
+SENTIMENT_ENGINE = os.environ.get("TOXIGUARD_SENTIMENT_ENGINE", "lexicon")
+SENTIMENT_LEXICON_PATH = os.path.join(ROOT_DIR, "data", "sentiment", "en-polarity.tsv")
+
+# Language routing (utils.language): the word lists each language is
+# learned from (first column of each line). With routing on, a message is
+# matched against its language's lexicon partition and scored by
+# abuse_model.<lang>.joblib when that file exists; code-mixed messages use
+# the whole lexicon and the default model.
+LANGUAGE_DIR = os.path.join(ROOT_DIR, "data", "language")
+LANGUAGE_WORDLISTS = {
+    "en": [STOPWORDS_PATH, SENTIMENT_LEXICON_PATH, os.path.join(LANGUAGE_DIR, "en.txt")],
+    "hi": [os.path.join(LANGUAGE_DIR, "hi.txt")],
+}
+LANGUAGE_ROUTING = os.environ.get("TOXIGUARD_LANGUAGE_ROUTING", "1") != "0"
+
+# Severity without a lexicon hit: the model alone has to be this sure
+# for Medium / High (with a hit, 0.2 / 0.5 as before)
+MODEL_ONLY_MEDIUM = 0.6
+MODEL_ONLY_HIGH = 0.8
+
+# Cascade scoring (utils.cascade): the lexicon tier calls a message abusive
+# at this many distinct lexicon terms, and clean when it has no hit and at
+# most this many words. Everything else goes to the model.
+CASCADE_MIN_HITS = 2
+CASCADE_SHORT_WORDS = 3
+
+# Long-document mode (utils.longdoc): words per window, and windows in the
+# first scoring call when a time budget or early exit is set (later calls
+# double in size)
+LONGDOC_WINDOW_WORDS = 50
+LONGDOC_BATCH_WINDOWS = 64
+
+# Exports (utils.export): rows per CSV chunk / Parquet row group, and the
+# gzip level of .csv.gz files (6 writes ~20% faster than 9 for files <1%
+# larger; 1 is twice as fast again but ~25% larger)
+EXPORT_CHUNK_ROWS = 50000
+EXPORT_GZIP_LEVEL = 6
+
+# Chat moderation (moderate.py, utils.moderation): each user's sliding
+# window, kept as this many time buckets, and the escalation rules: this
+# many High-severity messages in the window, or a rolling mean toxicity
+# this high over at least this many messages. The least recently active
+# users beyond MODERATION_MAX_USERS are forgotten.
+MODERATION_WINDOW_SECONDS = 300
+MODERATION_WINDOW_BUCKETS = 10
+MODERATION_ESCALATE_HIGH = 3
+MODERATION_ESCALATE_TOXICITY = 0.8
+MODERATION_ESCALATE_MIN_MESSAGES = 5
+MODERATION_MAX_USERS = 100000
+
+# Result cache (utils.cache.ResultCache). Set TOXIGUARD_CACHE_DB to a
+# file path to add a SQLite tier shared by all worker processes.
+RESULT_CACHE_SIZE = 50000
+RESULT_CACHE_TTL = 3600
+RESULT_CACHE_DB = os.environ.get("TOXIGUARD_CACHE_DB") or None
+
+# Analysis history: per-session ring buffer, optionally logged to SQLite
+HISTORY_CAPACITY = 200
+HISTORY_PREVIEW_CHARS = 160
+HISTORY_DB = os.environ.get("TOXIGUARD_HISTORY_DB") or None
+
+# Memory diagnostics (utils.memory). Profiling traces each analysis with
+# tracemalloc (frames kept per allocation, source lines listed); it is
+# opt-in because traced code runs several times slower. The cap is on each
+# browser session's estimated session_state size in MB (0 = no cap): over
+# it, cached renders, timing traces, the real-time sentence cache and then
+# history are trimmed.
+MEMORY_PROFILE = os.environ.get("TOXIGUARD_MEMORY_PROFILE", "0") == "1"
+MEMORY_PROFILE_FRAMES = 1
+MEMORY_PROFILE_TOP = 10
+SESSION_MEMORY_CAP_MB = float(os.environ.get("TOXIGUARD_SESSION_MEMORY_CAP_MB", "0"))
+
+# Stage timing (utils.tracing): share of analyses that are timed into the
+# /metrics histograms. 0 turns tracing off; 0.01-0.1 is cheap enough to
+# leave on in production.
+TRACE_SAMPLE_RATE = float(os.environ.get("TOXIGUARD_TRACE_SAMPLE_RATE", "1.0"))
+
+# Real-time mode: charts and word clouds are rebuilt at most this often
+REALTIME_DEBOUNCE_SECONDS = 2.0
 
 APP_COLORS = {
     "background": "black",
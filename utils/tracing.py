@@ -0,0 +1,201 @@
+# tracing.py
+import math
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+import numpy as np
+
+from .settings import TRACE_SAMPLE_RATE
+
+# Histogram upper bounds in seconds; +Inf is implicit
+BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+           0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = ContextVar("toxiguard_trace", default=None)
+_sample_rate = TRACE_SAMPLE_RATE
+
+
+# ---------------- Histograms ----------------
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        """Estimate from the buckets, interpolating like PromQL's histogram_quantile."""
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts[:-1]):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                return lower + (BUCKETS[i] - lower) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+
+class StageMetrics:
+    """Process-wide latency histograms, one per stage and one per trace name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def record(self, trace):
+        with self._lock:
+            for stage, seconds in (*trace.stages.items(), (trace.name, trace.total)):
+                h = self._stages.get(stage)
+                if h is None:
+                    h = self._stages[stage] = Histogram()
+                h.observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def snapshot(self):
+        """JSON-ready view: count, sum, p50/p95/p99 and cumulative buckets per stage."""
+        with self._lock:
+            stages = {name: (list(h.counts), h.count, h.sum, h.quantile(0.5), h.quantile(0.95), h.quantile(0.99))
+                      for name, h in self._stages.items()}
+        return {
+            "sample_rate": _sample_rate,
+            "stages": {
+                name: {
+                    "count": count,
+                    "sum_s": total,
+                    "p50_ms": p50 * 1e3,
+                    "p95_ms": p95 * 1e3,
+                    "p99_ms": p99 * 1e3,
+                    "buckets": dict(zip([*map(str, BUCKETS), "+Inf"], np.cumsum(counts).tolist())),
+                }
+                for name, (counts, count, total, p50, p95, p99) in sorted(stages.items())
+            },
+        }
+
+    def prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = [
+            "# HELP toxiguard_trace_sample_rate Fraction of analyses that are timed.",
+            "# TYPE toxiguard_trace_sample_rate gauge",
+            f"toxiguard_trace_sample_rate {_sample_rate}",
+            "# HELP toxiguard_stage_seconds Time spent per analysis stage, sampled analyses only.",
+            "# TYPE toxiguard_stage_seconds histogram",
+        ]
+        with self._lock:
+            stages = sorted((name, list(h.counts), h.count, h.sum) for name, h in self._stages.items())
+        for name, counts, count, total in stages:
+            cumulative = 0
+            for bound, n in zip([*map(repr, BUCKETS), "+Inf"], counts):
+                cumulative += n
+                lines.append(f'toxiguard_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'toxiguard_stage_seconds_sum{{stage="{name}"}} {total!r}')
+            lines.append(f'toxiguard_stage_seconds_count{{stage="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+metrics = StageMetrics()
+
+
+# ---------------- Traces & Spans ----------------
+
+class Trace:
+    """Stage timings of one analysis, in the order the stages first ran."""
+    __slots__ = ("name", "stages", "total", "_start", "_token")
+
+    def __init__(self, name):
+        self.name = name
+        self.stages = {}
+        self.total = 0.0
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.total = time.perf_counter() - self._start
+        _current.reset(self._token)
+        metrics.record(self)
+        return False
+
+
+class _Span:
+    __slots__ = ("stages", "stage", "start")
+
+    def __init__(self, stages, stage):
+        self.stages = stages
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stages[self.stage] = self.stages.get(self.stage, 0.0) + time.perf_counter() - self.start
+        return False
+
+
+class _Noop:
+    __slots__ = ()
+    stages = {}
+    total = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NOOP = _Noop()
+
+
+def trace(name, force=False):
+    """
+    Time an analysis. Nested calls join the trace already running in this
+    thread or task; otherwise the analysis is sampled at the configured
+    rate (`force` always samples). Unsampled traces and their spans are a
+    shared no-op.
+    """
+    if _current.get() is not None:
+        return NOOP
+    if force or (_sample_rate and (_sample_rate >= 1 or random.random() < _sample_rate)):
+        return Trace(name)
+    return NOOP
+
+
+def span(stage):
+    """Time one stage of the current trace; a no-op when nothing is being traced."""
+    trace = _current.get()
+    return NOOP if trace is None else _Span(trace.stages, stage)
+
+
+def set_sample_rate(rate):
+    """0 disables tracing, 1 times every analysis."""
+    global _sample_rate
+    if not 0 <= rate <= 1:
+        raise ValueError(f"sample rate must be between 0 and 1, got {rate}")
+    _sample_rate = rate
+
+
+def rolling_percentiles(traces, quantiles=(50, 95)):
+    """Per-stage percentiles in milliseconds over a window of finished traces."""
+    samples = {}
+    for t in traces:
+        for stage, seconds in (*t.stages.items(), ("total", t.total)):
+            samples.setdefault(stage, []).append(seconds * 1e3)
+    return {stage: [*np.percentile(values, quantiles), len(values)] for stage, values in samples.items()}
@@ -0,0 +1,119 @@
+import hashlib
+import io
+import threading
+from collections import Counter, OrderedDict
+
+from .preprocessing import clean_text
+from .settings import STOP_WORDS, APP_COLORS
+
+# Word clouds are shown at roughly half the width of the page, so they are
+# generated at 400x200 instead of 800x400 (a quarter of the pixels).
+WORDCLOUD_SIZE = (400, 200)
+WORDCLOUD_CACHE_SIZE = 128
+
+# Shared by every session's script thread; rendering runs outside the lock
+_wordcloud_cache = OrderedDict()
+_wordcloud_lock = threading.Lock()
+
+
+# ---------------- Word Clouds ----------------
+def non_abusive_frequencies(text, abusive_tokens):
+    abusive = set(abusive_tokens)
+    return Counter(
+        w for w in clean_text(text).split()
+        if w not in abusive and w not in STOP_WORDS
+    )
+
+
+def abusive_frequencies(abusive_tokens):
+    return Counter(w.lower() for w in abusive_tokens)
+
+
+def frequency_fingerprint(freq, colormap, size=WORDCLOUD_SIZE):
+    data = repr((sorted(freq.items()), colormap, size)).encode()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def wordcloud_png(freq, colormap="cool", size=WORDCLOUD_SIZE):
+    """
+    PNG bytes of a word cloud, cached by token-frequency fingerprint.
+    No matplotlib figure is involved, so nothing is left to close.
+    """
+    if not freq:
+        return None
+    key = frequency_fingerprint(freq, colormap, size)
+    with _wordcloud_lock:
+        png = _wordcloud_cache.get(key)
+        if png is not None:
+            _wordcloud_cache.move_to_end(key)
+            return png
+
+    from wordcloud import WordCloud
+    wc = WordCloud(
+        width=size[0],
+        height=size[1],
+        background_color="black",
+        colormap=colormap,
+        random_state=0
+    ).generate_from_frequencies(freq)
+    buf = io.BytesIO()
+    wc.to_image().save(buf, format="PNG", optimize=True)
+    png = buf.getvalue()
+
+    with _wordcloud_lock:
+        _wordcloud_cache[key] = png
+        while len(_wordcloud_cache) > WORDCLOUD_CACHE_SIZE:
+            _wordcloud_cache.popitem(last=False)
+    return png
+
+
+# ---------------- Lightweight Charts ----------------
+def gauge_html(prob):
+    pct = max(0.0, min(1.0, float(prob))) * 100
+    return f"""
+    <div style="margin:12px 0;">
+        <div style="display:flex;justify-content:space-between;color:#e5e7eb;font-weight:700;">
+            <span>Toxicity</span><span>{prob:.2f}</span>
+        </div>
+        <div style="background:rgba(255,255,255,0.12);border-radius:999px;height:18px;overflow:hidden;">
+            <div style="width:{pct:.1f}%;height:100%;border-radius:999px;
+                        background:linear-gradient(90deg,#22c55e,#f59e0b,#ef4444);"></div>
+        </div>
+    </div>
+    """
+
+
+def pie_html(clean, abusive):
+    total = clean + abusive
+    share = abusive / total * 100 if total else 0.0
+    return f"""
+    <div style="display:flex;align-items:center;gap:24px;margin:12px 0;">
+        <div style="width:140px;height:140px;border-radius:50%;
+                    background:conic-gradient({APP_COLORS['abusive']} 0 {share:.1f}%,
+                                              {APP_COLORS['non_abusive']} {share:.1f}% 100%);"></div>
+        <div style="color:#e5e7eb;line-height:1.8;">
+            <span style="color:{APP_COLORS['non_abusive']};">●</span> Clean: <b>{clean}</b><br>
+            <span style="color:{APP_COLORS['abusive']};">●</span> Abusive: <b>{abusive}</b>
+        </div>
+    </div>
+    """
+
+
+# ---------------- Plotly ----------------
+def plot_abusive_vs_nonabusive(abusive_tokens, all_words):
+    import pandas as pd
+    import plotly.express as px
+    df_compare = pd.DataFrame({
+        "Type":["Abusive","Non-Abusive"],
+        "Count":[len(abusive_tokens), len(all_words)-len(abusive_tokens)]
+    })
+    fig = px.pie(df_compare, names='Type', values='Count',
+                 color='Type', color_discrete_map={'Abusive':'#e53935','Non-Abusive':'#43a047'},
+                 title="Abusive vs Non-Abusive Words")
+    fig.update_layout(plot_bgcolor='black', paper_bgcolor='black', font_color='white')
+    return fig
+
+
+def generate_wordcloud(words, title="Word Cloud"):
+    """PNG bytes of a word cloud for `words`, or None."""
+    return wordcloud_png(Counter(words))